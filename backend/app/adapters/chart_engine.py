@@ -0,0 +1,150 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Tuple
+
+from . import metrics
+from .compute_executor import compute_executor
+from .dataframe_cache import dataframe_cache
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("thread", "process")
+
+
+class ChartEngine:
+    """
+    Runs chart aggregations either on the compute executor's threads or, with
+    the "process" engine, in worker processes so that large groupbys use
+    several cores instead of taking turns on the GIL.
+
+    Each worker is a single-process pool with its own DataFrame cache. Jobs are
+    routed by dataset ID, so a dataset is loaded by one worker and stays warm
+    there. When that worker already has `max_queue` jobs, the job spills to the
+    least busy worker, which then warms its own copy. Workers read datasets from
+    storage themselves and send back only the chart payload, never a DataFrame.
+    """
+    def __init__(self, engine: str, workers: int, cache_max_bytes: int, max_queue: int):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown chart engine '{engine}'; expected one of {', '.join(ENGINES)}.")
+        self.engine = engine
+        self.workers = workers
+        self.cache_max_bytes = cache_max_bytes
+        self.max_queue = max_queue
+        self._pools: List[Optional[ProcessPoolExecutor]] = [None] * workers
+        self._in_flight = [0] * workers # Only touched from the event loop
+
+    def start(self):
+        """Spawns the worker processes ahead of the first chart request, which would otherwise wait for them."""
+        if self.engine == "process":
+            for worker in range(self.workers):
+                self._get_pool(worker).submit(_noop)
+            logger.info(f"Chart engine started with {self.workers} worker processes.")
+
+    async def run(self, dataset_id: str, func: Callable[..., Any], *args) -> Any:
+        """
+        Runs `func(*args)`, a chart computation for `dataset_id`, on the configured
+        engine and awaits its result. With the process engine, the stage timings
+        recorded in the worker are added to the current request's.
+        """
+        if self.engine == "thread":
+            return await compute_executor.run(func, *args)
+
+        worker, placement = self._pick_worker(dataset_id)
+        metrics.chart_engine_jobs_total.inc(placement=placement)
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool(worker)
+        self._in_flight[worker] += 1
+        try:
+            with metrics.chart_engine_jobs_in_flight.track(worker=str(worker)):
+                result, timings = await loop.run_in_executor(pool, functools.partial(_run_in_worker, func, *args))
+        except BrokenProcessPool:
+            # The worker died (e.g. killed for memory); the next job starts a fresh one. Every job
+            # queued on the broken pool fails here, so only the first replaces it.
+            if self._pools[worker] is pool:
+                logger.error(f"Chart engine worker {worker} exited unexpectedly; restarting it.")
+                self._pools[worker] = None
+                pool.shutdown(wait=False)
+            raise
+        finally:
+            self._in_flight[worker] -= 1
+        for stage, seconds in timings:
+            metrics.record_stage(stage, seconds)
+        return result
+
+    def invalidate(self, dataset_id: str):
+        """
+        Drops a dataset from the cache of every running worker, e.g. once it is
+        deleted from storage; with spilled jobs, any worker may hold a copy.
+        Safe to call from any thread. The drop is queued behind the worker's
+        current jobs and not awaited.
+        """
+        if self.engine != "process":
+            return
+        for pool in self._pools:
+            if pool is None:
+                continue
+            try:
+                pool.submit(_invalidate_in_worker, dataset_id)
+            except (BrokenProcessPool, RuntimeError):
+                pass # A broken or stopped worker is replaced with an empty cache
+
+    def shutdown(self):
+        """Stops the worker processes, waiting for running jobs to finish."""
+        for pool in self._pools:
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self._pools = [None] * self.workers
+
+    def _pick_worker(self, dataset_id: str) -> Tuple[int, str]:
+        """Returns the worker for a job and whether it is the dataset's own ("affine") or another ("spilled")."""
+        home = zlib.crc32(dataset_id.encode()) % self.workers
+        if self._in_flight[home] < self.max_queue:
+            return home, "affine"
+        least_busy = min(range(self.workers), key=self._in_flight.__getitem__)
+        if self._in_flight[least_busy] < self._in_flight[home]:
+            return least_busy, "spilled"
+        return home, "affine"
+
+    def _get_pool(self, worker: int) -> ProcessPoolExecutor:
+        if self._pools[worker] is None:
+            self._pools[worker] = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(self.cache_max_bytes,),
+            )
+        return self._pools[worker]
+
+
+# --- Worker-Process Entry Points ---
+
+def _init_worker(cache_max_bytes: int):
+    dataframe_cache.max_bytes = cache_max_bytes
+
+
+def _noop():
+    pass
+
+
+def _invalidate_in_worker(dataset_id: str):
+    dataframe_cache.invalidate(dataset_id)
+
+
+def _run_in_worker(func: Callable[..., Any], *args) -> Tuple[Any, List[Tuple[str, float]]]:
+    """Runs a chart job and returns its result with the stage timings it recorded."""
+    timings = metrics.begin_request("chart_engine")
+    return func(*args), timings
+
+
+# --- Singleton Instance Initialization ---
+from ..config import settings
+
+chart_engine = ChartEngine(
+    engine=settings.CHART_ENGINE,
+    workers=settings.CHART_ENGINE_WORKERS,
+    cache_max_bytes=settings.CHART_ENGINE_CACHE_MAX_BYTES,
+    max_queue=settings.CHART_ENGINE_MAX_QUEUE,
+)
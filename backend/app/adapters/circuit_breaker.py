@@ -0,0 +1,78 @@
+import logging
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency the breaker considers unhealthy."""
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.1f}s.")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fails calls to an unhealthy dependency fast instead of letting each one
+    wait for its timeouts.
+
+    After `failure_threshold` consecutive failures the circuit opens and every
+    call is rejected for `reset_seconds`. Then it is half-open: one probe call
+    goes through, and its outcome closes the circuit again or reopens it for
+    another `reset_seconds`. A probe that never reports back (e.g. cancelled)
+    stops blocking others after `reset_seconds`.
+
+    Meant for use from the event loop, so state changes need no lock.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = None
+
+    def check(self):
+        """Raises CircuitOpenError while the circuit rejects calls, without claiming the half-open probe."""
+        retry_after = self.retry_after()
+        if retry_after > 0:
+            raise CircuitOpenError(self.name, retry_after)
+
+    def before_call(self):
+        """Claims permission for one call; raises CircuitOpenError when it must not be made."""
+        self.check()
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+            logger.info(f"Circuit '{self.name}' is half-open; sending a probe call.")
+        if self.state == self.HALF_OPEN:
+            self._probe_started_at = self._clock()
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed after a successful call.")
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probe_started_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit '{self.name}' opened after {self._failures} consecutive failures.")
+            self.state = self.OPEN
+            self._opened_at = self._clock()
+            self._probe_started_at = None
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a call through again; 0 when it does now."""
+        now = self._clock()
+        if self.state == self.OPEN:
+            return max(self._opened_at + self.reset_seconds - now, 0.0)
+        if self.state == self.HALF_OPEN and self._probe_started_at is not None:
+            return max(self._probe_started_at + self.reset_seconds - now, 0.0)
+        return 0.0
@@ -0,0 +1,42 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ComputeExecutor:
+    """
+    Dedicated thread pool for CPU-bound pandas work (parsing, profiling, groupby).
+
+    Keeping this work off the event loop and out of the default threadpool means
+    a burst of heavy chart or upload requests queues here, bounded by
+    `max_workers`, without delaying LLM calls or lightweight endpoints.
+    """
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        logger.info(f"Compute executor initialized with {max_workers} workers.")
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs `func(*args, **kwargs)` on the pool and awaits its result. The
+        caller's context variables (e.g. the request's stage timings) are
+        visible to `func`.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args, **kwargs))
+
+    def shutdown(self):
+        """Stops accepting work; running jobs are allowed to finish."""
+        self._executor.shutdown(wait=False)
+
+
+# --- Singleton Instance Initialization ---
+from ..config import settings
+
+compute_executor = ComputeExecutor(max_workers=settings.COMPUTE_MAX_WORKERS)
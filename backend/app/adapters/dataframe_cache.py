@@ -0,0 +1,102 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# A cache key identifies one parsed version of a dataset: (datasetId, datasetHash_sha256).
+CacheKey = Tuple[str, str]
+
+
+class DataFrameCache:
+    """
+    Process-wide, size-bounded LRU cache of parsed DataFrames.
+
+    Entries are keyed by dataset ID and content hash, and the total footprint is
+    kept under an approximate byte budget by evicting the least recently used
+    entries first. Cached DataFrames are shared between requests, so callers
+    must treat them as read-only.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, dataset_id: str, dataset_hash: str) -> Optional[pd.DataFrame]:
+        """Returns the cached DataFrame for a dataset, or None on a miss."""
+        key = (dataset_id, dataset_hash)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.record_cache_lookup("dataframe", entry is not None)
+        return entry[0] if entry is not None else None
+
+    def put(self, dataset_id: str, dataset_hash: str, df: pd.DataFrame):
+        """Stores a DataFrame, evicting least recently used entries to stay within budget."""
+        size = _estimate_size_bytes(df)
+        if size > self.max_bytes:
+            logger.info(f"Dataset '{dataset_id}' ({size} bytes) exceeds the cache budget; not caching.")
+            return
+
+        key = (dataset_id, dataset_hash)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_bytes -= previous[1]
+            while self._entries and self._current_bytes + size > self.max_bytes:
+                (evicted_id, _), (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self.evictions += 1
+                logger.info(f"Evicted dataset '{evicted_id}' from the DataFrame cache.")
+            self._entries[key] = (df, size)
+            self._current_bytes += size
+
+    def invalidate(self, dataset_id: str):
+        """Drops every cached version of a dataset, e.g. after its directory is removed."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == dataset_id]:
+                _, size = self._entries.pop(key)
+                self._current_bytes -= size
+
+    def clear(self):
+        """Empties the cache. Counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns a snapshot of the cache counters and its current footprint."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "currentBytes": self._current_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _estimate_size_bytes(df: pd.DataFrame) -> int:
+    """Approximates the in-memory footprint of a DataFrame, including object columns."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# --- Singleton Instance Initialization ---
+from ..config import settings
+
+dataframe_cache = DataFrameCache(max_bytes=settings.DATAFRAME_CACHE_MAX_BYTES)
+metrics.registry.add_collector(lambda: metrics.dataframe_cache_bytes.set(dataframe_cache.stats()["currentBytes"]))
@@ -0,0 +1,343 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from xml.parsers import expat
+
+import numpy as np
+import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+# Bytes of sheet XML fed to the parser at a time.
+READ_BLOCK_BYTES = 1024 * 1024
+
+_OFFICE_DOCUMENT_REL = "/officeDocument"
+
+
+def list_sheets(file_path: Path) -> List[str]:
+    """
+    Returns the names of a workbook's sheets, in workbook order. Only the small
+    workbook part of the archive is parsed, so this is cheap even for large
+    files. Raises ValueError when the file is not an XLSX workbook.
+    """
+    with _open_workbook(file_path) as archive:
+        return list(_sheet_paths(archive))
+
+
+def read_sheet(file_path: Path, sheet_name: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads one sheet (the first by default) into a DataFrame identical to what
+    `pd.read_excel` returns: row 1 holds the column names, blank and "NA"-like
+    cells become NaN, blank rows within the data are kept and the columns are
+    typed by the same parser. When `columns` is given, only those columns are
+    kept; unknown names are silently skipped, so callers must check the result.
+
+    The sheet XML is decompressed and parsed as a stream with expat, turning
+    cells straight into Python values instead of building openpyxl's cell
+    objects; shared strings and number formats are read once up front. The
+    rows are then handed to pandas' own parser, so peak memory is that of the
+    sheet's values, as with `pd.read_excel`, without the cell objects. Raises
+    ValueError for unknown sheets and files that are not XLSX workbooks.
+    """
+    rows = _sheet_rows(file_path, sheet_name)
+    if not rows:
+        return pd.DataFrame()
+    usecols = None
+    if columns is not None:
+        requested = set(columns)
+        usecols = lambda col: col in requested
+    try:
+        return TextParser(rows, header=0, skip_blank_lines=False, usecols=usecols).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def _sheet_rows(file_path: Path, sheet_name: Optional[str]) -> List[list]:
+    """
+    Returns a sheet's cell values as the rows `pd.read_excel` hands its parser:
+    one list per sheet row from row 1 up to the last with data, blank cells as
+    empty strings, formula errors as NaN, and every row padded to the same width.
+    """
+    with _open_workbook(file_path) as archive:
+        # --- 1. Workbook Metadata: Sheet Part, Shared Strings, Date Styles ---
+        sheet_paths = _sheet_paths(archive)
+        if not sheet_paths:
+            raise ValueError("The workbook has no sheets.")
+        if sheet_name is None:
+            sheet_name = next(iter(sheet_paths))
+        elif sheet_name not in sheet_paths:
+            raise ValueError(f"Sheet '{sheet_name}' not found. Available sheets: {', '.join(sheet_paths)}")
+        date_styles, timedelta_styles = _date_styles(archive)
+        parser = _SheetParser(_shared_strings(archive), date_styles, timedelta_styles, _epoch(archive))
+
+        # --- 2. Rows Placed by Their Row Number, Blank Rows Included ---
+        rows: List[list] = []
+        with archive.open(sheet_paths[sheet_name]) as sheet_xml:
+            while True:
+                block = sheet_xml.read(READ_BLOCK_BYTES)
+                parser.feed(block, final=not block)
+                for number, row in parser.take_rows():
+                    rows.extend([] for _ in range(number - 1 - len(rows)))
+                    rows.append(row)
+                if not block:
+                    break
+
+    # --- 3. Rows Padded to the Widest ---
+    width = max((len(row) for row in rows), default=0)
+    for row in rows:
+        row.extend([""] * (width - len(row)))
+    return rows
+
+
+class _SheetParser:
+    """
+    Push parser for a worksheet part. Completed rows are collected as
+    (sheet row number, cell values indexed by column position) pairs, ending
+    at their last cell with data; blank rows are dropped, and callers restore
+    them from the gaps in row numbers.
+    """
+    def __init__(self, shared_strings: List[str], date_styles: Set[str], timedelta_styles: Set[str], epoch):
+        self.shared_strings = shared_strings
+        self.date_styles = date_styles
+        self.timedelta_styles = timedelta_styles
+        self.epoch = epoch
+        self._rows = []
+        self._row = []
+        self._row_number = 0
+        self._cell_type = None
+        self._cell_style = None
+        self._cell_column = 0
+        self._text = None # Collects the text of <v> or inline <t> while inside one
+        self._cell_text = None
+        self._local_names: Dict[str, str] = {}
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._data
+
+    def feed(self, block: bytes, final: bool):
+        try:
+            self._parser.Parse(block, final)
+        except expat.ExpatError as e:
+            raise ValueError(f"The sheet XML could not be parsed: {e}")
+
+    def take_rows(self) -> list:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def _local(self, name: str) -> str:
+        # Element names may carry a namespace prefix (e.g. "x:c"); map each spelling once.
+        local = self._local_names.get(name)
+        if local is None:
+            local = self._local_names[name] = name.rsplit(":", 1)[-1]
+        return local
+
+    def _start(self, name, attrs):
+        local = self._local(name)
+        if local == "c":
+            reference = attrs.get("r")
+            self._cell_column = _column_index(reference) if reference else len(self._row)
+            self._cell_type = attrs.get("t", "n")
+            self._cell_style = attrs.get("s")
+            self._cell_text = None
+        elif local == "v" or local == "t":
+            self._text = []
+        elif local == "row":
+            reference = attrs.get("r")
+            self._row_number = int(reference) if reference else self._row_number + 1
+            self._row = []
+
+    def _data(self, text):
+        if self._text is not None:
+            self._text.append(text)
+
+    def _end(self, name):
+        local = self._local(name)
+        if local == "v" or local == "t":
+            self._cell_text = (self._cell_text or "") + "".join(self._text)
+            self._text = None
+        elif local == "c":
+            value = self._cell_value(self._cell_text)
+            if not isinstance(value, str) or value:
+                row = self._row
+                column = self._cell_column
+                if column >= len(row):
+                    row.extend([""] * (column - len(row) + 1))
+                row[column] = value
+        elif local == "row":
+            if self._row:
+                self._rows.append((self._row_number, self._row))
+            self._row = []
+
+    def _cell_value(self, text: Optional[str]):
+        """Converts a cell's text to the value `pd.read_excel` gets from openpyxl."""
+        if not text:
+            return "" # Blank
+        cell_type = self._cell_type
+        if cell_type == "n":
+            if self._cell_style in self.date_styles:
+                return from_excel(float(text), self.epoch, timedelta=self._cell_style in self.timedelta_styles)
+            if "." in text or "E" in text or "e" in text:
+                number = float(text)
+                return int(number) if number.is_integer() and abs(number) < 2 ** 63 else number
+            return int(text)
+        if cell_type == "s":
+            return self.shared_strings[int(text)]
+        if cell_type == "b":
+            return text == "1"
+        if cell_type == "d":
+            return from_ISO8601(text)
+        if cell_type == "e":
+            return np.nan # Formula errors such as #N/A carry no data
+        return text # "str" (formula result) and "inlineStr"
+
+
+def _open_workbook(file_path: Path) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(file_path)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ValueError(f"The file is not a valid XLSX workbook: {e}")
+
+
+def _read_xml(archive: zipfile.ZipFile, part: str) -> Optional[ET.Element]:
+    """Parses a small XML part of the package, or returns None when it is absent."""
+    try:
+        return ET.fromstring(archive.read(part))
+    except KeyError:
+        return None
+    except ET.ParseError as e:
+        raise ValueError(f"The workbook part '{part}' could not be parsed: {e}")
+
+
+def _local_name(element: ET.Element) -> str:
+    # Matched by local name, as strict OOXML workbooks use other namespaces.
+    return element.tag.rsplit("}", 1)[-1]
+
+
+def _relationships(archive: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str]]:
+    """Maps the relationship IDs of a part to (type, absolute target part)."""
+    folder, file_name = posixpath.split(part)
+    root = _read_xml(archive, posixpath.join(folder, "_rels", f"{file_name}.rels"))
+    relationships = {}
+    for element in root.iter() if root is not None else ():
+        if _local_name(element) == "Relationship":
+            target = element.get("Target", "")
+            target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(folder, target))
+            relationships[element.get("Id")] = (element.get("Type", ""), target)
+    return relationships
+
+
+def _workbook_part(archive: zipfile.ZipFile) -> str:
+    for rel_type, target in _relationships(archive, "").values():
+        if rel_type.endswith(_OFFICE_DOCUMENT_REL):
+            return target
+    return "xl/workbook.xml"
+
+
+def _sheet_paths(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Maps sheet names, in workbook order, to their worksheet parts in the archive."""
+    workbook_part = _workbook_part(archive)
+    root = _read_xml(archive, workbook_part)
+    if root is None:
+        raise ValueError("The file is not a valid XLSX workbook: it has no workbook part.")
+    relationships = _relationships(archive, workbook_part)
+    paths = {}
+    for element in root.iter():
+        if _local_name(element) != "sheet":
+            continue
+        rel_id = next((value for key, value in element.attrib.items() if key.rsplit("}", 1)[-1] == "id"), None)
+        rel_type, target = relationships.get(rel_id, ("", ""))
+        if rel_type.endswith("/worksheet"): # Chart sheets hold no cells
+            paths[element.get("name")] = target
+    return paths
+
+
+def _epoch(archive: zipfile.ZipFile):
+    """Returns the workbook's date system: 1900 (the default) or 1904."""
+    root = _read_xml(archive, _workbook_part(archive))
+    for element in root.iter():
+        if _local_name(element) == "workbookPr":
+            return CALENDAR_MAC_1904 if element.get("date1904") in ("1", "true") else CALENDAR_WINDOWS_1900
+    return CALENDAR_WINDOWS_1900
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    """Reads the shared string table; rich-text runs are joined and phonetic hints dropped."""
+    part = posixpath.join(posixpath.dirname(_workbook_part(archive)), "sharedStrings.xml")
+    strings: List[str] = []
+    try:
+        source = archive.open(part)
+    except KeyError:
+        return strings
+
+    state = {"text": None, "phonetic": 0}
+    def start(name, attrs):
+        local = name.rsplit(":", 1)[-1]
+        if local == "si":
+            state["text"] = []
+        elif local == "rPh":
+            state["phonetic"] += 1
+    def end(name):
+        local = name.rsplit(":", 1)[-1]
+        if local == "si":
+            strings.append("".join(state["text"]))
+            state["text"] = None
+        elif local == "rPh":
+            state["phonetic"] -= 1
+    def data(text):
+        if state["text"] is not None and not state["phonetic"]:
+            state["text"].append(text)
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler, parser.EndElementHandler, parser.CharacterDataHandler = start, end, data
+    with source:
+        try:
+            parser.ParseFile(source)
+        except expat.ExpatError as e:
+            raise ValueError(f"The shared strings could not be parsed: {e}")
+    return strings
+
+
+def _date_styles(archive: zipfile.ZipFile) -> Tuple[Set[str], Set[str]]:
+    """
+    Returns the cell style indexes (as they appear in the `s` attribute) whose
+    number format shows a date, and among them those showing a duration.
+    """
+    root = _read_xml(archive, posixpath.join(posixpath.dirname(_workbook_part(archive)), "styles.xml"))
+    if root is None:
+        return set(), set()
+    formats = dict(BUILTIN_FORMATS)
+    cell_formats = []
+    for element in root:
+        if _local_name(element) == "numFmts":
+            for number_format in element:
+                formats[int(number_format.get("numFmtId"))] = number_format.get("formatCode", "")
+        elif _local_name(element) == "cellXfs":
+            cell_formats = [int(xf.get("numFmtId", 0)) for xf in element]
+
+    date_styles, timedelta_styles = set(), set()
+    for index, format_id in enumerate(cell_formats):
+        code = formats.get(format_id)
+        if code and is_date_format(code):
+            date_styles.add(str(index))
+            if is_timedelta_format(code):
+                timedelta_styles.add(str(index))
+    return date_styles, timedelta_styles
+
+
+def _column_index(reference: str) -> int:
+    """Converts the letters of a cell reference such as "AB12" to a 0-based column position."""
+    index = 0
+    for char in reference:
+        if "A" <= char <= "Z":
+            index = index * 26 + ord(char) - 64
+        else:
+            break
+    return index - 1
+
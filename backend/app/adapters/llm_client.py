@@ -1,56 +1,310 @@
+import asyncio
+import email.utils
 import logging
-from openai import OpenAI, APIConnectionError, RateLimitError, APIStatusError
+import random
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, APIConnectionError, APIError, APIStatusError, APITimeoutError
+
+from . import metrics
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
 from ..config import settings
 
 # Configure a logger for this module.
 logger = logging.getLogger(__name__)
 
-# Initialize the OpenAI client with the API key
+
+class LLMUnavailableError(ConnectionError):
+    """
+    The OpenAI API cannot answer right now: its circuit is open, or every
+    attempt within the call's deadline failed. `retry_after` is the number of
+    seconds after which a new call may succeed.
+    """
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def create_client(base_url: Optional[str] = None) -> AsyncOpenAI:
+    """
+    Builds the async OpenAI client over a pooled HTTP client, so LLM round-trips
+    wait on the event loop and reuse kept-alive connections. Each attempt is
+    bounded by the LLM timeouts; the SDK's own retries are disabled because
+    `_call_with_retries` handles them.
+    """
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_SECONDS,
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=base_url or settings.OPENAI_BASE_URL,
+        timeout=httpx.Timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS),
+        max_retries=0,
+        http_client=http_client,
+    )
+
+
 try:
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    client = create_client()
 except Exception as e:
     logger.error(f"Failed to initialize OpenAI client: {e}")
     client = None
 
-def get_suggestions_from_llm(summary_pack: str, attempt=1) -> str:
+# Caps concurrent LLM calls independently of chart/profiling work. Created lazily
+# because an asyncio.Semaphore must belong to the running event loop.
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+def _record_usage(usage):
+    """Adds the token counts of a response's `usage` to the LLM token metrics."""
+    if usage is None:
+        return
+    metrics.llm_tokens_total.inc(usage.prompt_tokens or 0, type="prompt")
+    metrics.llm_tokens_total.inc(usage.completion_tokens or 0, type="completion")
+
+def _build_messages(summary_pack: str) -> list:
+    return [
+        {"role": "system", "content": "You are a helpful data analyst designed to output JSON."},
+        {"role": "user", "content": summary_pack}
+    ]
+
+def check_available():
+    """Raises LLMUnavailableError while the circuit is open, so callers can fail before preparing a prompt."""
+    try:
+        breaker.check()
+    except CircuitOpenError as e:
+        metrics.llm_circuit_rejections_total.inc()
+        raise LLMUnavailableError("The AI service is temporarily unavailable.", e.retry_after) from e
+
+
+# --- Retries, Deadlines and Backoff ---
+
+# How long past its timeout an attempt may run before it is abandoned.
+_HARD_TIMEOUT_GRACE_SECONDS = 1.0
+
+def _failure_reason(error: BaseException) -> Optional[str]:
+    """Names a transient upstream failure worth retrying; None for errors a retry cannot fix."""
+    if isinstance(error, (asyncio.TimeoutError, APITimeoutError)):
+        return "timeout"
+    if isinstance(error, APIConnectionError): # Includes the SDK's APITimeoutError
+        return "connection"
+    if isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500):
+        return "rate_limited" if error.status_code == 429 else "server_error"
+    return None
+
+
+def _retry_after_header(error: BaseException) -> Optional[float]:
+    """Reads the delay an error response asks for, from `retry-after-ms` or `retry-after` (seconds or an HTTP date)."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _backoff_delay(error: BaseException, attempt: int) -> float:
+    """
+    The server's Retry-After when it sends one, else exponential backoff with
+    full jitter: a random delay up to base * 2^(attempt - 1), capped, so
+    clients that failed together do not retry together.
+    """
+    requested = _retry_after_header(error)
+    if requested is not None:
+        return requested
+    ceiling = min(settings.LLM_BACKOFF_MAX_SECONDS, settings.LLM_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+async def _attempt(call: Callable[[float], Awaitable], deadline: float, keep_slot: bool):
+    """
+    Runs one API call in a concurrency slot. `call` receives the timeout to pass
+    to the SDK: the request timeout, shortened to what is left of the overall
+    deadline. A hard limit slightly past it also catches a server that keeps
+    the connection alive by trickling bytes. With `keep_slot`, a successful call
+    keeps its slot and the caller must release it, e.g. once a stream is read.
+    """
+    slots = _get_llm_semaphore()
+    await slots.acquire()
+    try:
+        timeout = min(settings.LLM_REQUEST_TIMEOUT_SECONDS, deadline - asyncio.get_running_loop().time())
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        with metrics.llm_requests_in_flight.track(), metrics.stage_timer("llm"):
+            result = await asyncio.wait_for(call(timeout), timeout + _HARD_TIMEOUT_GRACE_SECONDS)
+    except BaseException:
+        slots.release()
+        raise
+    if not keep_slot:
+        slots.release()
+    return result
+
+
+async def _call_with_retries(call: Callable[[float], Awaitable], keep_slot: bool = False, deadline: Optional[float] = None):
+    """
+    Calls the OpenAI API through the circuit breaker. Transient failures
+    (timeouts, connection errors, 429 and 5xx) are retried after a backoff
+    while attempts and the deadline last (LLM_DEADLINE_SECONDS from now unless
+    given, in event loop time); they count against the circuit. Other API
+    errors are raised as ConnectionError without retrying; other exceptions
+    are raised as they are, leaving the circuit unchanged.
+    """
+    loop = asyncio.get_running_loop()
+    if deadline is None:
+        deadline = loop.time() + settings.LLM_DEADLINE_SECONDS
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            metrics.llm_circuit_rejections_total.inc()
+            raise LLMUnavailableError("The AI service is temporarily unavailable.", e.retry_after) from e
+
+        try:
+            result = await _attempt(call, deadline, keep_slot)
+        except Exception as e:
+            reason = _failure_reason(e)
+            if reason is None:
+                if isinstance(e, APIError):
+                    breaker.record_success() # The API answered; the request itself was refused
+                    logger.error(f"OpenAI API Error: {e}")
+                    raise ConnectionError(f"The OpenAI API rejected the request: {e}") from e
+                # A local error says nothing about the API's health; a claimed probe expires on its own.
+                raise
+
+            breaker.record_failure()
+            delay = _backoff_delay(e, attempt)
+            if attempt >= settings.LLM_MAX_ATTEMPTS or loop.time() + delay >= deadline:
+                logger.error(f"OpenAI API call failed after {attempt} attempts ({reason}): {e}")
+                retry_after = max(breaker.retry_after(), delay, settings.LLM_BACKOFF_BASE_SECONDS)
+                raise LLMUnavailableError(f"The AI service did not answer after {attempt} attempts.", retry_after) from e
+
+            metrics.llm_retries_total.inc(reason=reason)
+            logger.warning(f"OpenAI API call failed ({reason}, attempt {attempt}); retrying in {delay:.2f}s.")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+# --- Suggestion Calls ---
+
+async def get_suggestions_from_llm(summary_pack: str) -> str:
     """
     Sends a dataset summary to the OpenAI API and returns its raw JSON response.
     """
     if not client:
         raise ConnectionError("OpenAI client is not initialized. Check API key configuration.")
 
-    logger.info(f"--- Calling OpenAI API (Attempt {attempt}) ---")
+    logger.info("--- Calling OpenAI API ---")
+    response = await _call_with_retries(lambda timeout: client.chat.completions.create(
+        model=settings.OPENAI_MODEL,
+        #response_format={"type": "json_object"}, # Enable JSON mode
+        messages=_build_messages(summary_pack),
+        temperature=0.2, # Lower temperature for more deterministic, structured output
+        max_tokens=1500, # Limit the response size to save costs
+        timeout=timeout,
+    ))
+    _record_usage(response.usage)
+
+    # Extract the JSON string from the response.
+    raw_response = response.choices[0].message.content
+    logger.info("Successfully received response from OpenAI API.")
+    return raw_response
+
+
+async def stream_suggestions_from_llm(summary_pack: str) -> AsyncIterator[str]:
+    """
+    Sends a dataset summary to the OpenAI API with streaming enabled and yields
+    the response text as it arrives. Only failures before the first token are
+    retried, since a partial response cannot be replayed; the call keeps its
+    concurrency slot until the stream ends. LLM_DEADLINE_SECONDS bounds the
+    whole stream, so a server trickling tokens cannot hold the slot forever.
+    """
+    if not client:
+        raise ConnectionError("OpenAI client is not initialized. Check API key configuration.")
+
+    logger.info("--- Calling OpenAI API in streaming mode ---")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LLM_DEADLINE_SECONDS
+    stream = await _call_with_retries(lambda timeout: client.chat.completions.create(
+        model=settings.OPENAI_MODEL,
+        messages=_build_messages(summary_pack),
+        temperature=0.2,
+        max_tokens=1500,
+        stream=True,
+        stream_options={"include_usage": True}, # Usage arrives in a final chunk without choices
+        timeout=timeout,
+    ), keep_slot=True, deadline=deadline)
 
+    chunks = stream.__aiter__()
     try:
-        # Make the API call to OpenAI.
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo", # Cost-effective and fast model
-            #response_format={"type": "json_object"}, # Enable JSON mode
-            messages=[
-                {"role": "system", "content": "You are a helpful data analyst designed to output JSON."},
-                {"role": "user", "content": summary_pack}
-            ],
-            temperature=0.2, # Lower temperature for more deterministic, structured output
-            max_tokens=1500, # Limit the response size to save costs
-        )
-
-        # Extract the JSON string from the response.
-        raw_response = response.choices[0].message.content
-        logger.info("Successfully received response from OpenAI API.")
-        return raw_response
-
-    except (APIConnectionError, RateLimitError, APIStatusError) as e:
-        logger.error(f"OpenAI API Error: {e}")
-        # For simplicity, we can retry once on specific, potentially transient errors.
-        if attempt < 2:
-            logger.warning("Retrying OpenAI API call...")
-            return get_suggestions_from_llm(summary_pack, attempt + 1)
-        raise ConnectionError(f"Failed to connect to OpenAI API after multiple attempts: {e}") from e
-    
-    except Exception as e:
-        logger.error(f"An unexpected error occurred while calling OpenAI API: {e}")
-        raise
+        with metrics.llm_requests_in_flight.track(), metrics.stage_timer("llm"):
+            while True:
+                # Each read waits at most for what is left of the deadline.
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                _record_usage(getattr(chunk, "usage", None))
+    except asyncio.TimeoutError as e:
+        breaker.record_failure()
+        logger.error(f"OpenAI stream did not finish within {settings.LLM_DEADLINE_SECONDS}s.")
+        retry_after = max(breaker.retry_after(), settings.LLM_BACKOFF_BASE_SECONDS)
+        raise LLMUnavailableError("The AI service did not finish its response in time.", retry_after) from e
+    except (APIError, httpx.HTTPError) as e:
+        # Reads are bounded by the client's read timeout, so a stalled stream ends up here too.
+        breaker.record_failure()
+        logger.error(f"OpenAI stream broke off: {e}")
+        retry_after = max(breaker.retry_after(), settings.LLM_BACKOFF_BASE_SECONDS)
+        raise LLMUnavailableError("The AI service stopped answering mid-response.", retry_after) from e
+    finally:
+        _get_llm_semaphore().release()
+        if hasattr(stream, "close"):
+            await stream.close() # Frees the connection when the reader stops early
+    logger.info("Successfully streamed response from OpenAI API.")
+
+
+async def close_client():
+    """Closes the underlying HTTP connection pool on application shutdown."""
+    if client:
+        await client.close()
+
+
+def _collect_circuit_state():
+    metrics.llm_circuit_open.set(0 if breaker.state == CircuitBreaker.CLOSED else 1)
+
+
+# --- Singleton Instance Initialization ---
+breaker = CircuitBreaker("openai", settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_SECONDS)
+metrics.registry.add_collector(_collect_circuit_state)
 
 """
 Example of expected response format:
@@ -0,0 +1,298 @@
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Histogram buckets in seconds, from sub-millisecond cache hits to slow LLM round-trips.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """Base of the metric types: a named family of series, one per label combination."""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. requests served or tokens used."""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def series(self) -> Dict[LabelValues, float]:
+        """Returns a snapshot of every label combination's value."""
+        with self._lock:
+            return dict(self._values)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._format_labels(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. requests in flight."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Counts the enclosed block as in flight while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._format_labels(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their count and sum."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {} # bucket counts..., count, sum
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def collect(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in self._series.items():
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', _format_value(bound)))} {_format_value(count)}")
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', '+Inf'))} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {_format_value(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide set of metrics, rendered in the Prometheus text exposition
+    format. Collectors registered with `add_collector` run at scrape time, so
+    derived values such as cache hit ratios and sizes are computed fresh.
+    """
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Registers a callback that refreshes gauges right before each scrape."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# --- Per-Request Stage Timing ---
+
+# Stage durations of the request being served, as (stage, seconds). Set by the
+# timing middleware; the compute executor copies the context into its threads.
+_request_timings: "contextvars.ContextVar[Optional[List[Tuple[str, float]]]]" = contextvars.ContextVar("request_timings", default=None)
+_request_route: "contextvars.ContextVar[str]" = contextvars.ContextVar("request_route", default="background")
+
+
+def begin_request(route: str) -> List[Tuple[str, float]]:
+    """Starts collecting stage timings for the current request and returns the list they go to."""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    _request_route.set(route)
+    return timings
+
+
+def start_background_task(coro: Awaitable) -> "asyncio.Future":
+    """
+    Schedules `coro` as a task detached from the current request. A task copies
+    the context it is created in, so it would otherwise time its stages under
+    the route of whichever request happened to start it; in a fresh context
+    they are labelled "background" and stay out of that request's timings.
+    """
+    return contextvars.Context().run(asyncio.ensure_future, coro)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Times the enclosed block as one stage of the current request: the duration
+    goes to the `dashboard_stage_duration_seconds` histogram (labelled with the
+    route, or "background" outside requests) and to the Server-Timing header.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def record_stage(stage: str, seconds: float):
+    """Records a stage timed elsewhere, e.g. in a worker process, as if `stage_timer` had timed it."""
+    stage_duration_seconds.observe(seconds, route=_request_route.get(), stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Counts one lookup in one of the app's caches; hit ratios are derived at scrape time."""
+    cache_requests_total.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _collect_cache_hit_ratios():
+    lookups = cache_requests_total.series()
+    for cache in {cache for cache, _ in lookups}:
+        hits, misses = lookups.get((cache, "hit"), 0), lookups.get((cache, "miss"), 0)
+        cache_hit_ratio.set(hits / (hits + misses), cache=cache)
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Formats stage timings as a Server-Timing header; repeated stages are summed."""
+    durations: Dict[str, float] = {}
+    for stage, seconds in list(timings):
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in durations.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+# --- Singleton Instance Initialization ---
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "dashboard_http_requests_total", "HTTP requests served, by route, method and status code.", ("route", "method", "status"))
+http_request_duration_seconds = registry.histogram(
+    "dashboard_http_request_duration_seconds", "Time until the response headers are sent, by route.", ("route", "method"))
+http_requests_in_flight = registry.gauge(
+    "dashboard_http_requests_in_flight", "HTTP requests currently being served.")
+stage_duration_seconds = registry.histogram(
+    "dashboard_stage_duration_seconds", "Duration of instrumented stages (load, groupby, encode, llm...), by route.", ("route", "stage"))
+cache_requests_total = registry.counter(
+    "dashboard_cache_requests_total", "Lookups in the app's caches, by cache and result (hit or miss).", ("cache", "result"))
+cache_hit_ratio = registry.gauge(
+    "dashboard_cache_hit_ratio", "Share of lookups answered by each cache since startup.", ("cache",))
+dataframe_cache_bytes = registry.gauge(
+    "dashboard_dataframe_cache_bytes", "Approximate memory held by the DataFrame cache.")
+llm_requests_in_flight = registry.gauge(
+    "dashboard_llm_requests_in_flight", "OpenAI calls currently running.")
+llm_retries_total = registry.counter(
+    "dashboard_llm_retries_total", "OpenAI calls retried after a transient failure, by reason.", ("reason",))
+llm_circuit_rejections_total = registry.counter(
+    "dashboard_llm_circuit_rejections_total", "LLM calls rejected without calling OpenAI because the circuit was open.")
+llm_circuit_open = registry.gauge(
+    "dashboard_llm_circuit_open", "1 while the OpenAI circuit breaker is open or probing, else 0.")
+llm_tokens_total = registry.counter(
+    "dashboard_llm_tokens_total", "Tokens reported in OpenAI responses' usage, by type (prompt or completion).", ("type",))
+chart_engine_jobs_in_flight = registry.gauge(
+    "dashboard_chart_engine_jobs_in_flight", "Chart jobs queued or running on each chart engine worker process.", ("worker",))
+chart_engine_jobs_total = registry.counter(
+    "dashboard_chart_engine_jobs_total", "Chart jobs sent to the chart engine's worker processes, by placement (affine or spilled).", ("placement",))
+ingest_jobs_in_flight = registry.gauge(
+    "dashboard_ingest_jobs_in_flight", "Background ingest jobs currently running on the process pool.")
+summary_pack_tokens = registry.histogram(
+    "dashboard_summary_pack_tokens", "Estimated tokens of the dataset summaries sent to the LLM.", (),
+    buckets=(250, 500, 1000, 1500, 2000, 4000, 8000, 16000, 32000))
+summary_pack_tokens_saved_total = registry.counter(
+    "dashboard_summary_pack_tokens_saved_total", "Estimated prompt tokens saved by compacting dataset summaries to their budget.")
+summary_pack_estimated_prompt_seconds_saved_total = registry.counter(
+    "dashboard_summary_pack_estimated_prompt_seconds_saved_total",
+    "Estimated, not measured, LLM prompt-reading time saved by compacting dataset summaries (saved tokens at LLM_PROMPT_SECONDS_PER_1K_TOKENS per 1k).")
+storage_evictions_total = registry.counter(
+    "dashboard_storage_evictions_total", "Datasets deleted by the storage janitor, by reason (ttl or quota).", ("reason",))
+storage_bytes = registry.gauge(
+    "dashboard_storage_bytes", "Bytes used by stored datasets, as measured by the last janitor sweep.")
+
+registry.add_collector(_collect_cache_hit_ratios)
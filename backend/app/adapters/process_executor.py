@@ -0,0 +1,47 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessExecutor:
+    """
+    Bounded process pool for heavy pandas jobs that should not share the GIL
+    with request handling, such as dataset ingest.
+
+    Workers are started with the "spawn" method, so they never inherit locks
+    held by the server's threads, and are created lazily on the first job.
+    Functions and arguments must be picklable, and results are sent back by
+    pickling too, so jobs should return small results rather than DataFrames.
+    """
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs `func(*args, **kwargs)` in a worker process and awaits its result."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Process executor started with {self.max_workers} workers.")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        """
+        Stops accepting work and waits for running jobs to finish. Not waiting
+        leaves the pool's management thread behind, which can hang interpreter exit.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+# --- Singleton Instance Initialization ---
+from ..config import settings
+
+process_executor = ProcessExecutor(max_workers=settings.INGEST_MAX_WORKERS)
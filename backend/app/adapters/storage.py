@@ -1,78 +1,326 @@
+import hashlib
+import os
 import shutil
 import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
 from fastapi import UploadFile, HTTPException, status
 import json
+import pandas as pd
+
+from .dataframe_cache import dataframe_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Identifies the content of a dataset: (datasetHash_sha256, sheetName); the sheet is None for CSV files.
+HashKey = Tuple[str, Optional[str]]
+
+
+class _ManifestEntry:
+    """A parsed manifest held in the adapter's index, with what is needed to revalidate it."""
+    __slots__ = ("manifest", "mtime_ns", "validated_at", "data_path")
+
+    def __init__(self, manifest: dict, mtime_ns: int):
+        self.manifest = manifest
+        self.mtime_ns = mtime_ns
+        self.validated_at = time.monotonic()
+        self.data_path: Optional[Path] = None # Set once the data file has been seen on disk
+
+
 class FileStorageAdapter:
     """
     Handles all direct interactions with the file system for storing and
     retrieving dataset files and their metadata.
     """
-    def __init__(self, base_path: Path, max_file_size_bytes: int):
+    def __init__(self, base_path: Path, max_file_size_bytes: int, upload_chunk_size_bytes: int,
+                 manifest_revalidate_seconds: float = 0.0):
         self.base_path = base_path
+        self.staging_path = base_path / ".staging" # Uploads in progress, same filesystem as datasets
         self.max_file_size_bytes = max_file_size_bytes
+        self.upload_chunk_size_bytes = upload_chunk_size_bytes
+        self._manifest_lock = threading.Lock() # Serializes read-modify-write manifest updates
+        self._hash_index: Optional[Dict[HashKey, str]] = None # (datasetHash_sha256, sheetName) -> datasetId, built lazily
+        self._hash_index_lock = threading.Lock()
+        self.manifest_revalidate_seconds = manifest_revalidate_seconds
+        self._manifests: Dict[str, _ManifestEntry] = {} # datasetId -> parsed manifest, filled lazily
+        self._manifests_lock = threading.Lock()
+        self._access_times: Dict[str, float] = {} # datasetId -> last access (epoch seconds) not yet in the manifest
+        self._access_lock = threading.Lock()
+        self._in_use: Dict[str, int] = {} # datasetId -> requests using it right now (guarded by _access_lock)
         self.base_path.mkdir(parents=True, exist_ok=True)
         logger.info(f"Storage initialized at: {self.base_path.resolve()}")
 
-    def save_dataset_file(self, dataset_id: str, file: UploadFile) -> Path:
-        """Saves an uploaded file to a dedicated directory, validating its size."""
-        dataset_path = self.base_path / dataset_id
-        dataset_path.mkdir(exist_ok=True)
-        file_extension = Path(file.filename).suffix
-        file_location = dataset_path / f"data{file_extension}"
+    def stage_upload(self, file: UploadFile) -> Tuple[Path, str]:
+        """
+        Streams an upload into a staging file in a single pass, hashing it and
+        enforcing the size limit as chunks arrive, so memory use per upload stays
+        constant. Returns the staging path and the content's SHA-256 hex digest.
+        """
+        self.staging_path.mkdir(exist_ok=True)
+        staged_location = self.staging_path / f"{uuid.uuid4()}.part"
+        hasher = hashlib.sha256()
         total_bytes_written = 0
         try:
-            with open(file_location, "wb") as f:
-                while chunk := file.file.read(8192): # Read in chunks
+            with open(staged_location, "wb", buffering=self.upload_chunk_size_bytes) as f:
+                while chunk := file.file.read(self.upload_chunk_size_bytes): # Read in chunks
                     total_bytes_written += len(chunk)
                     if total_bytes_written > self.max_file_size_bytes:
                         raise HTTPException(
                             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                             detail=f"File size exceeds the limit of {self.max_file_size_bytes / 1024 / 1024:.2f} MB"
                         )
+                    hasher.update(chunk)
                     f.write(chunk)
-            logger.info(f"Successfully saved file for dataset '{dataset_id}' at {file_location}")
-            return file_location
+            logger.info(f"Staged upload '{file.filename}' ({total_bytes_written} bytes)")
+            return staged_location, hasher.hexdigest()
         except Exception as e:
-            logger.error(f"Failed to save file for dataset '{dataset_id}'. Cleaning up. Error: {e}")
-            if dataset_path.exists():
-                shutil.rmtree(dataset_path) # Clean up partial uploads
+            logger.error(f"Failed to stage upload '{file.filename}'. Cleaning up. Error: {e}")
+            self.discard_staged_file(staged_location) # Clean up partial uploads
             raise e
 
+    def commit_staged_file(self, dataset_id: str, staged_location: Path, file_extension: str) -> Path:
+        """Atomically moves a staged upload into its dataset directory."""
+        dataset_path = self.base_path / dataset_id
+        dataset_path.mkdir(exist_ok=True)
+        file_location = dataset_path / f"data{file_extension}"
+        os.replace(staged_location, file_location) # Same filesystem, so the rename is atomic
+        logger.info(f"Successfully saved file for dataset '{dataset_id}' at {file_location}")
+        return file_location
+
+    def discard_staged_file(self, staged_location: Path):
+        """Removes a staged upload that will not be kept."""
+        staged_location.unlink(missing_ok=True)
+
+    def save_columnar_copy(self, dataset_id: str, df: pd.DataFrame) -> Path:
+        """Writes a typed Parquet copy of a parsed dataset next to its original file."""
+        columnar_location = self.base_path / dataset_id / "data.parquet"
+        try:
+            df.to_parquet(columnar_location, index=False)
+        except Exception:
+            columnar_location.unlink(missing_ok=True) # Never leave a truncated sidecar behind
+            raise
+        logger.info(f"Columnar copy saved for dataset '{dataset_id}' at {columnar_location}")
+        return columnar_location
+
+    def save_cube_dimension(self, dataset_id: str, position: int, grouped: pd.DataFrame) -> Path:
+        """
+        Writes the pre-aggregated frame of one dimension column. Files are named
+        after the column's position, since column names are not safe file names.
+        """
+        cube_path = self.base_path / dataset_id / "cube"
+        cube_path.mkdir(exist_ok=True)
+        cube_location = cube_path / f"{position}.parquet"
+        try:
+            grouped.to_parquet(cube_location)
+        except Exception:
+            cube_location.unlink(missing_ok=True)
+            raise
+        return cube_location
+
     def save_manifest(self, dataset_id: str, manifest_data: dict):
         """Saves a JSON manifest file with dataset metadata."""
-        dataset_path = self.base_path / dataset_id
-        manifest_location = dataset_path / "manifest.json"
         try:
-            with open(manifest_location, "w") as f:
-                json.dump(manifest_data, f, indent=4)
+            with self._manifest_lock:
+                self._write_manifest(dataset_id, dict(manifest_data))
             logger.info(f"Manifest saved for dataset '{dataset_id}'")
+            self._index_dataset_hash(dataset_id, manifest_data.get("datasetHash_sha256"), manifest_data.get("sheetName"))
         except Exception as e:
             logger.error(f"Failed to save manifest for dataset '{dataset_id}'. Error: {e}")
-            if dataset_path.exists():
-                shutil.rmtree(dataset_path)
+            self.delete_dataset(dataset_id)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Could not save dataset metadata."
             )
 
+    def delete_dataset(self, dataset_id: str):
+        """Removes a dataset directory and drops any cached copies of its data."""
+        dataset_path = self.base_path / dataset_id
+        if dataset_path.exists():
+            shutil.rmtree(dataset_path)
+        dataframe_cache.invalidate(dataset_id)
+        with self._manifests_lock:
+            self._manifests.pop(dataset_id, None)
+        with self._access_lock:
+            self._access_times.pop(dataset_id, None)
+        with self._hash_index_lock:
+            if self._hash_index is not None:
+                for key in [k for k, d in self._hash_index.items() if d == dataset_id]:
+                    del self._hash_index[key]
+
+    def list_dataset_ids(self) -> List[str]:
+        """Returns the IDs of all dataset directories, whether or not their manifest is readable."""
+        return [entry.name for entry in os.scandir(self.base_path) if entry.is_dir() and not entry.name.startswith(".")]
+
+    def get_dataset_size_bytes(self, dataset_id: str) -> int:
+        """Returns the total size of the files stored for a dataset."""
+        total = 0
+        for root, _, files in os.walk(self.base_path / dataset_id):
+            for name in files:
+                try:
+                    total += os.stat(os.path.join(root, name)).st_size
+                except OSError:
+                    continue # Removed while walking
+        return total
+
+    def record_access(self, dataset_id: str):
+        """
+        Notes that a dataset was just used. Only kept in memory, so the request
+        path never writes; `flush_access_times` persists the pending times.
+        """
+        with self._access_lock:
+            self._access_times[dataset_id] = time.time()
+
+    @contextmanager
+    def use_dataset(self, dataset_id: str) -> Iterator[None]:
+        """
+        Marks a dataset as in use by a request for the duration of the block,
+        so that the storage janitor does not evict it underneath (see
+        `is_in_use`). The access is recorded on entry and again on exit, so a
+        long request keeps the dataset recent.
+        """
+        with self._access_lock:
+            self._in_use[dataset_id] = self._in_use.get(dataset_id, 0) + 1
+        self.record_access(dataset_id)
+        try:
+            yield
+        finally:
+            with self._access_lock:
+                remaining = self._in_use.pop(dataset_id) - 1
+                if remaining:
+                    self._in_use[dataset_id] = remaining
+            self.record_access(dataset_id)
+
+    def is_in_use(self, dataset_id: str) -> bool:
+        """Tells whether a request is using the dataset right now (see `use_dataset`)."""
+        with self._access_lock:
+            return dataset_id in self._in_use
+
+    def flush_access_times(self) -> Dict[str, float]:
+        """
+        Writes the pending access times to the manifests as `lastAccessedAt_utc`
+        and returns them. Datasets removed in the meantime are skipped.
+        """
+        with self._access_lock:
+            pending, self._access_times = self._access_times, {}
+        for dataset_id, accessed_at in pending.items():
+            try:
+                self.update_manifest(dataset_id, {
+                    "lastAccessedAt_utc": datetime.fromtimestamp(accessed_at, timezone.utc).isoformat()
+                })
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.warning(f"Could not record last access of dataset '{dataset_id}': {e}")
+        return pending
+
+    def discard_stale_staged_files(self, max_age_seconds: float) -> int:
+        """Removes staged uploads older than `max_age_seconds`, left behind by interrupted uploads."""
+        if not self.staging_path.exists():
+            return 0
+        removed = 0
+        cutoff = time.time() - max_age_seconds
+        for staged_location in self.staging_path.glob("*.part"):
+            try:
+                if staged_location.stat().st_mtime < cutoff:
+                    staged_location.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def find_dataset_by_hash(self, dataset_hash: str, sheet_name: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the ID of a stored dataset whose content has the given SHA-256,
+        and which was read from the same sheet for workbooks, or None. The index
+        is rebuilt from the manifests on first use, so it also covers datasets
+        uploaded before a restart.
+        """
+        key = (dataset_hash, sheet_name)
+        with self._hash_index_lock:
+            if self._hash_index is None:
+                self._hash_index = self._build_hash_index()
+            dataset_id = self._hash_index.get(key)
+        if dataset_id is None:
+            return None
+
+        try:
+            self.get_dataset_filepath(dataset_id)
+        except (FileNotFoundError, ValueError):
+            # The directory was removed outside of the adapter; forget it.
+            with self._hash_index_lock:
+                self._hash_index.pop(key, None)
+            return None
+        return dataset_id
+
+    def _index_dataset_hash(self, dataset_id: str, dataset_hash: Optional[str], sheet_name: Optional[str]):
+        """Records a dataset's content hash and sheet, keeping the first dataset stored for them."""
+        if not dataset_hash:
+            return
+        with self._hash_index_lock:
+            if self._hash_index is not None:
+                self._hash_index.setdefault((dataset_hash, sheet_name), dataset_id)
+
+    def _build_hash_index(self) -> Dict[HashKey, str]:
+        """Scans the stored manifests to map content hashes (and sheets) to dataset IDs."""
+        index = {}
+        for manifest_path in self.base_path.glob("*/manifest.json"):
+            try:
+                manifest = self.get_manifest(manifest_path.parent.name)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable manifest {manifest_path}: {e}")
+                continue
+            dataset_hash = manifest.get("datasetHash_sha256")
+            if dataset_hash:
+                key = (dataset_hash, manifest.get("sheetName"))
+                index.setdefault(key, manifest.get("datasetId", manifest_path.parent.name))
+        logger.info(f"Hash index built with {len(index)} datasets.")
+        return index
+
+    def get_manifest(self, dataset_id: str) -> dict:
+        """
+        Returns the manifest of a dataset from the in-memory manifest index.
+
+        Manifests are parsed on first use and replaced whenever the adapter
+        writes them. An indexed manifest is trusted for
+        `manifest_revalidate_seconds`; after that its file's mtime is checked
+        again and the file is re-read only if it changed, so edits made outside
+        this process are picked up. The returned dict is shared, so callers
+        must treat it as read-only.
+        """
+        return self._get_manifest_entry(dataset_id).manifest
+
+    def update_manifest(self, dataset_id: str, updates: dict) -> dict:
+        """
+        Merges `updates` into an existing dataset manifest and saves it.
+        Unlike `save_manifest`, a failure leaves the dataset in place.
+        """
+        with self._manifest_lock:
+            with self._manifests_lock:
+                entry = self._manifests.get(dataset_id)
+            # Always revalidated: the merge must start from what is on disk.
+            manifest = dict(self._load_manifest(dataset_id, entry).manifest)
+            manifest.update(updates)
+            self._write_manifest(dataset_id, manifest)
+        logger.info(f"Manifest updated for dataset '{dataset_id}' ({', '.join(updates)})")
+        return manifest
+
     # --- MÉTODO AÑADIDO ---
     def get_dataset_filepath(self, dataset_id: str) -> Path:
         """
         Reads the manifest for a given dataset to find the path of its data file.
+        The file's existence is checked once per indexed manifest version.
         """
-        manifest_path = self.base_path / dataset_id / "manifest.json"
-        if not manifest_path.exists():
-            raise FileNotFoundError(f"Manifest for dataset '{dataset_id}' not found.")
-
-        with open(manifest_path, "r") as f:
-            manifest = json.load(f)
+        entry = self._get_manifest_entry(dataset_id)
+        if entry.data_path is not None:
+            return entry.data_path
 
-        file_path_str = manifest.get("storagePath")
+        file_path_str = entry.manifest.get("storagePath")
         if not file_path_str:
             raise FileNotFoundError(f"storagePath not found in manifest for dataset '{dataset_id}'.")
 
@@ -80,13 +328,66 @@ class FileStorageAdapter:
         if not file_path.exists():
              raise FileNotFoundError(f"Data file for dataset '{dataset_id}' not found at path: {file_path}")
 
+        entry.data_path = file_path
         return file_path
 
+    def _get_manifest_entry(self, dataset_id: str) -> _ManifestEntry:
+        """Returns the indexed manifest of a dataset, revalidating it once it is due."""
+        with self._manifests_lock:
+            entry = self._manifests.get(dataset_id)
+        if entry is not None and time.monotonic() - entry.validated_at < self.manifest_revalidate_seconds:
+            return entry
+        return self._load_manifest(dataset_id, entry)
+
+    def _load_manifest(self, dataset_id: str, entry: Optional[_ManifestEntry]) -> _ManifestEntry:
+        """
+        Revalidates an indexed manifest against its file's mtime, reading and
+        indexing the file when it is new or has changed.
+        """
+        manifest_path = self.base_path / dataset_id / "manifest.json"
+        try:
+            mtime_ns = manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            with self._manifests_lock:
+                self._manifests.pop(dataset_id, None)
+            raise FileNotFoundError(f"Manifest for dataset '{dataset_id}' not found.")
+
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            entry.validated_at = time.monotonic()
+            return entry
+
+        with open(manifest_path, "r") as f:
+            entry = _ManifestEntry(json.load(f), mtime_ns)
+        with self._manifests_lock:
+            self._manifests[dataset_id] = entry
+        return entry
+
+    def _write_manifest(self, dataset_id: str, manifest: dict):
+        """
+        Atomically replaces a manifest file (temp file plus rename, so readers
+        never see a partial manifest) and indexes the written version.
+        Callers hold `_manifest_lock`.
+        """
+        manifest_location = self.base_path / dataset_id / "manifest.json"
+        temp_location = manifest_location.with_name(f".manifest-{uuid.uuid4()}.tmp")
+        try:
+            with open(temp_location, "w") as f:
+                json.dump(manifest, f, indent=4)
+            os.replace(temp_location, manifest_location)
+        except Exception:
+            temp_location.unlink(missing_ok=True)
+            raise
+        entry = _ManifestEntry(manifest, manifest_location.stat().st_mtime_ns)
+        with self._manifests_lock:
+            self._manifests[dataset_id] = entry
+
 
 # --- Singleton Instance Initialization ---
 from ..config import settings
 
 storage_adapter = FileStorageAdapter(
     base_path=settings.TEMP_STORAGE_PATH,
-    max_file_size_bytes=settings.MAX_FILE_SIZE_BYTES
+    max_file_size_bytes=settings.MAX_FILE_SIZE_BYTES,
+    upload_chunk_size_bytes=settings.UPLOAD_CHUNK_SIZE_BYTES,
+    manifest_revalidate_seconds=settings.MANIFEST_REVALIDATE_SECONDS
 )
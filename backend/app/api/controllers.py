@@ -1,40 +1,125 @@
-from fastapi import UploadFile
-from typing import List
+import json
+from fastapi import UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional
 
 # Import services that contain the core business logic
-from ..services import dataset_service, suggestions_service, charts_service
+from ..services import dataset_service, suggestions_service, charts_service, ingest_service, storage_janitor
+from ..adapters.storage import storage_adapter
+from ..adapters.compute_executor import compute_executor
+from ..adapters.chart_engine import chart_engine
+from .responses import ChartJSONResponse
 
 # Import DTOs (Data Transfer Objects) for request/response validation
-from ..schemas.dto import UploadSuccessResponse, SuggestionRequest, SuggestionDTO, ChartParams, ChartDataResponse
+from ..schemas.dto import (
+    UploadSuccessResponse, DatasetStatusResponse, StorageStatsResponse, SuggestionRequest, SuggestionDTO,
+    ChartParams, ChartBatchRequest
+)
 
 # --- Dataset Controllers ---
 
-def upload_dataset_controller(file: UploadFile) -> UploadSuccessResponse:
+async def upload_dataset_controller(file: UploadFile, sheet: Optional[str] = None) -> UploadSuccessResponse:
     """
     Controller to handle the dataset upload process.
+    Saving the file is blocking work, so it runs on the compute executor; the
+    ingest job (columnar copy, chart cube, profile) is then queued in the background.
     """
-    result = dataset_service.process_new_dataset(file)
-    return UploadSuccessResponse(datasetId=result["datasetId"], filename=result["filename"])
+    result = await compute_executor.run(dataset_service.process_new_dataset, file, sheet)
+    storage_adapter.record_access(result["datasetId"])
+    if result["status"] != "ready":
+        # Also retries failed or interrupted ingests when the same file is uploaded again.
+        ingest_service.start_ingest(result["datasetId"])
+    return UploadSuccessResponse(**result)
+
+
+async def get_dataset_status_controller(dataset_id: str) -> DatasetStatusResponse:
+    """
+    Controller to report a dataset's ingest status, for clients polling after an upload.
+    """
+    storage_adapter.record_access(dataset_id)
+    manifest = await compute_executor.run(storage_adapter.get_manifest, dataset_id)
+    return DatasetStatusResponse(
+        datasetId=dataset_id,
+        filename=manifest["originalFilename"],
+        status=manifest.get("status", "uploaded"),
+        error=manifest.get("error"),
+        rowCount=manifest.get("rowCount"),
+        sheets=manifest.get("sheets"),
+        sheetName=manifest.get("sheetName"),
+        uploadedAt_utc=manifest.get("uploadedAt_utc"),
+    )
+
+
+async def get_storage_stats_controller() -> StorageStatsResponse:
+    """
+    Controller to report the storage janitor's eviction counters and the
+    storage use it measured on its last sweep.
+    """
+    return StorageStatsResponse(**storage_janitor.get_metrics())
 
 
 # --- Analysis Controllers ---
 
-def get_analysis_suggestions_controller(request: SuggestionRequest) -> List[SuggestionDTO]:
+async def get_analysis_suggestions_controller(request: SuggestionRequest) -> List[SuggestionDTO]:
     """
     Controller to handle the analysis suggestions request.
+    Stored suggestions are reused unless the request asks for a refresh.
     """
-    suggestions = suggestions_service.generate_suggestions(request.datasetId)
+    with storage_adapter.use_dataset(request.datasetId):
+        suggestions = await suggestions_service.generate_suggestions(request.datasetId, refresh=request.refresh)
     return suggestions
 
 
+async def stream_analysis_suggestions_controller(request: SuggestionRequest) -> StreamingResponse:
+    """
+    Controller to handle the streaming suggestions request.
+    Suggestions are written as newline-delimited JSON as soon as each one is validated.
+    Errors raised before the first line keep their status code; later errors are
+    reported as a final `{"detail": ...}` line.
+    """
+    with storage_adapter.use_dataset(request.datasetId):
+        suggestions = await suggestions_service.stream_suggestions(request.datasetId, refresh=request.refresh)
+
+    async def _ndjson_lines(suggestions: AsyncIterator[SuggestionDTO]) -> AsyncIterator[str]:
+        with storage_adapter.use_dataset(request.datasetId):
+            try:
+                async for suggestion in suggestions:
+                    yield suggestion.model_dump_json() + "\n"
+            except HTTPException as e:
+                yield json.dumps({"detail": e.detail}) + "\n"
+
+    # The explicit Content-Encoding keeps the GZip middleware from buffering the stream.
+    return StreamingResponse(
+        _ndjson_lines(suggestions),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "identity", "Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # --- Chart Controllers ---
 
-def get_chart_data_controller(request: ChartParams) -> ChartDataResponse:
+async def get_chart_data_controller(request: ChartParams) -> ChartJSONResponse:
     """
     Controller to handle the chart data generation request.
     It calls the charts_service to process the data based on chart parameters.
+    It runs on the chart engine (threads or worker processes, see CHART_ENGINE).
+    The payload is encoded directly with orjson, bypassing response-model validation.
     """
     # The request body is a ChartParams object. We unpack its `datasetId`
     # and pass the object itself to the service.
-    chart_data = charts_service.generate_chart_data(request.datasetId, request)
-    return chart_data
\ No newline at end of file
+    with storage_adapter.use_dataset(request.datasetId):
+        chart_data = await chart_engine.run(request.datasetId, charts_service.generate_chart_data, request.datasetId, request)
+    return ChartJSONResponse(chart_data)
+
+
+async def get_chart_data_batch_controller(request: ChartBatchRequest) -> ChartJSONResponse:
+    """
+    Controller to handle a batch chart data request.
+    All charts are computed by the charts_service from a single dataset load;
+    charts that fail carry an `error` entry instead of failing the batch.
+    """
+    with storage_adapter.use_dataset(request.datasetId):
+        charts_data = await chart_engine.run(
+            request.datasetId, charts_service.generate_chart_data_batch, request.datasetId, request.charts, request.max_points, request.layout
+        )
+    return ChartJSONResponse(charts_data)
@@ -0,0 +1,61 @@
+import time
+from typing import List
+
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..adapters import metrics
+
+
+class TimingMiddleware:
+    """
+    Records request metrics and adds a Server-Timing header to every response.
+
+    The route label is the matched path template (e.g. /api/datasets/{dataset_id}),
+    so per-dataset paths do not multiply series. Stages timed with
+    `metrics.stage_timer` while the request runs, on the event loop or on the
+    compute executor, are listed in the header next to the total time. Streamed
+    responses report the stages finished before their first byte. Browsers
+    only expose the header to pages from `timing_allow_origins`.
+    """
+    def __init__(self, app: ASGIApp, router: Router, timing_allow_origins: List[str]):
+        self.app = app
+        self.router = router
+        self.timing_allow_origin = ", ".join(timing_allow_origins)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_template(scope)
+        method = scope["method"]
+        timings = metrics.begin_request(route)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = time.perf_counter() - start
+                metrics.http_request_duration_seconds.observe(elapsed, route=route, method=method)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", metrics.server_timing_header(timings, elapsed))
+                if self.timing_allow_origin:
+                    headers.append("Timing-Allow-Origin", self.timing_allow_origin)
+            await send(message)
+
+        with metrics.http_requests_in_flight.track():
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                metrics.http_requests_total.inc(route=route, method=method, status=str(status_code))
+
+    def _route_template(self, scope: Scope) -> str:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", scope["path"])
+        return "unmatched"
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, UploadFile, File
-from typing import List
+from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 
 # Import controller functions that handle the endpoint logic
 from . import controllers
+from .responses import ChartJSONResponse
 
 # Import DTOs to define the shape of requests and responses
 from ..schemas.dto import (
-    UploadSuccessResponse, SuggestionRequest, SuggestionDTO,
-    ChartParams, ChartDataResponse, ErrorResponse
+    UploadSuccessResponse, DatasetStatusResponse, StorageStatsResponse, SuggestionRequest, SuggestionDTO,
+    ChartParams, ChartBatchRequest, ChartDataResponse, ErrorResponse
 )
 
 # Create an APIRouter instance
@@ -24,8 +26,36 @@ router = APIRouter(
     tags=["Datasets"],
     status_code=201
 )
-def upload_dataset_route(file: UploadFile = File(...)):
-    return controllers.upload_dataset_controller(file)
+async def upload_dataset_route(
+    file: UploadFile = File(...),
+    sheet: Optional[str] = Form(None, description="For XLSX files, the sheet to analyse. Defaults to the first sheet."),
+):
+    return await controllers.upload_dataset_controller(file, sheet)
+
+
+@router.get(
+    "/datasets/{dataset_id}",
+    response_model=DatasetStatusResponse,
+    summary="Get a dataset's ingest status",
+    description="Poll after an upload: the status moves from 'uploaded' to 'profiling' and then to 'ready' or 'failed'.",
+    tags=["Datasets"],
+    responses={
+        404: {"model": ErrorResponse, "description": "Dataset not found"}
+    }
+)
+async def get_dataset_status_route(dataset_id: str):
+    return await controllers.get_dataset_status_controller(dataset_id)
+
+
+@router.get(
+    "/storage/stats",
+    response_model=StorageStatsResponse,
+    summary="Get storage janitor metrics",
+    description="Datasets are evicted when unused for STORAGE_TTL_SECONDS, then least recently used first while storage exceeds STORAGE_MAX_BYTES.",
+    tags=["Datasets"]
+)
+async def get_storage_stats_route():
+    return await controllers.get_storage_stats_controller()
 
 
 # --- Analysis Endpoints ---
@@ -40,8 +70,24 @@ def upload_dataset_route(file: UploadFile = File(...)):
         502: {"model": ErrorResponse, "description": "Bad Gateway: AI service is unavailable or returned an invalid response."}
     }
 )
-def get_analysis_suggestions_route(request: SuggestionRequest):
-    return controllers.get_analysis_suggestions_controller(request)
+async def get_analysis_suggestions_route(request: SuggestionRequest):
+    return await controllers.get_analysis_suggestions_controller(request)
+
+
+@router.post(
+    "/analysis/suggestions/stream",
+    summary="Stream AI-powered analysis suggestions",
+    description="Same as /analysis/suggestions, but writes each suggestion as a line of newline-delimited JSON as soon as it is generated. An error after the first line is reported as a final line with a `detail` key.",
+    tags=["Analysis"],
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "One SuggestionDTO per line"},
+        404: {"model": ErrorResponse, "description": "Dataset not found"},
+        502: {"model": ErrorResponse, "description": "Bad Gateway: AI service is unavailable or returned an invalid response."}
+    }
+)
+async def stream_analysis_suggestions_route(request: SuggestionRequest):
+    return await controllers.stream_analysis_suggestions_controller(request)
 
 
 # --- Charts Endpoints ---
@@ -49,6 +95,7 @@ def get_analysis_suggestions_route(request: SuggestionRequest):
 @router.post(
     "/charts/data",
     response_model=ChartDataResponse,
+    response_class=ChartJSONResponse,
     summary="Get aggregated data for a specific chart",
     description="Takes a dataset ID and chart parameters, and returns the processed data ready for visualization.",
     tags=["Charts"],
@@ -57,5 +104,20 @@ def get_analysis_suggestions_route(request: SuggestionRequest):
         400: {"model": ErrorResponse, "description": "Bad Request: Invalid parameters, such as a non-existent column or unsupported aggregation."}
     }
 )
-def get_chart_data_route(request: ChartParams):
-    return controllers.get_chart_data_controller(request)
+async def get_chart_data_route(request: ChartParams):
+    return await controllers.get_chart_data_controller(request)
+
+
+@router.post(
+    "/charts/batch",
+    response_model=List[ChartDataResponse],
+    response_class=ChartJSONResponse,
+    summary="Get aggregated data for several charts at once",
+    description="Takes a dataset ID and a list of chart parameters, loads the dataset once, and returns one data response per chart in the same order. A chart with invalid parameters, such as a non-existent column, gets an empty series and an `error` message while the others are still returned.",
+    tags=["Charts"],
+    responses={
+        404: {"model": ErrorResponse, "description": "Dataset not found"},
+    }
+)
+async def get_chart_data_batch_route(request: ChartBatchRequest):
+    return await controllers.get_chart_data_batch_controller(request)
@@ -10,9 +10,70 @@ class Settings(BaseSettings):
     # Storage configuration
     TEMP_STORAGE_PATH: Path = Path(tempfile.gettempdir()) / "dashboard_ai_uploads"
     MAX_FILE_SIZE_BYTES: int = 20 * 1024 * 1024  # 20 MB
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024  # 1 MB read/write buffer while streaming uploads
+    # Seconds an in-memory manifest is trusted before its file's mtime is checked again
+    MANIFEST_REVALIDATE_SECONDS: float = 2.0
+
+    # Storage janitor: datasets unused for the TTL are deleted, then the least recently
+    # used ones until the total fits the quota. 0 disables a limit.
+    STORAGE_TTL_SECONDS: int = 24 * 60 * 60  # 1 day
+    STORAGE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024  # 2 GB
+    STORAGE_JANITOR_INTERVAL_SECONDS: int = 5 * 60
+
+    # In-memory cache of parsed datasets (approximate budget, LRU eviction)
+    DATAFRAME_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512 MB
+
+    # Streaming profiler: rows per chunk and centroids per quantile sketch
+    PROFILING_CHUNK_ROWS: int = 50_000
+    PROFILING_SKETCH_SIZE: int = 5_000
+
+    # Datasets with more rows than the threshold are profiled on a reservoir sample
+    # (quartiles, top values, correlations); row counts and moments stay exact.
+    PROFILING_SAMPLE_THRESHOLD_ROWS: int = 1_000_000
+    PROFILING_SAMPLE_ROWS: int = 100_000
+
+    # Chart point budgets: line/scatter points (LTTB) and bar/pie categories (top-N + "Other")
+    CHART_MAX_POINTS: int = 2_000
+    CHART_MAX_CATEGORIES: int = 50
+
+    # Estimated token budget of the dataset summary sent to the LLM; wider summaries are compacted (0 disables)
+    SUMMARY_PACK_MAX_TOKENS: int = 1_500
+    # Estimated seconds the LLM spends reading 1k prompt tokens, to report the prompt time compaction saves
+    LLM_PROMPT_SECONDS_PER_1K_TOKENS: float = 0.15
 
     # --- NEW: OpenAI API Configuration ---
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_MODEL: str = "gpt-3.5-turbo" # Cost-effective and fast model
+    OPENAI_BASE_URL: Optional[str] = None # Defaults to the public API; set for proxies or a local fake server
+
+    # LLM resilience: pooled connections, per-attempt timeouts within an overall deadline,
+    # jittered exponential backoff between attempts, and a circuit breaker that fails fast
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_SECONDS: float = 30.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 30.0
+    LLM_DEADLINE_SECONDS: float = 45.0
+    LLM_MAX_ATTEMPTS: int = 3
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 8.0
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Concurrency: threads for pandas work vs. simultaneous in-flight LLM calls
+    COMPUTE_MAX_WORKERS: int = 4
+    LLM_MAX_CONCURRENCY: int = 8
+
+    # Chart engine: "thread" runs chart aggregations on the compute executor; "process" sends
+    # them to worker processes, each keeping its own DataFrame cache of the datasets routed to it.
+    # A dataset's jobs go to the same worker unless it already has CHART_ENGINE_MAX_QUEUE jobs.
+    CHART_ENGINE: str = "thread"
+    CHART_ENGINE_WORKERS: int = 4
+    CHART_ENGINE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256 MB per worker
+    CHART_ENGINE_MAX_QUEUE: int = 2
+
+    # Worker processes for background ingest jobs (columnar copy, chart cube, profile)
+    INGEST_MAX_WORKERS: int = 2
 
     # Frontend (Prod) CORS origin
     PROD_FRONTEND_URL: Optional[str] = None
@@ -1,17 +1,45 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 
 from .api import routers
+from .api.middleware import TimingMiddleware
+from .services import ingest_service, storage_janitor
 from .schemas.dto import ErrorResponse
 from .config import settings
+from .adapters import llm_client, metrics
+from .adapters.compute_executor import compute_executor
+from .adapters.chart_engine import chart_engine
+from .adapters.process_executor import process_executor
+
+# --- Application Lifespan ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Requeues ingest jobs interrupted by a restart, starts the storage janitor
+    and the chart engine's workers, and on shutdown stops them and releases
+    shared resources: the compute executor's threads, the ingest worker
+    processes and the OpenAI client's connection pool.
+    """
+    # Before the janitor's first sweep, so it sees these jobs as in flight.
+    await ingest_service.resume_interrupted_ingests()
+    storage_janitor.start_janitor()
+    chart_engine.start()
+    yield
+    await storage_janitor.stop_janitor()
+    compute_executor.shutdown()
+    chart_engine.shutdown()
+    process_executor.shutdown()
+    await llm_client.close_client()
 
 # --- Application Initialization ---
 app = FastAPI(
     title="Dashboard AI API",
     description="An API that uses AI to analyze datasets and suggest visualizations.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # --- Global Exception Handlers ---
@@ -53,6 +81,10 @@ allowed_origins = [
 if settings.PROD_FRONTEND_URL:
     allowed_origins.append(settings.PROD_FRONTEND_URL)
 
+# Record request metrics and send stage timings in a Server-Timing header,
+# readable from the frontend's origins.
+app.add_middleware(TimingMiddleware, router=app.router, timing_allow_origins=allowed_origins)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -73,3 +105,11 @@ async def read_root():
     """
     return {"status": "ok", "message": "Welcome to the Dashboard AI API"}
 
+# --- Metrics Endpoint ---
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+async def read_metrics():
+    """
+    Exposes request, stage, cache and LLM metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Literal, Optional, Union
 
 # Import our custom validator functions
 from . import validators
@@ -16,6 +16,34 @@ class UploadSuccessResponse(BaseModel):
     """Response model for a successful file upload."""
     datasetId: str = Field(..., description="The unique identifier for the uploaded dataset.")
     filename: str = Field(..., description="The original name of the uploaded file.")
+    status: str = Field(..., description="Ingest status of the dataset: 'uploaded', 'profiling', 'ready' or 'failed'.")
+    sheets: Optional[List[str]] = Field(None, description="For XLSX files, the workbook's sheets in order.")
+    sheetName: Optional[str] = Field(None, description="For XLSX files, the sheet the dataset was read from.")
+
+
+class DatasetStatusResponse(BaseModel):
+    """Response model describing a stored dataset and the state of its ingest job."""
+    datasetId: str
+    filename: str = Field(..., description="The original name of the uploaded file.")
+    status: str = Field(..., description="'uploaded' (queued), 'profiling', 'ready' or 'failed'.")
+    error: Optional[str] = Field(None, description="Why ingest failed, when status is 'failed'.")
+    rowCount: Optional[int] = Field(None, description="Number of rows, once ingest has parsed the file.")
+    sheets: Optional[List[str]] = Field(None, description="For XLSX files, the workbook's sheets in order.")
+    sheetName: Optional[str] = Field(None, description="For XLSX files, the sheet the dataset was read from.")
+    uploadedAt_utc: Optional[str] = None
+
+
+class StorageStatsResponse(BaseModel):
+    """Response model with the storage janitor's counters since startup and the storage use at its last sweep."""
+    sweeps: int
+    evictedDatasets: int
+    evictedBytes: int
+    evictedByTtl: int = Field(..., description="Datasets deleted because they were not accessed within the TTL.")
+    evictedByQuota: int = Field(..., description="Datasets deleted, least recently accessed first, to fit the byte quota.")
+    removedStagedFiles: int = Field(..., description="Abandoned partial uploads removed from the staging area.")
+    datasets: int = Field(..., description="Datasets kept after the last sweep.")
+    storageBytes: int = Field(..., description="Bytes used by the kept datasets after the last sweep.")
+    lastSweepAt_utc: Optional[str] = None
 
 # --- Analysis and Chart Models ---
 
@@ -29,10 +57,12 @@ class SuggestionParameters(BaseModel):
     x_axis: str = Field(..., description="The column to be used for the x-axis.")
     y_axis: str = Field(..., description="The column to be used for the y-axis.")
     aggregation: str = Field(..., description="The aggregation function to apply (e.g., 'sum', 'mean').")
+    time_granularity: Optional[str] = Field(None, description="Groups a date x-axis into 'day', 'week' or 'month' buckets.")
 
     # Apply the custom validators to the fields
     _validate_chart_type = field_validator('chart_type')(validators.validate_chart_type)
     _validate_aggregation = field_validator('aggregation')(validators.validate_aggregation_type)
+    _validate_time_granularity = field_validator('time_granularity')(validators.validate_time_granularity)
 
 
 class SuggestionDTO(BaseModel):
@@ -47,6 +77,7 @@ class SuggestionDTO(BaseModel):
 class SuggestionRequest(BaseModel):
     """Request model for getting suggestions for a dataset."""
     datasetId: str
+    refresh: bool = Field(False, description="Ignore stored suggestions and ask the AI again.")
 
 
 class ChartParams(SuggestionParameters):
@@ -55,6 +86,26 @@ class ChartParams(SuggestionParameters):
     from `SuggestionParameters`.
     """
     datasetId: str
+    max_points: Optional[int] = Field(None, ge=3, description="Point budget for the chart. Defaults to the server's budget for the chart type.")
+    layout: Literal["records", "columnar"] = Field("records", description="'records' returns [{x, y}, ...]; 'columnar' returns {x: [...], y: [...]}.")
+
+
+class ChartBatchRequest(BaseModel):
+    """
+    Request model for generating the data of several charts of one dataset
+    in a single call, e.g. every card of a dashboard.
+    """
+    datasetId: str
+    charts: List[SuggestionParameters] = Field(..., description="The charts to generate, answered in the same order.")
+    max_points: Optional[int] = Field(None, ge=3, description="Point budget applied to every chart. Defaults to the server's budget for each chart type.")
+    layout: Literal["records", "columnar"] = Field("records", description="Data layout applied to every chart (see ChartParams).")
+
+
+class ChartMetadata(BaseModel):
+    """Describes how the returned points relate to the full aggregation."""
+    originalGroupCount: int = Field(..., description="Number of groups produced by the aggregation.")
+    pointCount: int = Field(..., description="Number of points returned.")
+    downsampling: Optional[str] = Field(None, description="'lttb', 'uniform' or 'topN' when points were reduced to fit the budget.")
 
 
 class ChartDataResponse(BaseModel):
@@ -63,4 +114,6 @@ class ChartDataResponse(BaseModel):
     The format is a list of dictionaries, which is easy for most charting
     libraries to consume.
     """
-    series: List[Dict[str, Any]] = Field(..., description="The data points for the chart series.")
\ No newline at end of file
+    series: List[Dict[str, Any]] = Field(..., description="The data points for the chart series, as [{x, y}, ...] or {x: [...], y: [...]} depending on the requested layout.")
+    metadata: Optional[ChartMetadata] = None
+    error: Optional[str] = Field(None, description="Set in a batch response when this chart could not be generated; its series is then empty.")
\ No newline at end of file
@@ -1,3 +1,5 @@
+from typing import Optional
+
 ALLOWED_CHART_TYPES = {"bar", "line", "pie", "scatter"}
 
 # Define the universe of supported aggregation functions.
@@ -5,6 +7,9 @@ ALLOWED_CHART_TYPES = {"bar", "line", "pie", "scatter"}
 # from attempting to execute arbitrary or unsupported aggregation methods.
 ALLOWED_AGGREGATIONS = {"sum", "mean", "count", "median", "min", "max"}
 
+# Buckets a date x-axis can be grouped into.
+ALLOWED_TIME_GRANULARITIES = {"day", "week", "month"}
+
 
 def validate_chart_type(value: str) -> str:
     """
@@ -22,3 +27,12 @@ def validate_aggregation_type(value: str) -> str:
     if value not in ALLOWED_AGGREGATIONS:
         raise ValueError(f"Invalid aggregation '{value}'. Must be one of {ALLOWED_AGGREGATIONS}")
     return value
+
+
+def validate_time_granularity(value: Optional[str]) -> Optional[str]:
+    """
+    Pydantic validator to ensure an optional time granularity is within the allowed set.
+    """
+    if value is not None and value not in ALLOWED_TIME_GRANULARITIES:
+        raise ValueError(f"Invalid time_granularity '{value}'. Must be one of {ALLOWED_TIME_GRANULARITIES}")
+    return value
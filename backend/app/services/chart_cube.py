@@ -0,0 +1,101 @@
+import logging
+import pandas as pd
+from pathlib import Path
+from typing import Optional
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from .streaming_profiler import CARDINALITY_LIMIT
+from ..adapters.storage import storage_adapter
+from ..adapters.dataframe_cache import dataframe_cache
+from ..adapters import metrics
+
+logger = logging.getLogger(__name__)
+
+# Every aggregation a chart can ask for is precomputed, so each one is answered
+# exactly as the full groupby would answer it. Means and medians are stored as
+# computed rather than derived, which keeps results identical to a scan.
+CUBE_AGGREGATIONS = ["count", "sum", "mean", "median", "min", "max"]
+
+
+def build_cube(dataset_id: str, df: pd.DataFrame) -> dict:
+    """
+    Pre-aggregates a freshly uploaded dataset for chart queries.
+
+    Every column with fewer than CARDINALITY_LIMIT distinct values is a
+    dimension. For each dimension, all numeric measures are grouped once with
+    every aggregation in CUBE_AGGREGATIONS, and the result is stored as one
+    small Parquet file. Returns the manifest field describing the cube, or an
+    empty dict when there is nothing to pre-aggregate.
+    """
+    measures = [col for col in df.columns if isinstance(col, str) and _is_measure(df[col])]
+    if not measures:
+        return {}
+
+    dimensions = {}
+    for position, dimension in enumerate(df.columns):
+        if not isinstance(dimension, str) or df[dimension].nunique() >= CARDINALITY_LIMIT:
+            continue
+        dimension_measures = [col for col in measures if col != dimension]
+        if not dimension_measures:
+            continue
+        try:
+            grouped = df.groupby(dimension).agg({col: CUBE_AGGREGATIONS for col in dimension_measures})
+            grouped.columns = [_cube_column(measure, agg) for measure, agg in grouped.columns]
+            path = storage_adapter.save_cube_dimension(dataset_id, position, grouped)
+        except Exception as e:
+            # Mixed-type columns cannot be stored in Parquet; they are answered by a scan.
+            logger.warning(f"Could not pre-aggregate column '{dimension}' of dataset '{dataset_id}': {e}")
+            continue
+        dimensions[dimension] = {"path": str(path), "measures": dimension_measures}
+
+    if not dimensions:
+        return {}
+    logger.info(f"Pre-aggregated {len(dimensions)} dimensions for dataset '{dataset_id}'.")
+    return {"chartCube": {"dimensions": dimensions}}
+
+
+def lookup(dataset_id: str, manifest: dict, x_axis: str, y_axis: str, aggregation: str) -> Optional[pd.DataFrame]:
+    """
+    Answers `groupby(x_axis)[y_axis].agg(aggregation).reset_index()` from the
+    dataset's cube, reading only the pre-aggregated groups. Returns None when
+    the cube does not cover the query, in which case the caller scans the data.
+    """
+    dimension = (manifest.get("chartCube") or {}).get("dimensions", {}).get(x_axis)
+    if not dimension or y_axis not in dimension["measures"] or aggregation not in CUBE_AGGREGATIONS:
+        metrics.record_cache_lookup("chart_cube", False)
+        return None
+
+    grouped = _load_dimension(dataset_id, manifest.get("datasetHash_sha256", ""), x_axis, dimension["path"])
+    metrics.record_cache_lookup("chart_cube", grouped is not None)
+    if grouped is None:
+        return None
+    return grouped[_cube_column(y_axis, aggregation)].rename(y_axis).reset_index()
+
+
+def _load_dimension(dataset_id: str, dataset_hash: str, dimension: str, path: str) -> Optional[pd.DataFrame]:
+    """
+    Returns the pre-aggregated frame of one dimension. Frames are kept in the
+    DataFrame cache under a key derived from the dataset hash, so they are
+    dropped together with the dataset's other cached data.
+    """
+    cache_hash = f"{dataset_hash}:cube:{dimension}"
+    grouped = dataframe_cache.get(dataset_id, cache_hash)
+    if grouped is not None:
+        return grouped
+    if not Path(path).exists():
+        logger.warning(f"Cube file for column '{dimension}' of dataset '{dataset_id}' is missing; scanning instead.")
+        return None
+    grouped = pd.read_parquet(path)
+    dataframe_cache.put(dataset_id, cache_hash, grouped)
+    return grouped
+
+
+def _is_measure(series: pd.Series) -> bool:
+    """Numeric columns, booleans excluded, as in the dataset profile."""
+    return is_numeric_dtype(series.dtype) and not is_bool_dtype(series.dtype)
+
+
+def _cube_column(measure: str, aggregation: str) -> str:
+    """Names the stored column holding `aggregation` of `measure`."""
+    return f"{aggregation}:{measure}"
+
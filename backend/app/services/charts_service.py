@@ -1,10 +1,14 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
 
-# Import the INSTANCE of the adapter, not the module
+from . import dataset_service, chart_cube, downsampling
 from ..adapters.storage import storage_adapter
-from ..schemas.dto import ChartParams, ChartDataResponse
+from ..adapters.metrics import stage_timer
+from ..config import settings
+from ..schemas.dto import ChartParams, SuggestionParameters
 
 VALID_AGGREGATIONS = {
     "sum": "sum",
@@ -15,46 +19,340 @@ VALID_AGGREGATIONS = {
     "max": "max",
 }
 
-def _load_dataframe(dataset_id: str) -> pd.DataFrame:
-    """Loads a dataset into a pandas DataFrame based on its ID."""
-    # Call the method on the storage_adapter instance
-    dataset_path = storage_adapter.get_dataset_filepath(dataset_id)
+# Resample rule for each time granularity, and the period frequency whose
+# start time labels the same bucket for single rows. Weeks start on Monday.
+TIME_GRANULARITIES = {
+    "day": ("D", "D"),
+    "week": ("W-MON", "W-SUN"),
+    "month": ("MS", "M"),
+}
 
-    # The get_dataset_filepath method already checks for existence, but an extra
-    # check here provides a more specific error message if needed.
-    if not dataset_path.exists():
-        raise FileNotFoundError(f"Data file for ID {dataset_id} does not exist at path {dataset_path}")
+# Errors that concern one chart's parameters or data; a batch reports them per chart.
+CHART_ERRORS = (ValueError, KeyError, TypeError)
 
-    if str(dataset_path).endswith('.csv'):
-        return pd.read_csv(dataset_path)
-    elif str(dataset_path).endswith('.xlsx'):
-        return pd.read_excel(dataset_path)
-    else:
-        raise ValueError(f"Unsupported file type for dataset {dataset_id}")
+def _load_dataframe(dataset_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Loads a dataset (or just `columns` of it) into a pandas DataFrame based on its ID.
+    Parsed frames are cached across requests, so the result is read-only.
+    """
+    with stage_timer("load_dataframe"):
+        return dataset_service.load_dataframe(dataset_id, columns=columns)
 
 
-def generate_chart_data(dataset_id: str, params: ChartParams) -> ChartDataResponse:
+def generate_chart_data(dataset_id: str, params: ChartParams) -> Dict[str, Any]:
     """
     Generates chart data by loading a dataset and applying transformations.
+    Date x-axes with a `time_granularity` are bucketed by resampling the parsed
+    date column; queries grouped by a low-cardinality column are answered from
+    the pre-aggregated chart cube when it covers them; others scan the data.
+    Results larger than the point budget are downsampled (see `_downsample`).
+    Returns a ChartDataResponse-shaped payload (see `_build_chart_response`).
     """
-    df = _load_dataframe(dataset_id)
+    agg_func = _get_aggregation(params.aggregation)
+    manifest = storage_adapter.get_manifest(dataset_id)
+    with stage_timer("groupby"):
+        aggregated_df = _aggregate_prepared(dataset_id, manifest, params, agg_func)
+    load_rows = _get_rows_loader(dataset_id, params)
 
-    agg_func = VALID_AGGREGATIONS.get(params.aggregation)
-    if not agg_func:
-        raise ValueError(f"Unsupported aggregation function: {params.aggregation}")
+    if aggregated_df is None:
+        try:
+            df = load_rows()
+            with stage_timer("groupby"):
+                aggregated_df = _to_frame(df.groupby(params.x_axis)[params.y_axis].agg(agg_func), params)
+        except KeyError as e:
+            raise ValueError(f"Invalid column name provided for aggregation: {e}")
+
+    return _build_chart_response(aggregated_df, params, agg_func, params.max_points, load_rows, params.layout)
+
+
+def generate_chart_data_batch(
+    dataset_id: str,
+    charts: List[SuggestionParameters],
+    max_points: Optional[int] = None,
+    layout: str = "records",
+) -> List[Dict[str, Any]]:
+    """
+    Generates data for several charts of the same dataset from a single load.
+    Time-bucketed charts and charts covered by the pre-aggregated chart cube
+    are answered on their own; the rest sharing an x_axis are answered from one groupby that computes all of
+    their aggregations together. `max_points` and `layout` apply to every chart.
+    Results are returned in request order. A chart that cannot be generated
+    (e.g. an unknown column) gets an entry with no series and an `error`
+    message instead, so the other charts still render.
+    """
+    if not charts:
+        return []
+
+    # --- 1. Charts Answered from Prepared Data ---
+    responses: List[Optional[Dict[str, Any]]] = [None] * len(charts)
+    agg_funcs: List[Optional[str]] = [None] * len(charts)
+    prepared: List[Optional[pd.DataFrame]] = [None] * len(charts)
+    manifest = storage_adapter.get_manifest(dataset_id)
+    with stage_timer("groupby"):
+        for i, params in enumerate(charts):
+            try:
+                agg_funcs[i] = _get_aggregation(params.aggregation)
+                prepared[i] = _aggregate_prepared(dataset_id, manifest, params, agg_funcs[i])
+            except CHART_ERRORS as e:
+                responses[i] = _chart_error(e)
+    loaders = [_get_rows_loader(dataset_id, params) for params in charts]
+
+    # --- 2. One Load of the Columns the Other Charts Scan ---
+    scanned = [i for i, aggregated_df in enumerate(prepared) if aggregated_df is None and responses[i] is None]
+    df = _load_scanned_columns(dataset_id, charts, scanned, responses)
+
+    # Collect the aggregations each (x_axis, y_axis) pair needs, e.g.
+    # {"Region": {"Sales": ["sum", "mean"]}}, so each grouping runs once.
+    # Charts aggregating their own grouping column are computed on their own.
+    agg_specs: Dict[str, Dict[str, List[str]]] = {}
+    for i in scanned:
+        params = charts[i]
+        if responses[i] is not None or params.x_axis == params.y_axis:
+            continue
+        y_aggs = agg_specs.setdefault(params.x_axis, {}).setdefault(params.y_axis, [])
+        if agg_funcs[i] not in y_aggs:
+            y_aggs.append(agg_funcs[i])
+    grouped: Dict[str, pd.DataFrame] = {}
+    with stage_timer("groupby"):
+        for x_axis, spec in agg_specs.items():
+            try:
+                grouped[x_axis] = df.groupby(x_axis).agg(spec)
+            except CHART_ERRORS:
+                pass # Its charts are aggregated one by one below, so only the failing ones get an error
+
+    # --- 3. Responses in Request Order ---
+    for i, (params, agg_func, load_rows) in enumerate(zip(charts, agg_funcs, loaders)):
+        if responses[i] is not None:
+            continue
+        try:
+            aggregated_df = prepared[i]
+            if aggregated_df is None:
+                aggregated_df = _aggregate_scanned(df, grouped, params, agg_func)
+            responses[i] = _build_chart_response(aggregated_df, params, agg_func, max_points, load_rows, layout)
+        except CHART_ERRORS as e:
+            responses[i] = _chart_error(e)
+    return responses
+
+
+def _load_scanned_columns(
+    dataset_id: str, charts: List[SuggestionParameters], scanned: List[int], responses: List[Optional[Dict[str, Any]]]
+) -> Optional[pd.DataFrame]:
+    """
+    Loads the columns of the `scanned` charts at once. A chart naming an unknown
+    column gets its error entry in `responses` and the others are loaded without it.
+    """
+    while True:
+        remaining = [i for i in scanned if responses[i] is None]
+        if not remaining:
+            return None
+        columns = [col for i in remaining for col in (charts[i].x_axis, charts[i].y_axis)]
+        try:
+            return _load_dataframe(dataset_id, columns=columns)
+        except KeyError as e:
+            missing = e.args[0] if e.args else None
+            failed = [i for i in remaining if missing in (charts[i].x_axis, charts[i].y_axis)] or remaining
+            for i in failed:
+                responses[i] = _chart_error(e)
+
+
+def _aggregate_scanned(
+    df: pd.DataFrame, grouped: Dict[str, pd.DataFrame], params: SuggestionParameters, agg_func: str
+) -> pd.DataFrame:
+    """Picks a chart's aggregation from the shared groupby of its x_axis, or computes it on its own."""
+    if params.x_axis in grouped and params.x_axis != params.y_axis:
+        return _to_frame(grouped[params.x_axis][(params.y_axis, agg_func)], params)
+    with stage_timer("groupby"):
+        return _to_frame(df.groupby(params.x_axis)[params.y_axis].agg(agg_func), params)
+
+
+def _chart_error(error: Exception) -> Dict[str, Any]:
+    """The batch entry of a chart that could not be generated."""
+    if isinstance(error, KeyError):
+        message = f"Invalid column name provided for aggregation: {error}"
+    else:
+        message = str(error)
+    return {"series": [], "metadata": None, "error": message}
+
+
+def _to_frame(aggregated: pd.Series, params: SuggestionParameters) -> pd.DataFrame:
+    """
+    Turns an aggregated series indexed by x_axis into the (x_axis, values)
+    frame the response is built from. The values column is named after y_axis,
+    or after y_axis and the aggregation when the chart aggregates its own
+    grouping column, as one frame cannot hold two columns of the same name.
+    """
+    values_column = params.y_axis
+    if params.y_axis == params.x_axis:
+        values_column = f"{params.y_axis} ({params.aggregation})"
+    return aggregated.rename_axis(params.x_axis).rename(values_column).reset_index()
+
+
+def _aggregate_prepared(dataset_id: str, manifest: dict, params: SuggestionParameters, agg_func: str) -> Optional[pd.DataFrame]:
+    """
+    Answers a chart from data prepared once per dataset: time buckets over the
+    parsed date column, or the chart cube. Returns None when the chart needs
+    the generic groupby.
+    """
+    if params.time_granularity:
+        return _aggregate_by_time(dataset_id, params, agg_func)
+    return chart_cube.lookup(dataset_id, manifest, params.x_axis, params.y_axis, agg_func)
+
+
+def _aggregate_by_time(dataset_id: str, params: SuggestionParameters, agg_func: str) -> pd.DataFrame:
+    """
+    Aggregates y_axis over day, week or month buckets of a date x_axis by
+    resampling. Empty buckets inside the range are kept as NaN, so line charts
+    show gaps; sum and count would otherwise give them a misleading 0.
+    """
+    dates, values = _load_dates_and_values(dataset_id, params)
+    rule, _ = TIME_GRANULARITIES[params.time_granularity]
+    resampler = values.set_axis(pd.DatetimeIndex(dates)).resample(rule, label="left", closed="left")
+    if agg_func == "sum":
+        aggregated = resampler.sum(min_count=1)
+    elif agg_func == "count":
+        counts = resampler.count()
+        aggregated = counts.where(counts > 0)
+    else:
+        aggregated = resampler.agg(agg_func)
+    return _to_frame(aggregated, params)
+
+
+def _load_dates_and_values(dataset_id: str, params: SuggestionParameters) -> Tuple[pd.Series, pd.Series]:
+    """Loads the parsed date x_axis and the raw y_axis of a time-bucketed chart."""
     try:
-        aggregated_df = df.groupby(params.x_axis)[params.y_axis].agg(agg_func).reset_index()
+        dates = dataset_service.load_datetime_column(dataset_id, params.x_axis)
+        values = _load_dataframe(dataset_id, columns=[params.y_axis])[params.y_axis]
     except KeyError as e:
         raise ValueError(f"Invalid column name provided for aggregation: {e}")
+    if dates is None:
+        raise ValueError(f"Column '{params.x_axis}' does not contain dates; time_granularity requires a date x_axis.")
+    return dates, values
+
+
+def _get_rows_loader(dataset_id: str, params: SuggestionParameters) -> Callable[[], pd.DataFrame]:
+    """
+    Returns a function loading the (x_axis, y_axis) rows behind a chart, used to
+    compute exact "Other" buckets. For time-bucketed charts, x_axis holds each
+    row's bucket start so it matches the aggregated groups.
+    """
+    if not params.time_granularity:
+        return lambda: _load_dataframe(dataset_id, columns=[params.x_axis, params.y_axis])
+
+    def load_bucketed_rows() -> pd.DataFrame:
+        dates, values = _load_dates_and_values(dataset_id, params)
+        _, period = TIME_GRANULARITIES[params.time_granularity]
+        return pd.DataFrame({params.x_axis: dates.dt.to_period(period).dt.start_time, params.y_axis: values})
+    return load_bucketed_rows
+
+
+def _get_aggregation(aggregation: str) -> str:
+    """Maps a requested aggregation name to the pandas function to apply."""
+    agg_func = VALID_AGGREGATIONS.get(aggregation)
+    if not agg_func:
+        raise ValueError(f"Unsupported aggregation function: {aggregation}")
+    return agg_func
+
+
+def _downsample(
+    aggregated_df: pd.DataFrame,
+    params: SuggestionParameters,
+    agg_func: str,
+    max_points: Optional[int],
+    load_rows: Callable[[], pd.DataFrame],
+) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Reduces an aggregated (x_axis, y_axis) frame to the chart's point budget.
 
-    aggregated_df.rename(columns={params.x_axis: 'x', params.y_axis: 'y'}, inplace=True)
-    chart_data_points = aggregated_df.to_dict('records')
+    Line and scatter charts keep the points chosen by LTTB, which preserves the
+    shape of the series (evenly spaced points when y is not numeric). Bar and
+    pie charts keep the largest groups, in their original order, plus an
+    "Other" bucket aggregating the rest; for mean and median that bucket is
+    computed from the underlying rows returned by `load_rows`.
+    Returns the reduced frame and the method used, or None if it already fit.
+    """
+    x_axis, y_axis = aggregated_df.columns # y_axis may be renamed, see `_to_frame`
+    group_count = len(aggregated_df)
+    y_values = aggregated_df[y_axis]
+    y_is_numeric = is_numeric_dtype(y_values.dtype) and not is_bool_dtype(y_values.dtype)
+
+    if params.chart_type in ("line", "scatter"):
+        budget = max_points or settings.CHART_MAX_POINTS
+        if group_count <= budget:
+            return aggregated_df, None
+        if not y_is_numeric:
+            positions = np.linspace(0, group_count - 1, budget).astype(np.int64)
+            return aggregated_df.iloc[positions], "uniform"
+        positions = downsampling.lttb_indices(
+            downsampling.x_positions(aggregated_df[x_axis]), y_values.to_numpy(dtype=np.float64), budget
+        )
+        return aggregated_df.iloc[positions], "lttb"
+
+    budget = max_points or settings.CHART_MAX_CATEGORIES
+    if group_count <= budget:
+        return aggregated_df, None
+    if y_is_numeric:
+        keep = aggregated_df.index.isin(y_values.nlargest(budget - 1).index)
+    else:
+        keep = np.arange(group_count) < budget - 1
+    kept, rest = aggregated_df[keep], aggregated_df[~keep]
+
+    other_value = downsampling.combine_other(rest[y_axis], agg_func)
+    if other_value is None:
+        rows = load_rows()
+        other_rows = rows[rows[x_axis].notna() & ~rows[x_axis].isin(kept[x_axis])]
+        other_value = other_rows[params.y_axis].agg(agg_func)
+    other = pd.DataFrame({x_axis: [downsampling.OTHER_LABEL], y_axis: [other_value]})
+    return pd.concat([kept, other], ignore_index=True), "topN"
+
+
+def _build_chart_response(
+    aggregated_df: pd.DataFrame,
+    params: SuggestionParameters,
+    agg_func: str,
+    max_points: Optional[int],
+    load_rows: Callable[[], pd.DataFrame],
+    layout: str = "records",
+) -> Dict[str, Any]:
+    """
+    Shapes an aggregated (x_axis, y_axis) frame into a ChartDataResponse payload
+    within the point budget.
+
+    The payload is a plain dict meant for `ChartJSONResponse`, which skips
+    per-row Pydantic validation. With the "columnar" layout, numeric columns
+    are passed on as NumPy arrays and serialized as they are; the "records"
+    layout builds the usual list of {x, y} points.
+    """
+    original_group_count = len(aggregated_df)
+    with stage_timer("downsample"):
+        aggregated_df, downsampling_method = _downsample(aggregated_df, params, agg_func, max_points, load_rows)
+    x_values, y_values = aggregated_df.iloc[:, 0], aggregated_df.iloc[:, 1]
+
+    if layout == "columnar":
+        chart_data = {"x": _column_values(x_values), "y": _column_values(y_values)}
+    else:
+        chart_data = [{"x": x, "y": y} for x, y in zip(x_values.tolist(), y_values.tolist())]
 
     # Structure the final response to match the ChartDataResponse DTO.
     # It expects a list of series objects, each with a label and data points.
     final_series = [{
         "label": params.y_axis,
-        "data": chart_data_points
+        "data": chart_data
     }]
 
-    return ChartDataResponse(series=final_series)
+    metadata = {
+        "originalGroupCount": original_group_count,
+        "pointCount": len(aggregated_df),
+        "downsampling": downsampling_method,
+    }
+    return {"series": final_series, "metadata": metadata}
+
+
+def _column_values(values: pd.Series):
+    """
+    Returns a column as a NumPy array when it can be serialized directly
+    (plain numeric or boolean dtypes), or as a list of Python objects otherwise.
+    Datetime columns always take the list route, so NaT becomes null.
+    """
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biuf":
+        return values.to_numpy()
+    return values.tolist()
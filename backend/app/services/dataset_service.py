@@ -1,20 +1,40 @@
-import hashlib
+import logging
 import uuid
+import warnings
+import pandas as pd
+import pyarrow.parquet as pq
 from datetime import datetime, timezone
 from fastapi import UploadFile, HTTPException, status
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from pandas.api.types import is_datetime64_any_dtype, is_object_dtype, is_string_dtype
 
 # Make sure to import the storage_adapter correctly
 from ..adapters.storage import storage_adapter
+from ..adapters.dataframe_cache import dataframe_cache
+from ..adapters import excel_reader
+from ..adapters.metrics import stage_timer
+from ..config import settings
+from . import chart_cube
 
 # Define the set of allowed file extensions for quick validation.
 ALLOWED_EXTENSIONS = {".csv", ".xlsx"}
 
+# Share of non-empty values that must parse as dates for a text column to count as a date column.
+DATETIME_MIN_PARSED_RATIO = 0.9
+DATETIME_PROBE_ROWS = 100
+
+logger = logging.getLogger(__name__)
+
 
 # THIS IS THE FUNCTION THE CONTROLLER IS LOOKING FOR
-def process_new_dataset(file: UploadFile) -> dict:
+def process_new_dataset(file: UploadFile, sheet_name: Optional[str] = None) -> dict:
     """
     Processes an uploaded file, validates it, saves it, and creates a manifest.
+    For XLSX files, `sheet_name` selects the sheet to analyse (the first one by
+    default); the workbook's sheets are listed in the manifest.
+    The heavier ingest work (see `ingest_dataset`) runs afterwards as a background
+    job; the returned `status` tells the caller whether that is still needed.
     """
     # --- 1. Validate File Extension ---
     file_extension = _get_validated_file_extension(file.filename)
@@ -23,20 +43,46 @@ def process_new_dataset(file: UploadFile) -> dict:
             status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             detail=f"File type '{file_extension}' is not supported. Please upload a CSV or XLSX file."
         )
+    if sheet_name is not None and file_extension != ".xlsx":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A sheet can only be selected for XLSX files."
+        )
 
-    # --- 2. Generate Unique ID and Calculate Hash ---
-    dataset_id = str(uuid.uuid4())
-    # The file pointer needs to be reset after reading for the hash calculation,
-    # so that the next read (for saving) starts from the beginning.
-    file_content = file.file.read()
-    file.file.seek(0)
-    file_hash = hashlib.sha256(file_content).hexdigest()
+    # --- 2. Stream the Upload to a Staging File, Hashing It on the Way ---
+    staged_file_path, file_hash = storage_adapter.stage_upload(file)
 
+    # --- 3. Resolve the Sheet of a Workbook ---
+    sheets = None
+    if file_extension == ".xlsx":
+        try:
+            sheets, sheet_name = _resolve_sheet(staged_file_path, sheet_name)
+        except HTTPException:
+            storage_adapter.discard_staged_file(staged_file_path)
+            raise
+
+    # --- 4. Reuse an Identical Upload ---
+    # Pointing at the stored copy keeps its columnar sidecar, profile,
+    # suggestions and cached DataFrame instead of recomputing them.
+    existing_dataset_id = storage_adapter.find_dataset_by_hash(file_hash, sheet_name)
+    existing_manifest = _record_repeat_upload(existing_dataset_id, file.filename) if existing_dataset_id else None
+    if existing_manifest is not None:
+        storage_adapter.discard_staged_file(staged_file_path)
+        logger.info(f"Upload '{file.filename}' matches dataset '{existing_dataset_id}'; reusing it.")
+        return {
+            "datasetId": existing_dataset_id,
+            "filename": file.filename,
+            "status": existing_manifest.get("status"),
+            "sheets": sheets,
+            "sheetName": sheet_name,
+        }
+
+    dataset_id = str(uuid.uuid4())
     try:
-        # --- 3. Save the Data File using the Storage Adapter ---
-        saved_file_path = storage_adapter.save_dataset_file(dataset_id, file)
+        # --- 5. Move the Staged File into Place using the Storage Adapter ---
+        saved_file_path = storage_adapter.commit_staged_file(dataset_id, staged_file_path, file_extension)
 
-        # --- 4. Create and Save the Manifest ---
+        # --- 6. Create and Save the Manifest ---
         manifest_data = {
             "datasetId": dataset_id,
             "originalFilename": file.filename,
@@ -45,27 +91,303 @@ def process_new_dataset(file: UploadFile) -> dict:
             "fileSizeBytes": saved_file_path.stat().st_size,
             "datasetHash_sha256": file_hash,
             "status": "uploaded",
+            "sheets": sheets,
+            "sheetName": sheet_name,
             "uploadedAt_utc": datetime.now(timezone.utc).isoformat(),
             "profilingResults": None,
             "suggestionResults": None,
         }
         storage_adapter.save_manifest(dataset_id, manifest_data)
 
-        # --- 5. Return Success Response Data ---
+        # --- 7. Return Success Response Data ---
         return {
             "datasetId": dataset_id,
-            "filename": file.filename
+            "filename": file.filename,
+            "status": manifest_data["status"],
+            "sheets": sheets,
+            "sheetName": sheet_name,
         }
 
     except HTTPException as e:
+        storage_adapter.discard_staged_file(staged_file_path)
         raise e
     except Exception as e:
+        storage_adapter.discard_staged_file(staged_file_path)
+        storage_adapter.delete_dataset(dataset_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred while processing the file: {str(e)}"
         )
 
 
+def ingest_dataset(dataset_id: str, file_path: Path, sheet_name: Optional[str] = None) -> Tuple[pd.DataFrame, dict]:
+    """
+    Parses a stored upload (the selected sheet, for workbooks) and builds its ingest-time artifacts: the typed
+    columnar copy and the chart cube. Returns the parsed DataFrame and the
+    manifest fields describing the artifacts. Parse errors are raised, since the
+    dataset cannot be used without them; artifact failures are only logged and
+    reads then fall back to the original file or a full scan.
+    """
+    df = _read_data_file(file_path, sheet_name=sheet_name)
+    manifest_updates = _build_columnar_copy(dataset_id, df)
+    manifest_updates.update(_build_chart_cube(dataset_id, df))
+    return df, manifest_updates
+
+
+def load_dataframe(dataset_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Returns the parsed DataFrame for a dataset, optionally restricted to `columns`.
+
+    Only the requested columns that are not already cached are read, from the
+    columnar sidecar when one exists or from the original upload otherwise.
+    Parsed columns are kept in the process-wide cache, so the returned DataFrame
+    is shared and must not be modified in place. Raises KeyError for unknown columns.
+    """
+    manifest = storage_adapter.get_manifest(dataset_id)
+    dataset_hash = manifest.get("datasetHash_sha256", "")
+    known_columns = manifest.get("columns")
+    wanted = list(dict.fromkeys(columns)) if columns is not None else known_columns
+
+    if wanted is not None and known_columns is not None:
+        for col in wanted:
+            if col not in known_columns:
+                raise KeyError(col)
+
+    cached = dataframe_cache.get(dataset_id, dataset_hash)
+    if cached is not None and (wanted is None or all(col in cached.columns for col in wanted)):
+        return _select_columns(cached, wanted)
+
+    to_read = wanted
+    if cached is not None and wanted is not None:
+        to_read = [col for col in wanted if col not in cached.columns]
+    loaded = _read_dataset(dataset_id, manifest, to_read)
+    if wanted is not None:
+        for col in wanted:
+            if col not in loaded.columns and (cached is None or col not in cached.columns):
+                raise KeyError(col)
+    if cached is not None:
+        new_columns = [c for c in loaded.columns if c not in cached.columns]
+        loaded = pd.concat([cached, loaded[new_columns]], axis=1)
+
+    # A partial frame can only be told apart from a complete one when the
+    # manifest lists the dataset's columns, so only cache partials in that case.
+    if known_columns is not None or wanted is None:
+        dataframe_cache.put(dataset_id, dataset_hash, loaded)
+    return _select_columns(loaded, wanted)
+
+
+def load_datetime_column(dataset_id: str, column: str) -> Optional[pd.Series]:
+    """
+    Returns `column` of a dataset as a datetime64 Series, or None when the column
+    does not hold dates. Text columns are detected and parsed once per dataset:
+    the outcome is recorded in the manifest's `datetimeColumns` and the parsed
+    column is kept in the DataFrame cache. Raises KeyError for unknown columns.
+    """
+    manifest = storage_adapter.get_manifest(dataset_id)
+    detected = manifest.get("datetimeColumns") or {}
+    if detected.get(column) is False:
+        return None
+
+    cache_hash = f"{manifest.get('datasetHash_sha256', '')}:datetime:{column}"
+    cached = dataframe_cache.get(dataset_id, cache_hash)
+    if cached is not None:
+        return cached[column]
+
+    parsed = _parse_datetime_column(load_dataframe(dataset_id, columns=[column])[column])
+    if column not in detected:
+        try:
+            storage_adapter.update_manifest(dataset_id, {"datetimeColumns": {**detected, column: parsed is not None}})
+        except Exception as e:
+            logger.warning(f"Could not record date detection for column '{column}' of dataset '{dataset_id}': {e}")
+    if parsed is None:
+        return None
+    dataframe_cache.put(dataset_id, cache_hash, parsed.to_frame(column))
+    return parsed
+
+
+def get_row_count(dataset_id: str, manifest: Optional[dict] = None) -> Optional[int]:
+    """
+    Returns the number of rows of a dataset without reading it: from the manifest
+    when it was recorded at ingest, else from the columnar copy's metadata.
+    Returns None when neither is available.
+    """
+    if manifest is None:
+        manifest = storage_adapter.get_manifest(dataset_id)
+    if manifest.get("rowCount") is not None:
+        return manifest["rowCount"]
+    columnar_path = manifest.get("columnarPath")
+    if columnar_path and Path(columnar_path).exists():
+        return pq.ParquetFile(columnar_path).metadata.num_rows
+    return None
+
+
+def iter_dataframe_chunks(dataset_id: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Yields a dataset as consecutive DataFrame chunks of at most `chunk_rows` rows,
+    without materialising the whole file. A fully cached dataset is yielded as a
+    single chunk; XLSX files without a columnar copy are read in one piece, so
+    that every column gets a single dtype. Chunks are not added to the cache.
+    """
+    manifest = storage_adapter.get_manifest(dataset_id)
+    known_columns = manifest.get("columns")
+
+    cached = dataframe_cache.get(dataset_id, manifest.get("datasetHash_sha256", ""))
+    if cached is not None and (known_columns is None or all(col in cached.columns for col in known_columns)):
+        yield _select_columns(cached, known_columns)
+        return
+
+    columnar_path = manifest.get("columnarPath")
+    if columnar_path and Path(columnar_path).exists():
+        parquet_file = pq.ParquetFile(columnar_path)
+        if parquet_file.metadata.num_rows == 0:
+            yield parquet_file.schema_arrow.empty_table().to_pandas()
+            return
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+
+    dataset_path = storage_adapter.get_dataset_filepath(dataset_id)
+    if dataset_path.suffix.lower() == ".csv":
+        yield from pd.read_csv(dataset_path, chunksize=chunk_rows)
+    else:
+        yield _read_data_file(dataset_path, sheet_name=manifest.get("sheetName"))
+
+
+def _parse_datetime_column(values: pd.Series) -> Optional[pd.Series]:
+    """
+    Parses a text column as dates, or returns None if it does not look like one.
+    A small probe is parsed first so that ordinary text columns are rejected
+    without trying every value. Numeric columns are never treated as dates.
+    """
+    if is_datetime64_any_dtype(values.dtype):
+        return values
+    if not (is_object_dtype(values.dtype) or is_string_dtype(values.dtype)):
+        return None
+    non_null = values.dropna()
+    if non_null.empty:
+        return None
+
+    with warnings.catch_warnings():
+        # Columns without a single inferable format fall back to per-value parsing.
+        warnings.simplefilter("ignore", UserWarning)
+        try:
+            probe = pd.to_datetime(non_null.iloc[:DATETIME_PROBE_ROWS], errors="coerce")
+            if probe.notna().mean() < DATETIME_MIN_PARSED_RATIO:
+                return None
+            parsed = pd.to_datetime(values, errors="coerce")
+        except (ValueError, TypeError, OverflowError):
+            # e.g. values with mixed time zones
+            return None
+
+    if parsed.notna().sum() < DATETIME_MIN_PARSED_RATIO * len(non_null):
+        return None
+    return parsed
+
+
+def _select_columns(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    """Projects a DataFrame onto `columns`, avoiding a copy when it already matches."""
+    if columns is None or list(df.columns) == columns:
+        return df
+    return df[columns]
+
+
+def _read_dataset(dataset_id: str, manifest: dict, columns: Optional[List[str]]) -> pd.DataFrame:
+    """Reads a dataset from its columnar sidecar if present, else from the original file."""
+    columnar_path = manifest.get("columnarPath")
+    if columnar_path and Path(columnar_path).exists():
+        with stage_timer("read_parquet"):
+            return pd.read_parquet(columnar_path, columns=columns)
+
+    if columnar_path:
+        logger.warning(f"Columnar copy for dataset '{dataset_id}' is missing; reading the original file.")
+    dataset_path = storage_adapter.get_dataset_filepath(dataset_id)
+    with stage_timer("parse_file"):
+        return _read_data_file(dataset_path, columns=columns, sheet_name=manifest.get("sheetName"))
+
+
+def _read_data_file(file_path: Path, columns: Optional[List[str]] = None, sheet_name: Optional[str] = None) -> pd.DataFrame:
+    """
+    Parses a stored data file into a DataFrame based on its extension.
+    When `columns` is given, only those columns are parsed; unknown names are
+    silently skipped, so callers must check the result. Workbooks are read with
+    the streaming reader (see `excel_reader`), from `sheet_name` or the first sheet.
+    """
+    file_extension = file_path.suffix.lower()
+    if file_extension == ".csv":
+        usecols = None
+        if columns is not None:
+            requested = set(columns)
+            usecols = lambda col: col in requested
+        return pd.read_csv(file_path, usecols=usecols)
+    elif file_extension == ".xlsx":
+        return excel_reader.read_sheet(file_path, sheet_name, columns=columns)
+    else:
+        raise ValueError(f"Unsupported file type: {file_extension}")
+
+
+def _record_repeat_upload(dataset_id: str, filename: str) -> Optional[dict]:
+    """
+    Records a new upload of a stored dataset's file and returns the updated
+    manifest, or None if the dataset was removed in the meantime. The manifest
+    keeps its original filename and upload time; the latest upload goes to
+    `lastUploadedFilename` and `lastUploadedAt_utc`. A failed ingest is reset
+    to "uploaded", as the caller queues it again.
+    """
+    updates = {"lastUploadedFilename": filename, "lastUploadedAt_utc": datetime.now(timezone.utc).isoformat()}
+    try:
+        if storage_adapter.get_manifest(dataset_id).get("status") == "failed":
+            updates.update({"status": "uploaded", "error": None})
+        return storage_adapter.update_manifest(dataset_id, updates)
+    except FileNotFoundError:
+        return None
+
+
+def _resolve_sheet(file_path: Path, sheet_name: Optional[str]) -> Tuple[List[str], str]:
+    """
+    Lists a workbook's sheets and checks the requested one, defaulting to the
+    first sheet. Returns the sheet names and the selected sheet.
+    """
+    try:
+        sheets = excel_reader.list_sheets(file_path)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not sheets:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The workbook has no sheets.")
+    if sheet_name is None:
+        return sheets, sheets[0]
+    if sheet_name not in sheets:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sheet '{sheet_name}' not found. Available sheets: {', '.join(sheets)}"
+        )
+    return sheets, sheet_name
+
+
+def _build_columnar_copy(dataset_id: str, df: pd.DataFrame) -> dict:
+    """
+    Stores a typed Parquet copy of the parsed upload next to the original file.
+    Returns the manifest fields describing the dataset's columns and the copy;
+    the copy is left out when it could not be written.
+    """
+    columnar_info = {"rowCount": len(df)}
+    if all(isinstance(col, str) for col in df.columns):
+        columnar_info["columns"] = list(df.columns)
+    try:
+        columnar_info["columnarPath"] = str(storage_adapter.save_columnar_copy(dataset_id, df))
+    except Exception as e:
+        logger.warning(f"Could not build columnar copy for dataset '{dataset_id}': {e}")
+    return columnar_info
+
+
+def _build_chart_cube(dataset_id: str, df: pd.DataFrame) -> dict:
+    """Returns the manifest field describing the chart cube, or {} if it could not be built."""
+    try:
+        return chart_cube.build_cube(dataset_id, df)
+    except Exception as e:
+        logger.warning(f"Could not build chart cube for dataset '{dataset_id}': {e}")
+        return {}
+
+
 def _get_validated_file_extension(filename: str) -> str:
     """A helper function to safely extract a lowercase file extension."""
     if not filename:
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype, is_bool_dtype
+
+# Label of the bucket that collects the groups left out of a top-N chart.
+OTHER_LABEL = "Other"
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: picks `threshold` points of an x-ordered
+    series that preserve its visual shape. The first and last points are always
+    kept; from each bucket in between, the point forming the largest triangle
+    with the previously kept point and the average of the next bucket wins.
+    Returns the positions of the kept points, in order.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Missing values count as zero when measuring areas; kept points keep their own value.
+    y = np.where(np.isnan(y), 0.0, y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def x_positions(values: pd.Series) -> np.ndarray:
+    """
+    Returns the x coordinates LTTB works with: the values themselves for numeric
+    and datetime columns, and the row positions for anything else (groupby
+    output is already sorted, so positions follow the axis order).
+    """
+    if is_datetime64_any_dtype(values.dtype):
+        return values.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    if is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype) and not values.isna().any():
+        return values.to_numpy(dtype=np.float64)
+    return np.arange(len(values), dtype=np.float64)
+
+
+def combine_other(rest: pd.Series, aggregation: str):
+    """
+    Folds the aggregated values of the left-out groups into one "Other" value
+    when the aggregation allows it (sum, count, min, max). Returns None for
+    aggregations that need the underlying rows, such as mean and median.
+    """
+    if aggregation in ("sum", "count"):
+        return rest.sum()
+    if aggregation == "min":
+        return rest.min()
+    if aggregation == "max":
+        return rest.max()
+    return None
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+from . import dataset_service, profiling_service
+from ..adapters.compute_executor import compute_executor
+from ..adapters.process_executor import process_executor
+from ..adapters.storage import storage_adapter
+from ..adapters import metrics
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ingest jobs queued or running in this server process, keyed by dataset ID.
+_jobs: Dict[str, "asyncio.Task[None]"] = {}
+
+# Created lazily so it binds to the running event loop.
+_worker_slots = None
+
+
+def start_ingest(dataset_id: str):
+    """
+    Queues the background ingest job of a dataset unless one is already queued
+    or running. The manifest `status` moves from "uploaded" (queued) to
+    "profiling" once a worker picks the job up, then to "ready" or "failed".
+    """
+    if dataset_id in _jobs:
+        return
+    task = metrics.start_background_task(_run_ingest_job(dataset_id))
+    _jobs[dataset_id] = task
+    task.add_done_callback(lambda _: _jobs.pop(dataset_id, None))
+
+
+async def wait_for_ingest(dataset_id: str):
+    """Waits for the dataset's ingest job, if any, so its profile is warm."""
+    task = _jobs.get(dataset_id)
+    if task is not None:
+        logger.info(f"Waiting for ingest of dataset '{dataset_id}' to finish.")
+        # Shielded so that a client disconnecting does not cancel the shared job.
+        await asyncio.shield(task)
+
+
+async def resume_interrupted_ingests() -> int:
+    """
+    Requeues the ingest jobs a previous server process left unfinished: jobs
+    only live in memory, so a restart leaves their manifests at "uploaded" or
+    "profiling" with nothing running. Called at startup; returns how many were
+    requeued.
+    """
+    interrupted = await compute_executor.run(_find_interrupted_ingests)
+    for dataset_id in interrupted:
+        start_ingest(dataset_id)
+    if interrupted:
+        logger.info(f"Requeued {len(interrupted)} ingest jobs interrupted by a restart.")
+    return len(interrupted)
+
+
+def _find_interrupted_ingests() -> List[str]:
+    interrupted = []
+    for dataset_id in storage_adapter.list_dataset_ids():
+        try:
+            status = storage_adapter.get_manifest(dataset_id).get("status")
+        except Exception as e:
+            logger.warning(f"Could not read the manifest of dataset '{dataset_id}': {e}")
+            continue
+        if status in ("uploaded", "profiling") and dataset_id not in _jobs:
+            interrupted.append(dataset_id)
+    return interrupted
+
+
+def active_dataset_ids() -> Set[str]:
+    """Returns the IDs of the datasets whose ingest job is queued or running."""
+    return set(_jobs)
+
+
+@contextmanager
+def _track_ingest() -> Iterator[None]:
+    """Counts a job as in flight and times it as the "ingest" stage."""
+    with metrics.ingest_jobs_in_flight.track(), metrics.stage_timer("ingest"):
+        yield
+
+
+def _get_worker_slots() -> asyncio.Semaphore:
+    global _worker_slots
+    if _worker_slots is None:
+        _worker_slots = asyncio.Semaphore(settings.INGEST_MAX_WORKERS)
+    return _worker_slots
+
+
+async def _run_ingest_job(dataset_id: str):
+    """Runs one ingest job on the process pool and records its outcome in the manifest."""
+    async with _get_worker_slots():
+        with _track_ingest():
+            try:
+                manifest = await compute_executor.run(storage_adapter.update_manifest, dataset_id, {"status": "profiling"})
+                updates = await process_executor.run(
+                    _ingest_in_worker, dataset_id, manifest["storagePath"], manifest.get("datasetHash_sha256"),
+                    manifest.get("sheetName")
+                )
+                updates["status"] = "ready"
+                updates["error"] = None
+                logger.info(f"Ingest of dataset '{dataset_id}' finished.")
+            except FileNotFoundError:
+                logger.warning(f"Dataset '{dataset_id}' was removed before its ingest finished.")
+                return
+            except Exception as e:
+                logger.error(f"Ingest of dataset '{dataset_id}' failed: {e}")
+                updates = {"status": "failed", "error": str(e)}
+
+            try:
+                await compute_executor.run(storage_adapter.update_manifest, dataset_id, updates)
+            except Exception as e:
+                logger.warning(f"Could not record ingest outcome for dataset '{dataset_id}': {e}")
+
+
+def _ingest_in_worker(dataset_id: str, storage_path: str, dataset_hash: str, sheet_name: Optional[str] = None) -> dict:
+    """
+    Worker-process entry point. Builds the columnar copy, the chart cube and the
+    profile of a dataset, and returns the manifest updates for the server to
+    apply, so the manifest is only ever written by the server process.
+    """
+    df, updates = dataset_service.ingest_dataset(dataset_id, Path(storage_path), sheet_name)
+    updates["profilingResults"] = profiling_service.profile_dataframe(df, dataset_hash)
+    return updates
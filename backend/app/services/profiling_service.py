@@ -1,81 +1,230 @@
+import logging
+import numpy as np
 import pandas as pd
-from pathlib import Path
-import json
+from typing import Optional
 from fastapi import HTTPException, status
 
-# Import the settings object to get the correct storage path
+from . import dataset_service, summary_budget
+from .streaming_profiler import StreamingProfiler, SampledProfiler, CARDINALITY_LIMIT, DESCRIBE_INDEX
+from ..adapters.storage import storage_adapter
+from ..adapters import metrics
 from ..config import settings
 
+logger = logging.getLogger(__name__)
+
 def create_summary_pack(dataset_id: str) -> str:
     """
     Analyzes a dataset and creates a text summary for the LLM.
+    The summary is rendered from the dataset's stored profile, which is
+    computed on first use and reused while the dataset content is unchanged.
+    Summaries over SUMMARY_PACK_MAX_TOKENS are compacted to fit (see
+    `summary_budget.fit_to_budget`).
     """
-    # --- 1. Locate and Load Dataset Manifest and File ---
-    try:
-        # Use the path from settings to build the manifest path
-        manifest_path = settings.TEMP_STORAGE_PATH / dataset_id / "manifest.json"
+    with metrics.stage_timer("summary_pack"):
+        try:
+            manifest = storage_adapter.get_manifest(dataset_id)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Dataset '{dataset_id}' not found. {e}")
 
-        if not manifest_path.exists():
-            raise FileNotFoundError("Manifest file not found.")
+        profile = get_profile(dataset_id, manifest)
+        summary_pack = _render_summary_pack(manifest["originalFilename"], profile)
+        if settings.SUMMARY_PACK_MAX_TOKENS <= 0:
+            return summary_pack
 
-        with open(manifest_path, "r") as f: # Load the manifest file, which contains metadata about the dataset
-            manifest = json.load(f)
+        summary_pack, report = summary_budget.fit_to_budget(
+            manifest["originalFilename"], profile, summary_pack, settings.SUMMARY_PACK_MAX_TOKENS,
+            settings.LLM_PROMPT_SECONDS_PER_1K_TOKENS,
+        )
+        metrics.summary_pack_tokens.observe(report["tokens"])
+        metrics.summary_pack_tokens_saved_total.inc(report["savedTokens"])
+        metrics.summary_pack_estimated_prompt_seconds_saved_total.inc(report["estimatedSavedPromptSeconds"])
+        if report["compacted"]:
+            logger.info(
+                f"Summary pack of dataset '{dataset_id}' compacted from ~{report['fullTokens']} to ~{report['tokens']} tokens "
+                f"(an estimated {report['estimatedSavedPromptSeconds']:.2f}s less prompt time), "
+                f"showing {report['shownColumns']} of {report['totalColumns']} columns."
+            )
+        return summary_pack
 
-        file_path = Path(manifest["storagePath"]) # Get the actual data file path from the manifest
-        if not file_path.exists():
-            raise FileNotFoundError("Data file not found at path specified in manifest.")
 
-        if manifest["fileExtension"] == ".csv": # Read the dataset into a DataFrame based on file type
-            df = pd.read_csv(file_path)
-        elif manifest["fileExtension"] == ".xlsx":
-            df = pd.read_excel(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {manifest['fileExtension']}")
+def get_profile(dataset_id: str, manifest: Optional[dict] = None) -> dict:
+    """
+    Returns the structured profile of a dataset (see `_profile_to_json`).
+    A profile stored in the manifest is reused when its `datasetHash_sha256`
+    matches the dataset's current content; otherwise the dataset is profiled
+    in a single streaming pass and the result is persisted. Datasets larger than
+    PROFILING_SAMPLE_THRESHOLD_ROWS are profiled in sampling mode (see
+    `_create_profiler`); the profile's "sampling" field says which figures are estimates.
+    """
+    # --- 1. Reuse the Stored Profile when It Matches the Content ---
+    try:
+        if manifest is None:
+            manifest = storage_adapter.get_manifest(dataset_id)
+        stored = manifest.get("profilingResults")
+        reusable = bool(stored) and stored.get("datasetHash_sha256") == manifest.get("datasetHash_sha256")
+        metrics.record_cache_lookup("profile", reusable)
+        if reusable:
+            return stored
+
+        # --- 2. Profile the Data in Chunks ---
+        with metrics.stage_timer("profile"):
+            profiler = _create_profiler(dataset_service.get_row_count(dataset_id, manifest))
+            for chunk in dataset_service.iter_dataframe_chunks(dataset_id, settings.PROFILING_CHUNK_ROWS):
+                profiler.update(chunk)
+            profile = _profile_to_json(profiler.result(), manifest.get("datasetHash_sha256"))
 
     except FileNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Dataset '{dataset_id}' not found. {e}")
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to read or process dataset file. Error: {str(e)}")
 
-    # --- 2. Perform EDA and Build the Summary String (No changes here) ---
+    # --- 3. Persist the Profile for Later Calls (best effort) ---
+    try:
+        storage_adapter.update_manifest(dataset_id, {"profilingResults": profile})
+    except Exception as e:
+        logger.warning(f"Could not store profiling results for dataset '{dataset_id}': {e}")
+    return profile
+
+
+def profile_dataframe(df: pd.DataFrame, dataset_hash: str) -> dict:
+    """
+    Profiles an already parsed dataset, e.g. during ingest, and returns the
+    structured profile without persisting it. Rows are fed in the same chunks
+    as the streaming path, so both produce the same profile.
+    """
+    profiler = _create_profiler(len(df))
+    chunk_rows = settings.PROFILING_CHUNK_ROWS
+    for start in range(0, max(len(df), 1), chunk_rows):
+        profiler.update(df.iloc[start:start + chunk_rows])
+    return _profile_to_json(profiler.result(), dataset_hash)
+
+
+def _create_profiler(row_count: Optional[int]) -> StreamingProfiler:
+    """
+    Picks the exact streaming profiler, or the sampling one for datasets known to
+    exceed PROFILING_SAMPLE_THRESHOLD_ROWS. Datasets of unknown size are profiled exactly.
+    """
+    if row_count is not None and row_count > settings.PROFILING_SAMPLE_THRESHOLD_ROWS:
+        logger.info(f"Profiling {row_count} rows on a sample of {settings.PROFILING_SAMPLE_ROWS}.")
+        return SampledProfiler(sketch_size=settings.PROFILING_SKETCH_SIZE, sample_rows=settings.PROFILING_SAMPLE_ROWS)
+    return StreamingProfiler(sketch_size=settings.PROFILING_SKETCH_SIZE)
+
+
+def _profile_to_json(profile: dict, dataset_hash: str) -> dict:
+    """
+    Converts a StreamingProfiler result into a JSON-serializable profile:
+    {
+        "datasetHash_sha256": str,
+        "rowCount": int,
+        "columns": [{
+            "name": str, "dtype": str,
+            "stats": {"count": ..., "mean": ..., ..., "max": ...} or None,
+            "topValues": [[value, count], ...] or None,
+            "highCardinality": bool,
+        }],
+        "correlation": {"columns": [...], "matrix": [[...]]} or None,
+        "sampling": {"method": str, "sampleRows": int, "estimatedFields": [...]} or None,
+    }
+    Only numeric columns have "stats", and only categorical ones "topValues".
+    """
+    numeric_summary = profile["numericSummary"]
+    columns = []
+    for col, dtype in profile["dtypes"].items():
+        column = {"name": col, "dtype": str(dtype), "stats": None, "topValues": None, "highCardinality": False}
+        if col in numeric_summary.columns:
+            column["stats"] = {stat: _to_json_value(value) for stat, value in numeric_summary[col].items()}
+        if col in profile["topValues"]:
+            counts = profile["topValues"][col]
+            if counts is None:
+                column["highCardinality"] = True
+            else:
+                column["topValues"] = [[_to_json_value(value), int(count)] for value, count in counts.nlargest(5).items()]
+        columns.append(column)
+
+    correlation = None
+    if profile["correlation"] is not None:
+        corr_matrix = profile["correlation"]
+        correlation = {
+            "columns": list(corr_matrix.columns),
+            "matrix": [[_to_json_value(value) for value in row] for row in corr_matrix.to_numpy()],
+        }
+
+    return {
+        "datasetHash_sha256": dataset_hash,
+        "rowCount": int(profile["rowCount"]),
+        "columns": columns,
+        "correlation": correlation,
+        "sampling": profile.get("sampling"),
+    }
+
+
+def _to_json_value(value):
+    """Turns NumPy scalars into plain Python values; unknown types become strings."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    return str(value)
+
+
+def _render_summary_pack(filename: str, profile: dict) -> str:
+    """Builds the LLM summary text from a structured profile."""
     summary_parts = []
+    columns = profile["columns"]
+    has_rows = profile["rowCount"] > 0
+    sampling = profile.get("sampling")
+    estimated = " (estimated from a sample)" if sampling else ""
 
     # Basic Information
     summary_parts.append("--- Dataset Schema and Basic Info ---")
-    summary_parts.append(f"Filename: {manifest['originalFilename']}")
-    summary_parts.append(f"Number of Rows: {len(df)}")
-    summary_parts.append(f"Number of Columns: {len(df.columns)}")
+    summary_parts.append(f"Filename: {filename}")
+    summary_parts.append(f"Number of Rows: {profile['rowCount']}")
+    summary_parts.append(f"Number of Columns: {len(columns)}")
+    if sampling:
+        summary_parts.append(
+            f"Note: quartiles, top value counts and correlations are estimated from a random sample "
+            f"of {sampling['sampleRows']} rows; row counts, means, std, min and max cover every row."
+        )
     summary_parts.append("\nColumn Names and Data Types:")
-    for col, dtype in df.dtypes.items():
-        summary_parts.append(f"- '{col}' (Type: {dtype})")
+    for column in columns:
+        summary_parts.append(f"- '{column['name']}' (Type: {column['dtype']})")
 
     # Descriptive Statistics for Numerical Columns
-    numeric_df = df.select_dtypes(include=['number'])
-    if not numeric_df.empty:
-        summary_parts.append("\n--- Statistical Summary for Numerical Columns ---") # e.g. mean, median, std, min, max
-        summary_parts.append(numeric_df.describe().to_string())
+    numeric_columns = [column for column in columns if column["stats"] is not None]
+    if has_rows and numeric_columns:
+        numeric_summary = pd.DataFrame(
+            {column["name"]: [column["stats"][stat] for stat in DESCRIBE_INDEX] for column in numeric_columns},
+            index=DESCRIBE_INDEX,
+            dtype="float64",
+        )
+        quartiles_note = " (quartiles estimated from a sample)" if sampling else ""
+        summary_parts.append(f"\n--- Statistical Summary for Numerical Columns{quartiles_note} ---") # e.g. mean, median, std, min, max
+        summary_parts.append(numeric_summary.to_string())
 
     # Analysis of Categorical Columns
-    categorical_df = df.select_dtypes(include=['object', 'category'])
-    if not categorical_df.empty:
-        summary_parts.append("\n--- Analysis of Categorical Columns (Top 5 Values) ---") # e.g. value counts for top categories
-        for col in categorical_df.columns:
-            if df[col].nunique() < 50:
-                summary_parts.append(f"\nColumn: '{col}'")
-                summary_parts.append(df[col].value_counts().nlargest(5).to_string())
+    categorical_columns = [column for column in columns if column["topValues"] is not None or column["highCardinality"]]
+    if has_rows and categorical_columns:
+        summary_parts.append(f"\n--- Analysis of Categorical Columns (Top 5 Values){estimated} ---") # e.g. value counts for top categories
+        for column in categorical_columns:
+            if column["topValues"] is not None:
+                values = [value for value, _ in column["topValues"]]
+                counts = [count for _, count in column["topValues"]]
+                top_values = pd.Series(counts, index=pd.Index(values, name=column["name"]), name="count", dtype="int64")
+                summary_parts.append(f"\nColumn: '{column['name']}'")
+                summary_parts.append(top_values.to_string())
             else:
-                summary_parts.append(f"\nColumn: '{col}' has high cardinality (>50 unique values).") # e.g. user IDs, timestamps
+                summary_parts.append(f"\nColumn: '{column['name']}' has high cardinality (>{CARDINALITY_LIMIT} unique values).") # e.g. user IDs, timestamps
 
     # Correlation Analysis
-    if len(numeric_df.columns) > 1:
-        summary_parts.append("\n--- Correlation Matrix (Top 5 Pairs by Absolute Value) ---") # e.g. correlation between numerical features
-        corr_matrix = numeric_df.corr().abs()
-        corr_pairs = corr_matrix.unstack()
+    correlation = profile["correlation"]
+    if correlation is not None:
+        summary_parts.append(f"\n--- Correlation Matrix (Top 5 Pairs by Absolute Value){estimated} ---") # e.g. correlation between numerical features
+        corr_matrix = pd.DataFrame(correlation["matrix"], index=correlation["columns"], columns=correlation["columns"], dtype="float64")
+        corr_pairs = corr_matrix.abs().unstack()
         sorted_pairs = corr_pairs.sort_values(kind="quicksort", ascending=False)
         unique_pairs = sorted_pairs[sorted_pairs < 1.0].drop_duplicates()
         summary_parts.append(unique_pairs.head(5).to_string())
 
-    # --- 3. Combine and Return the Summary Pack ---
     return "\n".join(summary_parts)
 
 """
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from . import ingest_service
+from ..adapters.chart_engine import chart_engine
+from ..adapters.compute_executor import compute_executor
+from ..adapters.storage import storage_adapter
+from ..adapters import metrics
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Counters since startup, plus the state of storage after the last sweep.
+_metrics: Dict[str, Any] = {
+    "sweeps": 0,
+    "evictedDatasets": 0,
+    "evictedBytes": 0,
+    "evictedByTtl": 0,
+    "evictedByQuota": 0,
+    "removedStagedFiles": 0,
+    "datasets": 0,
+    "storageBytes": 0,
+    "lastSweepAt_utc": None,
+}
+
+_janitor_task: Optional["asyncio.Task[None]"] = None
+
+
+def start_janitor():
+    """Starts the periodic sweep in the background; called once the event loop runs."""
+    global _janitor_task
+    if _janitor_task is None and settings.STORAGE_JANITOR_INTERVAL_SECONDS > 0:
+        _janitor_task = asyncio.ensure_future(_run_janitor())
+
+
+async def stop_janitor():
+    """Cancels the periodic sweep and waits for it to stop."""
+    global _janitor_task
+    if _janitor_task is None:
+        return
+    _janitor_task.cancel()
+    try:
+        await _janitor_task
+    except asyncio.CancelledError:
+        pass
+    _janitor_task = None
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Returns a snapshot of the janitor's eviction counters and the last measured storage use."""
+    return dict(_metrics)
+
+
+async def _run_janitor():
+    """Sweeps right away, which catches a volume that filled up before a restart, then on every interval."""
+    while True:
+        try:
+            # Datasets with an ingest job in flight are never evicted under it.
+            await compute_executor.run(sweep, ingest_service.active_dataset_ids())
+        except Exception as e:
+            logger.error(f"Storage sweep failed: {e}")
+        await asyncio.sleep(settings.STORAGE_JANITOR_INTERVAL_SECONDS)
+
+
+def sweep(protected: Optional[Set[str]] = None) -> List[str]:
+    """
+    Applies the storage lifecycle rules once and returns the evicted dataset IDs.
+
+    Datasets not accessed for STORAGE_TTL_SECONDS are deleted first. If the
+    remaining datasets still take more than STORAGE_MAX_BYTES, the least
+    recently accessed ones are deleted until they fit. Datasets in `protected`
+    or in use by a request (see `storage_adapter.use_dataset`) are kept.
+    Deletion goes through the storage adapter, which also drops the dataset
+    from the in-memory caches; the chart engine's workers drop their copies too.
+    """
+    protected = protected or set()
+    now = time.time()
+
+    # --- 1. Persist Pending Access Times ---
+    recent_accesses = storage_adapter.flush_access_times()
+
+    # --- 2. Measure Every Dataset ---
+    datasets = []
+    for dataset_id in storage_adapter.list_dataset_ids():
+        last_access = recent_accesses.get(dataset_id) or _stored_access_time(dataset_id)
+        datasets.append((last_access, dataset_id, storage_adapter.get_dataset_size_bytes(dataset_id)))
+    datasets.sort() # Least recently accessed first
+
+    # --- 3. Evict Expired Datasets ---
+    evicted = []
+    kept = []
+    for last_access, dataset_id, size in datasets:
+        expired = settings.STORAGE_TTL_SECONDS > 0 and now - last_access > settings.STORAGE_TTL_SECONDS
+        if expired and not _is_protected(dataset_id, protected):
+            _evict(dataset_id, size, "ttl")
+            evicted.append(dataset_id)
+        else:
+            kept.append((last_access, dataset_id, size))
+
+    # --- 4. Enforce the Quota, Least Recently Accessed First ---
+    total_bytes = sum(size for _, _, size in kept)
+    if settings.STORAGE_MAX_BYTES > 0:
+        for last_access, dataset_id, size in list(kept):
+            if total_bytes <= settings.STORAGE_MAX_BYTES:
+                break
+            if _is_protected(dataset_id, protected):
+                continue
+            _evict(dataset_id, size, "quota")
+            evicted.append(dataset_id)
+            kept.remove((last_access, dataset_id, size))
+            total_bytes -= size
+        if total_bytes > settings.STORAGE_MAX_BYTES:
+            logger.warning(f"Storage uses {total_bytes} bytes, above the {settings.STORAGE_MAX_BYTES} byte quota, after evicting all idle datasets.")
+
+    # --- 5. Remove Abandoned Staged Uploads ---
+    if settings.STORAGE_TTL_SECONDS > 0:
+        _metrics["removedStagedFiles"] += storage_adapter.discard_stale_staged_files(settings.STORAGE_TTL_SECONDS)
+
+    _metrics["sweeps"] += 1
+    _metrics["datasets"] = len(kept)
+    _metrics["storageBytes"] = total_bytes
+    metrics.storage_bytes.set(total_bytes)
+    _metrics["lastSweepAt_utc"] = datetime.now(timezone.utc).isoformat()
+    if evicted:
+        logger.info(f"Storage sweep evicted {len(evicted)} datasets; {len(kept)} remain using {total_bytes} bytes.")
+    return evicted
+
+
+def _stored_access_time(dataset_id: str) -> float:
+    """
+    Returns when a dataset was last used, from its manifest: the last recorded
+    access, else the upload time. Directories without a readable manifest fall
+    back to their modification time, so leftovers of failed uploads expire too.
+    """
+    try:
+        manifest = storage_adapter.get_manifest(dataset_id)
+        stamp = manifest.get("lastAccessedAt_utc") or manifest.get("uploadedAt_utc")
+        if stamp:
+            return datetime.fromisoformat(stamp).timestamp()
+    except (OSError, ValueError):
+        pass
+    try:
+        return (storage_adapter.base_path / dataset_id).stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _is_protected(dataset_id: str, protected: Set[str]) -> bool:
+    # Checked right before evicting, as requests start and finish while the sweep runs.
+    return dataset_id in protected or storage_adapter.is_in_use(dataset_id)
+
+
+def _evict(dataset_id: str, size: int, reason: str):
+    """Deletes a dataset and counts it under `reason` ("ttl" or "quota")."""
+    logger.info(f"Evicting dataset '{dataset_id}' ({size} bytes, {reason}).")
+    storage_adapter.delete_dataset(dataset_id)
+    chart_engine.invalidate(dataset_id)
+    _metrics["evictedDatasets"] += 1
+    _metrics["evictedBytes"] += size
+    _metrics["evictedByTtl" if reason == "ttl" else "evictedByQuota"] += 1
+    metrics.storage_evictions_total.inc(reason=reason)
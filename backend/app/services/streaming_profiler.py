@@ -0,0 +1,404 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from pandas.api.types import is_bool_dtype, is_float_dtype, is_numeric_dtype
+
+# Columns with at least this many distinct values are reported as high cardinality
+# instead of listing their top values (e.g. user IDs, timestamps).
+CARDINALITY_LIMIT = 50
+
+DESCRIBE_INDEX = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class StreamingProfiler:
+    """
+    Builds a dataset profile in a single pass over DataFrame chunks.
+
+    Every statistic is kept in a mergeable form (running moments, quantile
+    sketches, bounded value counters and pairwise co-moments), so only one chunk
+    has to be in memory at a time. The result mirrors what `describe()`,
+    `value_counts()` and `corr()` would report on the whole DataFrame; quantiles
+    are exact until a column exceeds twice the sketch size.
+    """
+    def __init__(self, sketch_size: int, cardinality_limit: int = CARDINALITY_LIMIT):
+        self.sketch_size = sketch_size
+        self.cardinality_limit = cardinality_limit
+        self.row_count = 0
+        self._columns: List[str] = []
+        self._chunk_dtypes: Dict[str, List[np.dtype]] = {}
+        self._moments: Dict[str, _RunningMoments] = {}
+        self._sketches: Dict[str, _QuantileSketch] = {}
+        self._counters: Dict[str, _ValueCounter] = {}
+        self._comoments: Optional[_CoMoments] = None
+
+    def update(self, chunk: pd.DataFrame):
+        """Folds one chunk of rows into the running statistics."""
+        self._update_moments(chunk)
+        self._update_distributions(chunk)
+
+    def _update_moments(self, chunk: pd.DataFrame):
+        """Row count, dtypes and running moments: cheap enough to always cover every row."""
+        if not self._columns:
+            self._columns = list(chunk.columns)
+            self._chunk_dtypes = {col: [] for col in self._columns}
+            self._counters = {col: _ValueCounter(self.cardinality_limit) for col in self._columns}
+        self.row_count += len(chunk)
+
+        for col in self._columns:
+            series = chunk[col]
+            dtypes = self._chunk_dtypes[col]
+            if series.dtype not in dtypes:
+                dtypes.append(series.dtype)
+            if _is_numeric(series.dtype):
+                values = series.to_numpy(dtype="float64", na_value=np.nan)
+                self._moments.setdefault(col, _RunningMoments()).update(values)
+
+    def _update_distributions(self, chunk: pd.DataFrame):
+        """Value counts, quantile sketches and co-moments."""
+        numeric_columns = []
+        for col in self._columns:
+            series = chunk[col]
+            self._counters[col].update(series)
+            if _is_numeric(series.dtype):
+                values = series.to_numpy(dtype="float64", na_value=np.nan)
+                self._sketches.setdefault(col, _QuantileSketch(self.sketch_size)).update(values)
+                numeric_columns.append(col)
+
+        # Columns that turn non-numeric in a later chunk become object columns in a
+        # full read, so they are dropped from the correlation from then on.
+        if self._comoments is None:
+            self._comoments = _CoMoments(numeric_columns)
+        self._comoments.drop([col for col in self._comoments.columns if col not in numeric_columns])
+        self._comoments.update(chunk[self._comoments.columns].to_numpy(dtype="float64", na_value=np.nan))
+
+    def result(self) -> dict:
+        """
+        Returns the merged profile:
+        - "rowCount": total number of rows seen.
+        - "dtypes": Series of the dtype each column would have in a full read.
+        - "numericSummary": DataFrame shaped like `describe()` for numeric columns.
+        - "topValues": per non-numeric column, a `value_counts()`-style Series,
+          or None when the column reached the cardinality limit.
+        - "correlation": pairwise Pearson correlation of numeric columns, or None.
+        - "sampling": None, as every figure is computed over all rows.
+        """
+        dtypes = pd.Series({col: _resolve_dtype(self._chunk_dtypes[col]) for col in self._columns}, dtype=object)
+        numeric_columns = [col for col in self._columns if _is_numeric(dtypes[col])]
+
+        numeric_summary = pd.DataFrame(
+            {col: self._describe(col) for col in numeric_columns},
+            index=DESCRIBE_INDEX,
+            columns=numeric_columns,
+            dtype="float64",
+        )
+
+        top_values = {}
+        for col in self._columns:
+            if dtypes[col] == object or str(dtypes[col]) == "category":
+                normalize_keys = len(self._chunk_dtypes[col]) > 1
+                top_values[col] = self._counters[col].to_series(col, normalize_keys)
+
+        correlation = None
+        if self._comoments is not None and len(numeric_columns) > 1:
+            correlation = self._comoments.correlation()
+
+        return {
+            "rowCount": self.row_count,
+            "dtypes": dtypes,
+            "numericSummary": numeric_summary,
+            "topValues": top_values,
+            "correlation": correlation,
+            "sampling": None,
+        }
+
+    def _describe(self, col: str) -> List[float]:
+        moments = self._moments[col]
+        sketch = self._sketches.get(col)
+        quartiles = sketch.quantiles([0.25, 0.5, 0.75]) if sketch is not None else [np.nan] * 3
+        return [moments.count, moments.mean, moments.std, moments.min, *quartiles, moments.max]
+
+
+class SampledProfiler(StreamingProfiler):
+    """
+    StreamingProfiler variant for very large datasets.
+
+    Row count, dtypes and the running moments (count, mean, std, min, max) are
+    still computed over every row. Quartiles, value counts and correlations,
+    which dominate profiling time, are computed on a uniform random sample of
+    at most `sample_rows` rows kept with reservoir sampling: every row gets a
+    random key and the rows with the smallest keys are kept. Value counts are
+    scaled up to the full row count. The seed is fixed, so the same data always
+    yields the same profile.
+    """
+    # Figures of the result that come from the sample rather than from every row.
+    ESTIMATED_FIELDS = ["25%", "50%", "75%", "topValues", "highCardinality", "correlation"]
+
+    def __init__(self, sketch_size: int, sample_rows: int, cardinality_limit: int = CARDINALITY_LIMIT, seed: int = 0):
+        super().__init__(sketch_size, cardinality_limit)
+        self.sample_rows = sample_rows
+        self._rng = np.random.default_rng(seed)
+        self._sample_chunks: List[pd.DataFrame] = []
+        self._sample_keys = np.empty(0)
+        self._sample_positions = np.empty(0, dtype=np.int64)
+
+    def update(self, chunk: pd.DataFrame):
+        """Folds a chunk into the exact moments and offers its rows to the reservoir."""
+        offset = self.row_count
+        self._update_moments(chunk)
+
+        keys = self._rng.random(len(chunk))
+        candidates = np.arange(len(chunk))
+        if len(self._sample_keys) >= self.sample_rows:
+            # Only rows beating the current worst key can enter a full reservoir.
+            candidates = candidates[keys < self._sample_keys.max()]
+            if len(candidates) == 0:
+                return
+        self._sample_chunks.append(chunk.iloc[candidates])
+        self._sample_keys = np.concatenate([self._sample_keys, keys[candidates]])
+        self._sample_positions = np.concatenate([self._sample_positions, candidates + offset])
+        if len(self._sample_keys) > 2 * self.sample_rows:
+            self._shrink_reservoir()
+
+    def result(self) -> dict:
+        """Returns the profile as StreamingProfiler does, with sample-based figures marked."""
+        sample = self._shrink_reservoir()
+        if sample is not None and len(sample):
+            self._update_distributions(sample)
+
+        profile = super().result()
+        sample_size = len(self._sample_keys)
+        if sample_size:
+            scale = self.row_count / sample_size
+            for col, counts in profile["topValues"].items():
+                if counts is not None:
+                    profile["topValues"][col] = (counts * scale).round().astype("int64")
+        profile["sampling"] = {
+            "method": "reservoir",
+            "sampleRows": sample_size,
+            "estimatedFields": list(self.ESTIMATED_FIELDS),
+        }
+        return profile
+
+    def _shrink_reservoir(self) -> Optional[pd.DataFrame]:
+        """Keeps the `sample_rows` smallest keys and returns the sample in original row order."""
+        if not self._sample_chunks:
+            return None
+        sample = pd.concat(self._sample_chunks, ignore_index=True)
+        keep = np.arange(len(self._sample_keys))
+        if len(keep) > self.sample_rows:
+            keep = np.argpartition(self._sample_keys, self.sample_rows - 1)[:self.sample_rows]
+        keep = keep[np.argsort(self._sample_positions[keep], kind="mergesort")]
+
+        sample = sample.iloc[keep].reset_index(drop=True)
+        self._sample_chunks = [sample]
+        self._sample_keys = self._sample_keys[keep]
+        self._sample_positions = self._sample_positions[keep]
+        return sample
+
+
+def _is_numeric(dtype) -> bool:
+    """Matches `select_dtypes(include=['number'])`, which leaves out booleans."""
+    return is_numeric_dtype(dtype) and not is_bool_dtype(dtype)
+
+
+def _resolve_dtype(chunk_dtypes: List[np.dtype]):
+    """Infers the dtype a full read would produce from the dtypes seen per chunk."""
+    if not chunk_dtypes:
+        return np.dtype(object)
+    if len(chunk_dtypes) == 1:
+        return chunk_dtypes[0]
+    if all(_is_numeric(dtype) for dtype in chunk_dtypes):
+        if any(is_float_dtype(dtype) for dtype in chunk_dtypes):
+            return np.dtype("float64")
+        return np.dtype("int64")
+    return np.dtype(object)
+
+
+class _RunningMoments:
+    """Count, mean, sum of squared deviations, min and max, merged with Chan's formulas."""
+    def __init__(self):
+        self.count = 0
+        self.mean = np.nan
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        n_b = len(values)
+        if n_b == 0:
+            return
+        mean_b = values.mean()
+        m2_b = float(((values - mean_b) ** 2).sum())
+        if self.count == 0:
+            self.count, self.mean, self.m2 = n_b, mean_b, m2_b
+            self.min, self.max = values.min(), values.max()
+            return
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.count * n_b / n
+        self.count = n
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+
+class _QuantileSketch:
+    """
+    Mergeable quantile sketch of weighted centroids.
+
+    Values are kept as-is (weight 1) until there are more than twice `size` of
+    them, then compressed into `size` equal-weight centroids. Quantiles use the
+    same linear interpolation as pandas, so they are exact while uncompressed.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self._values = np.empty(0)
+        self._weights = np.empty(0)
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self._values = np.concatenate([self._values, values])
+        self._weights = np.concatenate([self._weights, np.ones(len(values))])
+        if len(self._values) > 2 * self.size:
+            self._compress()
+
+    def quantiles(self, qs: List[float]) -> List[float]:
+        if len(self._values) == 0:
+            return [np.nan] * len(qs)
+        order = np.argsort(self._values, kind="mergesort")
+        values, weights = self._values[order], self._weights[order]
+        # Each centroid sits at the mean rank of the values it represents.
+        positions = np.cumsum(weights) - (weights + 1) / 2
+        total = weights.sum()
+        return [float(np.interp(q * (total - 1), positions, values)) for q in qs]
+
+    def _compress(self):
+        order = np.argsort(self._values, kind="mergesort")
+        values, weights = self._values[order], self._weights[order]
+        cumulative = np.cumsum(weights)
+        buckets = np.minimum((cumulative - weights) * self.size // cumulative[-1], self.size - 1).astype(int)
+        bucket_weights = np.bincount(buckets, weights=weights, minlength=self.size)
+        bucket_sums = np.bincount(buckets, weights=values * weights, minlength=self.size)
+        keep = bucket_weights > 0
+        self._weights = bucket_weights[keep]
+        self._values = bucket_sums[keep] / self._weights
+
+
+class _ValueCounter:
+    """Exact value counts in first-seen order, abandoned once the cardinality limit is hit."""
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.counts: Optional[Dict] = {}
+
+    def update(self, series: pd.Series):
+        if self.counts is None:
+            return
+        for value, count in series.value_counts(sort=False).items():
+            if count == 0: # Unused categories of a categorical column
+                continue
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        if len(self.counts) >= self.limit:
+            self.counts = None
+
+    def to_series(self, name: str, normalize_keys: bool) -> Optional[pd.Series]:
+        """Returns the counts as `value_counts()` would, or None for high cardinality."""
+        if self.counts is None:
+            return None
+        counts = self.counts
+        if normalize_keys:
+            # Chunks parsed with different dtypes end up as strings in a full read.
+            counts = {}
+            for value, count in self.counts.items():
+                counts[str(value)] = counts.get(str(value), 0) + count
+        index = pd.Index(list(counts.keys()), name=name)
+        series = pd.Series(list(counts.values()), index=index, name="count", dtype="int64")
+        return series.sort_values(ascending=False)
+
+
+class _CoMoments:
+    """Pairwise-complete means, variances and co-moments for a fixed set of numeric columns."""
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        p = len(columns)
+        self.n = np.zeros((p, p))
+        self.mean_i = np.zeros((p, p))
+        self.mean_j = np.zeros((p, p))
+        self.m2_i = np.zeros((p, p))
+        self.m2_j = np.zeros((p, p))
+        self.c = np.zeros((p, p))
+
+    def update(self, data: np.ndarray):
+        if data.shape[1] == 0:
+            return
+        n_b, mean_i_b, mean_j_b, m2_i_b, m2_j_b, c_b = _chunk_comoments(data)
+        n = self.n + n_b
+        delta_i = mean_i_b - self.mean_i
+        delta_j = mean_j_b - self.mean_j
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight_b = np.where(n > 0, n_b / n, 0.0)
+            factor = np.where(n > 0, self.n * n_b / n, 0.0)
+        self.mean_i += delta_i * weight_b
+        self.mean_j += delta_j * weight_b
+        self.m2_i += m2_i_b + delta_i ** 2 * factor
+        self.m2_j += m2_j_b + delta_j ** 2 * factor
+        self.c += c_b + delta_i * delta_j * factor
+        self.n = n
+
+    def drop(self, columns: List[str]):
+        """Stops tracking `columns`; pairs among the remaining columns are unaffected."""
+        if not columns:
+            return
+        keep = [i for i, col in enumerate(self.columns) if col not in columns]
+        self.columns = [self.columns[i] for i in keep]
+        for name in ("n", "mean_i", "mean_j", "m2_i", "m2_j", "c"):
+            setattr(self, name, getattr(self, name)[np.ix_(keep, keep)])
+
+    def correlation(self) -> pd.DataFrame:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            denominator = np.sqrt(self.m2_i * self.m2_j)
+            corr = np.where((self.n > 1) & (denominator > 0), self.c / denominator, np.nan)
+        corr = np.clip(corr, -1.0, 1.0)
+        diagonal = np.diag(corr).copy()
+        np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def _chunk_comoments(data: np.ndarray):
+    """Computes pairwise-complete co-moment matrices for one chunk."""
+    p = data.shape[1]
+    valid = ~np.isnan(data)
+    if valid.all():
+        rows = data.shape[0]
+        means = data.mean(axis=0)
+        deviations = data - means
+        m2 = (deviations ** 2).sum(axis=0)
+        c = deviations.T @ deviations
+        np.fill_diagonal(c, m2)
+        n = np.full((p, p), float(rows))
+        return n, np.tile(means[:, None], p), np.tile(means[None, :], (p, 1)), np.tile(m2[:, None], p), np.tile(m2[None, :], (p, 1)), c
+
+    n, mean_i, mean_j, m2_i, m2_j, c = (np.zeros((p, p)) for _ in range(6))
+    for i in range(p):
+        for j in range(i, p):
+            mask = valid[:, i] & valid[:, j]
+            count = mask.sum()
+            if count == 0:
+                continue
+            x, y = data[mask, i], data[mask, j]
+            mx, my = x.mean(), y.mean()
+            dx, dy = x - mx, y - my
+            n[i, j] = n[j, i] = count
+            mean_i[i, j], mean_j[i, j] = mx, my
+            mean_i[j, i], mean_j[j, i] = my, mx
+            m2_i[i, j] = m2_j[j, i] = (dx ** 2).sum()
+            m2_j[i, j] = m2_i[j, i] = (dy ** 2).sum()
+            c[i, j] = c[j, i] = (dx * dy).sum()
+    return n, mean_i, mean_j, m2_i, m2_j, c
@@ -1,34 +1,38 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import List
+import math
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Tuple
 from pydantic import ValidationError
 from fastapi import HTTPException, status
 
 from ..schemas.dto import SuggestionDTO
-from ..services import profiling_service
-from ..adapters import llm_client
+from ..services import profiling_service, ingest_service
+from ..adapters import llm_client, metrics
+from ..adapters.compute_executor import compute_executor
+from ..adapters.storage import storage_adapter
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
-def generate_suggestions(dataset_id: str) -> List[SuggestionDTO]:
-    summary_pack = profiling_service.create_summary_pack(dataset_id)
-
-    # Example JSON structure to guide the LLM's response format.
-    example_json = [
-            {
-                "title": "Total Sales by Region",
-                "insight": "The East region leads in sales, suggesting a strong market presence or successful sales strategies in that area.",
-                "parameters": {
-                    "chart_type": "bar",
-                    "x_axis": "Region",
-                    "y_axis": "Sales",
-                    "aggregation": "sum"
-                }
+# Example JSON structure to guide the LLM's response format.
+EXAMPLE_JSON = [
+        {
+            "title": "Total Sales by Region",
+            "insight": "The East region leads in sales, suggesting a strong market presence or successful sales strategies in that area.",
+            "parameters": {
+                "chart_type": "bar",
+                "x_axis": "Region",
+                "y_axis": "Sales",
+                "aggregation": "sum"
             }
-        ]
+        }
+    ]
 
-    # Refined and translated master prompt for the LLM.
-    master_prompt = f"""
+# Refined and translated master prompt for the LLM.
+MASTER_PROMPT_TEMPLATE = """
     You are a Senior Data Analyst. Your goal is to analyze a dataset summary and suggest 3-5 visualizations. NO MORE, NO LESS. 
     Regarding suggestions: Feel free to add between 3 (as minimum) and 5 (as maximum) suggestions, depending on what you find relevant. It's completely fine tsometimes 4, some other times 5, or even just 3 really good ones.
     You must return ONLY a valid JSON which should be an ARRAY of OBJECTS. Do not include any text outside the JSON array.
@@ -40,7 +44,7 @@ def generate_suggestions(dataset_id: str) -> List[SuggestionDTO]:
     - "insight" MUST be a SINGLE sentence in English.
 
     --- EXAMPLE RESPONSE ---
-    {json.dumps(example_json, indent=4)}
+    {example_json}
     --- END EXAMPLE ---
 
     --- DATASET SUMMARY ---
@@ -50,12 +54,284 @@ def generate_suggestions(dataset_id: str) -> List[SuggestionDTO]:
     Now, provide ONLY the JSON array as your response.
     """
 
+# Changes whenever the prompt or its example changes, invalidating stored suggestions.
+PROMPT_VERSION = hashlib.sha256(
+    (MASTER_PROMPT_TEMPLATE + json.dumps(EXAMPLE_JSON, sort_keys=True)).encode("utf-8")
+).hexdigest()[:16]
+
+# LLM calls currently running, keyed by (datasetId, cache key), so concurrent
+# requests for the same suggestions share one call.
+_in_flight: Dict[Tuple[str, str], "asyncio.Future[List[SuggestionDTO]]"] = {}
+
+
+async def generate_suggestions(dataset_id: str, refresh: bool = False) -> List[SuggestionDTO]:
+    """
+    Returns AI suggestions for a dataset.
+
+    Validated suggestions are stored in the manifest's `suggestionResults` under a
+    key made of the dataset hash, the model name and the prompt version, and are
+    served from there on repeat calls unless `refresh` is set. Concurrent requests
+    for the same key wait on a single in-flight LLM call. A running ingest job is
+    awaited first, so the profile it builds is reused.
+    """
+    await ingest_service.wait_for_ingest(dataset_id)
+    manifest = await compute_executor.run(storage_adapter.get_manifest, dataset_id)
+    cache_key = _get_cache_key(manifest)
+
+    stored = manifest.get("suggestionResults")
+    reusable = not refresh and bool(stored) and stored.get("cacheKey") == cache_key
+    metrics.record_cache_lookup("suggestions", reusable)
+    if reusable:
+        logger.info(f"Serving stored suggestions for dataset '{dataset_id}'.")
+        return [SuggestionDTO.model_validate(item) for item in stored["suggestions"]]
+
+    flight_key = (dataset_id, cache_key)
+    future = _in_flight.get(flight_key)
+    if future is None:
+        future = metrics.start_background_task(_generate_and_store(dataset_id, cache_key))
+        _in_flight[flight_key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(flight_key, None))
+    else:
+        logger.info(f"Joining in-flight suggestion request for dataset '{dataset_id}'.")
+    # Shielded so that one client disconnecting does not cancel the shared call.
+    return await asyncio.shield(future)
+
+
+async def stream_suggestions(dataset_id: str, refresh: bool = False) -> AsyncIterator[SuggestionDTO]:
+    """
+    Returns an async iterator that yields AI suggestions one by one as the LLM
+    produces them.
+
+    Everything that can fail with a plain HTTP error (unknown dataset, profiling)
+    happens before this coroutine returns, so callers can still answer with a
+    proper status code. Stored suggestions and in-flight calls are reused in the
+    same way as in `generate_suggestions`; a completed stream is stored under the
+    same cache key.
+
+    The LLM stream runs as a shared task registered in `_in_flight`, so other
+    requests for the same suggestions (streamed or not) wait for it instead of
+    paying for a second call, and it completes even if this client disconnects.
+    """
+    await ingest_service.wait_for_ingest(dataset_id)
+    manifest = await compute_executor.run(storage_adapter.get_manifest, dataset_id)
+    cache_key = _get_cache_key(manifest)
+
+    stored = manifest.get("suggestionResults")
+    reusable = not refresh and bool(stored) and stored.get("cacheKey") == cache_key
+    metrics.record_cache_lookup("suggestions", reusable)
+    if reusable:
+        logger.info(f"Serving stored suggestions for dataset '{dataset_id}'.")
+        return _iterate([SuggestionDTO.model_validate(item) for item in stored["suggestions"]])
+
+    flight_key = (dataset_id, cache_key)
+    future = _in_flight.get(flight_key)
+    if future is None:
+        try:
+            llm_client.check_available()
+        except llm_client.LLMUnavailableError as e:
+            raise _service_unavailable(e)
+        master_prompt = await _build_master_prompt(dataset_id)
+        # Another request may have started the same call while the prompt was built.
+        future = _in_flight.get(flight_key)
+    if future is not None:
+        logger.info(f"Joining in-flight suggestion request for dataset '{dataset_id}'.")
+        return _iterate_future(future)
+
+    queue: "asyncio.Queue" = asyncio.Queue()
+    task = metrics.start_background_task(_stream_to_queue(dataset_id, cache_key, master_prompt, queue))
+    _in_flight[flight_key] = task
+    task.add_done_callback(lambda _: _in_flight.pop(flight_key, None))
+    return _iterate_queue(queue, task)
+
+
+async def _iterate(suggestions: List[SuggestionDTO]) -> AsyncIterator[SuggestionDTO]:
+    for suggestion in suggestions:
+        yield suggestion
+
+
+async def _iterate_future(future: "asyncio.Future[List[SuggestionDTO]]") -> AsyncIterator[SuggestionDTO]:
+    for suggestion in await asyncio.shield(future):
+        yield suggestion
+
+
+# Marks the end of a streamed answer in the queue `_stream_to_queue` fills.
+_END_OF_STREAM = object()
+
+
+async def _stream_to_queue(dataset_id: str, cache_key: str, master_prompt: str, queue: "asyncio.Queue") -> List[SuggestionDTO]:
+    """
+    Runs a streamed LLM call, passing each suggestion to the queue of the
+    request that started it, and returns them all for requests that joined.
+    """
+    suggestions: List[SuggestionDTO] = []
+    try:
+        async for suggestion in _stream_and_store(dataset_id, cache_key, master_prompt):
+            suggestions.append(suggestion)
+            queue.put_nowait(suggestion)
+    finally:
+        queue.put_nowait(_END_OF_STREAM)
+    return suggestions
+
+
+async def _iterate_queue(queue: "asyncio.Queue", task: "asyncio.Future[List[SuggestionDTO]]") -> AsyncIterator[SuggestionDTO]:
+    """Yields suggestions as `_stream_to_queue` produces them, then raises its error, if any."""
+    while True:
+        item = await queue.get()
+        if item is _END_OF_STREAM:
+            # Shielded so that this client disconnecting does not cancel the shared call.
+            await asyncio.shield(task)
+            return
+        yield item
+
+
+async def _stream_and_store(dataset_id: str, cache_key: str, master_prompt: str) -> AsyncIterator[SuggestionDTO]:
+    """
+    Feeds the streamed LLM output through an incremental JSON parser, validating
+    and yielding each suggestion object as soon as it is complete.
+    """
+    parser = _SuggestionStreamParser()
+    suggestions: List[SuggestionDTO] = []
+    rejected = 0
+    try:
+        async for text in llm_client.stream_suggestions_from_llm(master_prompt):
+            for item in parser.feed(text):
+                try:
+                    suggestion = SuggestionDTO.model_validate(item)
+                except ValidationError as e:
+                    rejected += 1
+                    logger.warning(f"Skipping streamed suggestion that failed validation for dataset '{dataset_id}': {e}")
+                    continue
+                suggestions.append(suggestion)
+                yield suggestion
+    except llm_client.LLMUnavailableError as e:
+        raise _service_unavailable(e)
+    except json.JSONDecodeError:
+        logger.error(f"LLM streamed an invalid JSON object for dataset '{dataset_id}'.")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="The AI service returned a malformed response. Could not decode JSON."
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while streaming suggestions for dataset '{dataset_id}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while generating AI suggestions."
+        )
+
+    if not suggestions:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="The AI service did not return any valid suggestions."
+        )
+
+    logger.info(f"Streamed {len(suggestions)} suggestions for dataset '{dataset_id}' ({rejected} rejected).")
+    # Only complete, fully valid answers are stored, matching the non-streaming path.
+    if not rejected:
+        await _store_suggestions(dataset_id, cache_key, suggestions)
+
+
+class _SuggestionStreamParser:
+    """
+    Incrementally extracts the top-level objects of a JSON array from text that
+    arrives in arbitrary pieces.
+
+    Only brace depth and string state are tracked, so anything the model writes
+    around the array (such as a Markdown code fence) is ignored. Each completed
+    object is decoded with `json.loads`.
+    """
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[dict]:
+        """Consumes the next piece of text and returns the objects it completed."""
+        completed = []
+        for char in text:
+            if self._depth > 0:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._depth > 0:
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._buffer = [char]
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append(json.loads("".join(self._buffer)))
+                    self._buffer = []
+        return completed
+
+
+def _service_unavailable(error: llm_client.LLMUnavailableError) -> HTTPException:
+    """Answers 503 with a Retry-After header while the AI service is unhealthy."""
+    logger.warning(f"AI service unavailable: {error}")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"{error} Please try again later.",
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))},
+    )
+
+
+def _get_cache_key(manifest: dict) -> str:
+    """Builds the suggestion cache key from the content hash, model, prompt version and summary budget."""
+    return f"{manifest.get('datasetHash_sha256')}:{settings.OPENAI_MODEL}:{PROMPT_VERSION}:{settings.SUMMARY_PACK_MAX_TOKENS}"
+
+
+async def _generate_and_store(dataset_id: str, cache_key: str) -> List[SuggestionDTO]:
+    """Calls the LLM for fresh suggestions and persists them in the manifest."""
+    suggestions = await _generate_from_llm(dataset_id)
+    await _store_suggestions(dataset_id, cache_key, suggestions)
+    return suggestions
+
+
+async def _store_suggestions(dataset_id: str, cache_key: str, suggestions: List[SuggestionDTO]):
+    """Persists validated suggestions in the manifest. Failures are logged, not raised."""
+    stored = {
+        "cacheKey": cache_key,
+        "generatedAt_utc": datetime.now(timezone.utc).isoformat(),
+        "suggestions": [suggestion.model_dump() for suggestion in suggestions],
+    }
+    try:
+        await compute_executor.run(storage_adapter.update_manifest, dataset_id, {"suggestionResults": stored})
+    except Exception as e:
+        logger.warning(f"Could not store suggestions for dataset '{dataset_id}': {e}")
+
+
+async def _build_master_prompt(dataset_id: str) -> str:
+    # Profiling is pandas work, so it runs on the compute executor.
+    summary_pack = await compute_executor.run(profiling_service.create_summary_pack, dataset_id)
+
+    return MASTER_PROMPT_TEMPLATE.format(
+        example_json=json.dumps(EXAMPLE_JSON, indent=4),
+        summary_pack=summary_pack,
+    )
+
+
+async def _generate_from_llm(dataset_id: str) -> List[SuggestionDTO]:
+    # Fail before profiling when the AI service is known to be down.
+    try:
+        llm_client.check_available()
+    except llm_client.LLMUnavailableError as e:
+        raise _service_unavailable(e)
+    master_prompt = await _build_master_prompt(dataset_id)
+
     try:
         
-        raw_llm_response = llm_client.get_suggestions_from_llm(master_prompt)
-        print("--- RAW LLM RESPONSE ---")
-        print(raw_llm_response)
-        print("--- END RAW LLM RESPONSE ---")
+        raw_llm_response = await llm_client.get_suggestions_from_llm(master_prompt)
+        logger.debug(f"Raw LLM response for dataset '{dataset_id}': {raw_llm_response}")
 
         def _parse_llm_json(s: str):
             # Try direct load
@@ -81,6 +357,8 @@ def generate_suggestions(dataset_id: str) -> List[SuggestionDTO]:
         logger.info(f"Successfully generated and validated {len(validated_suggestions)} suggestions for dataset '{dataset_id}'.")
         return validated_suggestions
 
+    except llm_client.LLMUnavailableError as e:
+        raise _service_unavailable(e)
     except json.JSONDecodeError:
         logger.error(f"LLM returned an invalid JSON string for dataset '{dataset_id}'.")
         raise HTTPException(
@@ -0,0 +1,236 @@
+import itertools
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .streaming_profiler import CARDINALITY_LIMIT
+
+# Word pieces and punctuation, the units BPE tokenizers split text into first.
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Tokens kept free for the closing lines: strongest correlations and omitted columns.
+_CORRELATION_RESERVE_TOKENS = 60
+_OMITTED_RESERVE_TOKENS = 40
+_MAX_CORRELATION_PAIRS = 5
+_MIN_CORRELATION = 0.3 # Weaker pairs are noise, not worth their tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the prompt tokens of `text` without a tokenizer: one token per
+    punctuation mark and per started four characters of each word or number,
+    which tracks OpenAI's BPE encodings closely on tabular summaries.
+    """
+    return sum(1 if len(piece) <= 4 else math.ceil(len(piece) / 4) for piece in _TOKEN_PIECES.findall(text))
+
+
+def rank_columns(profile: dict) -> List[Tuple[str, float]]:
+    """
+    Orders a profile's columns by how informative they are for suggesting
+    charts, as (name, score) pairs with scores in [0, 1]. Charts need both an
+    axis to group by and a value to measure, so the order alternates between
+    dimensions (dates, categories) and measures (numbers), each taken from
+    most to least informative:
+
+    - dates are the natural x-axis of trends and rank first;
+    - numeric columns score by relative spread (coefficient of variation) and
+      their strongest correlation, less the share of missing values; constant
+      columns and row-number sequences score lowest;
+    - categorical columns score by how evenly their top values split the rows,
+      so a good grouping column beats a near-constant one;
+    - high-cardinality text (IDs, free text) ranks last.
+    """
+    row_count = max(profile["rowCount"], 1)
+    strongest = _strongest_correlations(profile.get("correlation"))
+
+    dimensions, measures = [], []
+    for position, column in enumerate(profile["columns"]):
+        if column["dtype"].startswith("datetime"):
+            dimensions.append((-0.95, position, column["name"]))
+        elif column["stats"] is not None:
+            score = _numeric_score(column["stats"], row_count, strongest.get(column["name"], 0.0))
+            measures.append((-score, position, column["name"]))
+        elif column["topValues"] is not None:
+            dimensions.append((-_categorical_score(column["topValues"], row_count), position, column["name"]))
+        else:
+            dimensions.append((-0.05, position, column["name"]))
+
+    ranked = []
+    for pair in itertools.zip_longest(sorted(dimensions), sorted(measures)):
+        ranked.extend((name, -negative_score) for negative_score, _, name in filter(None, pair))
+    return ranked
+
+
+def fit_to_budget(filename: str, profile: dict, full_summary: str, budget_tokens: int,
+                  prompt_seconds_per_1k_tokens: float = 0.0) -> Tuple[str, dict]:
+    """
+    Returns the summary to send to the LLM and a report of the compaction.
+
+    The full summary is kept when it fits in `budget_tokens`. Otherwise a
+    compact one-line-per-column table is built, taking columns in order of
+    `rank_columns` until the budget is spent; the columns left out are named
+    as far as the budget allows. The report holds the estimated tokens of
+    both versions ("tokens", "fullTokens", "savedTokens"), an estimate of
+    the prompt time saved, from the saved tokens at the configured
+    `prompt_seconds_per_1k_tokens` rather than from measured LLM latency
+    ("estimatedSavedPromptSeconds"), and how many of the columns made it
+    into the summary ("shownColumns", "totalColumns").
+    """
+    full_tokens = estimate_tokens(full_summary)
+    columns = profile["columns"]
+    if full_tokens <= budget_tokens:
+        summary, shown = full_summary, len(columns)
+    else:
+        summary, shown = _render_compact_summary(filename, profile, budget_tokens)
+
+    tokens = estimate_tokens(summary)
+    return summary, {
+        "tokens": tokens,
+        "fullTokens": full_tokens,
+        "savedTokens": full_tokens - tokens,
+        "estimatedSavedPromptSeconds": (full_tokens - tokens) * prompt_seconds_per_1k_tokens / 1000,
+        "shownColumns": shown,
+        "totalColumns": len(columns),
+        "compacted": summary is not full_summary,
+    }
+
+
+def _render_compact_summary(filename: str, profile: dict, budget_tokens: int) -> Tuple[str, int]:
+    """Builds the compact summary within the budget; returns it with the number of columns shown."""
+    columns_by_name = {column["name"]: column for column in profile["columns"]}
+    row_count = profile["rowCount"]
+    sampling = profile.get("sampling")
+
+    # --- 1. Header ---
+    header = [
+        f"Dataset: {filename}; {row_count} rows; {len(columns_by_name)} columns, "
+        f"summarized below from most to least informative for charting.",
+    ]
+    if sampling:
+        header.append(f"Note: quartiles, top values and correlations are estimated from a sample of {sampling['sampleRows']} rows.")
+    header.append("Columns (name | type | summary):")
+    used = sum(estimate_tokens(line) + 1 for line in header)
+
+    # --- 2. Column Lines, Most Informative First, While the Budget Lasts ---
+    available = budget_tokens - _CORRELATION_RESERVE_TOKENS - _OMITTED_RESERVE_TOKENS
+    lines = []
+    shown = []
+    ranked = [name for name, _ in rank_columns(profile)]
+    for name in ranked:
+        line = _column_line(columns_by_name[name], row_count)
+        cost = estimate_tokens(line) + 1
+        if used + cost > available:
+            break
+        lines.append(line)
+        shown.append(name)
+        used += cost
+
+    # --- 3. Strongest Correlations Among the Columns Shown ---
+    correlation_line = _correlation_line(profile.get("correlation"), set(shown))
+    if correlation_line:
+        lines.append(correlation_line)
+        used += estimate_tokens(correlation_line) + 1
+
+    # --- 4. Name the Columns Left Out, as Far as the Budget Allows ---
+    omitted = ranked[len(shown):]
+    if omitted:
+        lines.append(_omitted_line(omitted, max(budget_tokens - used, 0)))
+    return "\n".join(header + lines), len(shown)
+
+
+def _column_line(column: dict, row_count: int) -> str:
+    name, dtype = column["name"], column["dtype"]
+    if column["stats"] is not None:
+        stats = column["stats"]
+        parts = [
+            f"mean {_format_number(stats.get('mean'))}", f"std {_format_number(stats.get('std'))}",
+            f"min {_format_number(stats.get('min'))}", f"median {_format_number(stats.get('50%'))}",
+            f"max {_format_number(stats.get('max'))}",
+        ]
+        missing = 1 - (stats.get("count") or 0) / row_count if row_count else 0
+        if missing >= 0.005:
+            parts.append(f"{missing:.0%} missing")
+        return f"- {name} | {dtype} | {', '.join(parts)}"
+    if column["topValues"] is not None:
+        shares = ", ".join(f"'{value}' {count / row_count:.0%}" for value, count in column["topValues"][:3]) if row_count else ""
+        return f"- {name} | {dtype} | top: {shares}"
+    if column["highCardinality"]:
+        return f"- {name} | {dtype} | >{CARDINALITY_LIMIT} unique values"
+    return f"- {name} | {dtype} |"
+
+
+def _correlation_line(correlation: Optional[dict], shown: set) -> Optional[str]:
+    if correlation is None:
+        return None
+    names, matrix = correlation["columns"], correlation["matrix"]
+    pairs = []
+    for i, first in enumerate(names):
+        for j in range(i + 1, len(names)):
+            value = matrix[i][j]
+            if first in shown and names[j] in shown and value is not None and abs(value) >= _MIN_CORRELATION:
+                pairs.append((abs(value), first, names[j], value))
+    if not pairs:
+        return None
+    pairs.sort(key=lambda pair: pair[0], reverse=True)
+    strongest = ", ".join(f"{first}~{second} {value:.2f}" for _, first, second, value in pairs[:_MAX_CORRELATION_PAIRS])
+    return f"Strongest correlations: {strongest}"
+
+
+def _omitted_line(omitted: List[str], budget_tokens: int) -> str:
+    line = f"Not shown ({len(omitted)} less informative columns):"
+    used = estimate_tokens(line) + 8 # room for the "+N more" suffix
+    names = []
+    for name in omitted:
+        cost = estimate_tokens(name) + 1
+        if used + cost > budget_tokens:
+            break
+        names.append(name)
+        used += cost
+    remaining = len(omitted) - len(names)
+    listed = ", ".join(names) + (f" (+{remaining} more)" if remaining else "")
+    return f"{line} {listed}" if names else f"{line} (+{remaining} more)"
+
+
+def _strongest_correlations(correlation: Optional[dict]) -> Dict[str, float]:
+    """Maps each numeric column to its largest absolute correlation with another column."""
+    if correlation is None:
+        return {}
+    names, matrix = correlation["columns"], correlation["matrix"]
+    strongest = {}
+    for i, name in enumerate(names):
+        values = [abs(value) for j, value in enumerate(matrix[i]) if j != i and value is not None and not math.isnan(value)]
+        strongest[name] = max(values, default=0.0)
+    return strongest
+
+
+def _numeric_score(stats: dict, row_count: int, correlation: float) -> float:
+    count, mean, std = stats.get("count") or 0, stats.get("mean"), stats.get("std")
+    if not count or mean is None or std is None or std == 0 or math.isnan(std):
+        return 0.1
+    minimum, maximum = stats.get("min"), stats.get("max")
+    # Row numbers and surrogate keys: evenly spread integers spanning about one value per row.
+    if minimum is not None and maximum is not None and float(minimum).is_integer() and float(maximum).is_integer():
+        span = maximum - minimum + 1
+        if 0.9 * count <= span <= 1.1 * count and abs(mean - (minimum + maximum) / 2) <= 0.05 * span:
+            return 0.15
+    spread = 1 - math.exp(-std / (abs(mean) + 1e-9))
+    completeness = count / row_count
+    return (0.35 + 0.35 * spread + 0.3 * correlation) * (0.5 + 0.5 * completeness)
+
+
+def _categorical_score(top_values: list, row_count: int) -> float:
+    counts = [count for _, count in top_values]
+    total = sum(counts)
+    if len(counts) < 2 or not total:
+        return 0.1
+    entropy = -sum(count / total * math.log(count / total) for count in counts if count)
+    evenness = entropy / math.log(len(counts))
+    coverage = min(total / row_count, 1.0)
+    return 0.3 + 0.4 * evenness + 0.2 * coverage
+
+
+def _format_number(value) -> str:
+    """Four significant digits: enough to compare columns, and far fewer tokens than `describe()`'s six decimals."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "n/a"
+    return f"{value:.4g}" if isinstance(value, (int, float)) else str(value)
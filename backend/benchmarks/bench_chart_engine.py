@@ -0,0 +1,140 @@
+"""
+Compares the chart engines' throughput as worker counts grow.
+
+Uploads and ingests a few synthetic datasets with a high-cardinality key
+column, which the chart cube does not cover, so every chart scans the data.
+Then, for each worker count up to the number of cores, fires concurrent
+median charts grouped by that key, round-robin over the datasets, at:
+
+- the "thread" engine: the compute executor with that many threads;
+- the "process" engine: a `ChartEngine` with that many worker processes,
+  started and warmed before timing, as the app does at startup.
+
+Reports latency percentiles, throughput and the speedup over one worker.
+Thread throughput stays flat past one worker because the groupbys hold the
+GIL; process throughput scales with the cores the machine has.
+
+Run from the backend directory:  python -m benchmarks.bench_chart_engine [--rows N] [--max-workers N]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+# Spawned chart workers inherit these variables, so they read the same storage.
+_storage_path = tempfile.mkdtemp(prefix="dashboard-bench-") if "TEMP_STORAGE_PATH" not in os.environ else None
+if _storage_path:
+    os.environ["TEMP_STORAGE_PATH"] = _storage_path
+os.environ.setdefault("STORAGE_JANITOR_INTERVAL_SECONDS", "0")
+os.environ.setdefault("MAX_FILE_SIZE_BYTES", str(1024 * 1024 * 1024))
+
+import numpy as np
+from fastapi import UploadFile
+
+from app.adapters.chart_engine import ChartEngine
+from app.adapters.compute_executor import ComputeExecutor
+from app.adapters.storage import storage_adapter
+from app.config import settings
+from app.schemas.dto import ChartParams
+from app.services import charts_service, dataset_service, ingest_service
+from benchmarks import harness, synthetic
+
+KEY_COLUMN = "CustomerId"
+
+
+def create_datasets(count: int, rows: int, workdir: Path) -> List[str]:
+    """Uploads and ingests `count` distinct datasets in this process; returns their IDs."""
+    dataset_ids = []
+    for seed in range(count):
+        df = synthetic.make_dataframe(rows, seed=seed)
+        df[KEY_COLUMN] = np.random.default_rng(seed).integers(0, rows // 5, rows)
+        path = synthetic.write_csv(df, workdir / f"bench-{seed}.csv")
+        with open(path, "rb") as f:
+            dataset_id = dataset_service.process_new_dataset(UploadFile(file=f, filename=path.name))["datasetId"]
+        manifest = storage_adapter.get_manifest(dataset_id)
+        updates = ingest_service._ingest_in_worker(dataset_id, manifest["storagePath"], manifest["datasetHash_sha256"])
+        storage_adapter.update_manifest(dataset_id, dict(updates, status="ready"))
+        dataset_ids.append(dataset_id)
+    return dataset_ids
+
+
+def chart_requests(dataset_ids: List[str]):
+    """Returns a function giving the next (dataset ID, chart params), round-robin over the datasets."""
+    params = [
+        ChartParams(datasetId=dataset_id, chart_type="bar", x_axis=KEY_COLUMN, y_axis="Metric1", aggregation="median")
+        for dataset_id in dataset_ids
+    ]
+    return itertools.cycle(params).__next__
+
+
+async def bench_engines(dataset_ids: List[str], worker_counts: List[int], args) -> Dict[str, Dict[str, float]]:
+    results = {}
+    next_params = chart_requests(dataset_ids)
+    warmup = len(dataset_ids) * max(worker_counts) # Loads every dataset into every cache it may reach
+
+    for workers in worker_counts:
+        threads = ComputeExecutor(max_workers=workers)
+
+        async def thread_chart():
+            params = next_params()
+            await threads.run(charts_service.generate_chart_data, params.datasetId, params)
+
+        results[f"thread_{workers}"] = await harness.measure_concurrent(thread_chart, args.requests, workers * 2, warmup)
+        threads.shutdown()
+
+        engine = ChartEngine("process", workers, settings.CHART_ENGINE_CACHE_MAX_BYTES, settings.CHART_ENGINE_MAX_QUEUE)
+        engine.start()
+
+        async def process_chart():
+            params = next_params()
+            await engine.run(params.datasetId, charts_service.generate_chart_data, params.datasetId, params)
+
+        results[f"process_{workers}"] = await harness.measure_concurrent(process_chart, args.requests, workers * 2, warmup)
+        engine.shutdown()
+    return results
+
+
+def print_scaling(results: Dict[str, Dict[str, float]], worker_counts: List[int]):
+    print(f"\n{'workers':>8} {'thread ops/s':>13} {'speedup':>8} {'process ops/s':>14} {'speedup':>8}")
+    for workers in worker_counts:
+        thread, process = results[f"thread_{workers}"], results[f"process_{workers}"]
+        print(
+            f"{workers:>8} {thread['throughput_per_s']:>13.1f} "
+            f"{thread['throughput_per_s'] / results['thread_1']['throughput_per_s']:>7.2f}x "
+            f"{process['throughput_per_s']:>14.1f} "
+            f"{process['throughput_per_s'] / results['process_1']['throughput_per_s']:>7.2f}x"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500_000, help="Rows per synthetic dataset.")
+    parser.add_argument("--datasets", type=int, default=4, help="Distinct datasets the charts are spread over.")
+    parser.add_argument("--requests", type=int, default=32, help="Timed chart requests per engine and worker count.")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="Largest worker count measured.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    worker_counts = sorted({1, args.max_workers} | {2 ** i for i in range(1, args.max_workers.bit_length()) if 2 ** i < args.max_workers})
+    print(f"{os.cpu_count()} cores, {args.datasets} datasets of {args.rows} rows, {args.requests} requests per run")
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset_ids = create_datasets(args.datasets, args.rows, Path(workdir))
+    results = asyncio.run(bench_engines(dataset_ids, worker_counts, args))
+    harness.print_results(results)
+    print_scaling(results, worker_counts)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        if _storage_path:
+            shutil.rmtree(_storage_path, ignore_errors=True)
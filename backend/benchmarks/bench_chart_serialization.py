@@ -0,0 +1,62 @@
+"""
+Compares the chart response encoding paths at 1k, 100k and 1M points.
+
+- pydantic: the previous path, `to_dict('records')` validated as ChartDataResponse
+  and encoded with the standard JSON encoder.
+- orjson/records: the current default, a list of {x, y} points encoded by ChartJSONResponse.
+- orjson/columnar: {x: [...], y: [...]} with NumPy arrays encoded directly.
+
+Run from the backend directory:  python -m benchmarks.bench_chart_serialization
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+from app.api.responses import ChartJSONResponse
+from app.schemas.dto import ChartDataResponse, ChartParams
+from app.services import charts_service
+
+SIZES = [1_000, 100_000, 1_000_000]
+REPEATS = 3
+
+
+def _pydantic_path(aggregated_df: pd.DataFrame, params: ChartParams) -> bytes:
+    records = aggregated_df.rename(columns={params.x_axis: "x", params.y_axis: "y"}).to_dict("records")
+    response = ChartDataResponse(series=[{"label": params.y_axis, "data": records}])
+    return JSONResponse(response.model_dump(mode="json")).body
+
+
+def _orjson_path(aggregated_df: pd.DataFrame, params: ChartParams) -> bytes:
+    payload = charts_service._build_chart_response(
+        aggregated_df, params, "sum", len(aggregated_df), lambda: aggregated_df, params.layout
+    )
+    return ChartJSONResponse(payload).body
+
+
+def _best_of(func, *args) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'points':>10} {'pydantic':>12} {'orjson/records':>16} {'orjson/columnar':>17} {'speedup':>9}")
+    for size in SIZES:
+        aggregated_df = pd.DataFrame({"Day": np.arange(size), "Sales": rng.random(size) * 1_000})
+        params = ChartParams(datasetId="bench", chart_type="line", x_axis="Day", y_axis="Sales", aggregation="sum")
+        columnar = params.model_copy(update={"layout": "columnar"})
+
+        baseline = _best_of(_pydantic_path, aggregated_df, params)
+        records = _best_of(_orjson_path, aggregated_df, params)
+        columns = _best_of(_orjson_path, aggregated_df, columnar)
+        print(f"{size:>10} {baseline * 1e3:>10.1f}ms {records * 1e3:>14.1f}ms {columns * 1e3:>15.1f}ms {baseline / columns:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares `pd.read_excel` with the streaming XLSX reader used at ingest.
+
+Builds a multi-sheet workbook, then reports for each reader the time to parse
+the data sheet, and the peak memory allocated while doing so (tracemalloc, in
+a second run since tracing slows parsing down).
+Also reports how long a chart column takes to load from the Parquet copy that
+ingest writes, which is what requests read once a workbook is converted.
+Parity with `pd.read_excel` on irregular sheets is covered by
+tests/test_excel_reader.py; here the two readers' frames are compared once.
+
+Run from the backend directory:  python -m benchmarks.bench_excel_ingest [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from app.adapters import excel_reader
+
+
+def make_workbook(path: Path, rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    regions = rng.choice(["North", "South", "East", "West"], rows)
+    categories = rng.choice([f"Category {i}" for i in range(30)], rows)
+    quantities = rng.integers(1, 20, rows)
+    prices = rng.lognormal(3, 0.8, rows).round(2)
+    start = datetime(2024, 1, 1)
+
+    workbook = Workbook(write_only=True)
+    notes = workbook.create_sheet("Notes")
+    notes.append(["Generated for benchmarking"])
+    sales = workbook.create_sheet("Sales")
+    sales.append(["OrderDate", "Region", "Category", "Quantity", "UnitPrice", "SaleAmount"])
+    for i in range(rows):
+        quantity, price = int(quantities[i]), float(prices[i])
+        sales.append([start + timedelta(minutes=i), regions[i], categories[i], quantity, price, round(quantity * price, 2)])
+    workbook.save(path)
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.xlsx"
+        make_workbook(path, rows)
+        print(f"rows={rows} file={os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        baseline, baseline_time, baseline_peak = measure(lambda: pd.read_excel(path, sheet_name="Sales"))
+        streamed, streamed_time, streamed_peak = measure(lambda: excel_reader.read_sheet(path, "Sales"))
+        print(f"pd.read_excel   {baseline_time:7.2f}s  peak {baseline_peak / 1024 / 1024:7.1f} MB")
+        print(f"streaming       {streamed_time:7.2f}s  peak {streamed_peak / 1024 / 1024:7.1f} MB"
+              f"  ({baseline_time / streamed_time:.1f}x faster)")
+        pd.testing.assert_frame_equal(baseline, streamed)
+
+        parquet_path = Path(tmp) / "data.parquet"
+        streamed.to_parquet(parquet_path, index=False)
+        start = time.perf_counter()
+        pd.read_parquet(parquet_path, columns=["Region", "SaleAmount"])
+        column_time = time.perf_counter() - start
+        print(f"parquet columns {column_time * 1000:7.1f}ms (reads after ingest)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Compares exact and sampling-mode profiling on a synthetic dataset.
+
+Reports the time to profile the chunks (as `profiling_service.get_profile`
+streams them) and how far the sampled figures are from the exact ones:
+relative error of the quartiles, overlap of the top-5 values per categorical
+column, and the largest absolute difference in the correlation matrix.
+
+Run from the backend directory:  python -m benchmarks.bench_profiling [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.services.profiling_service import _profile_to_json
+from app.services.streaming_profiler import StreamingProfiler, SampledProfiler
+
+
+def make_dataset(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    quantity = rng.integers(1, 20, rows)
+    return pd.DataFrame({
+        "Region": rng.choice(["North", "South", "East", "West"], rows, p=[0.4, 0.3, 0.2, 0.1]),
+        "Category": rng.choice([f"Category {i}" for i in range(30)], rows),
+        "CustomerId": rng.integers(0, rows // 3 + 1, rows).astype(str),
+        "Quantity": quantity,
+        "UnitPrice": rng.lognormal(3, 0.8, rows).round(2),
+        "SaleAmount": (quantity * rng.lognormal(3, 0.8, rows)).round(2),
+        "Discount": np.where(rng.random(rows) < 0.1, np.nan, rng.random(rows) * 0.3),
+    })
+
+
+def profile(profiler, df: pd.DataFrame) -> dict:
+    chunk_rows = settings.PROFILING_CHUNK_ROWS
+    for start in range(0, len(df), chunk_rows):
+        profiler.update(df.iloc[start:start + chunk_rows])
+    return _profile_to_json(profiler.result(), "bench")
+
+
+def timed(factory, df: pd.DataFrame):
+    start = time.perf_counter()
+    result = profile(factory(), df)
+    return result, time.perf_counter() - start
+
+
+def compare(exact: dict, sampled: dict) -> dict:
+    quartile_errors, overlaps = [], []
+    for exact_col, sampled_col in zip(exact["columns"], sampled["columns"]):
+        if exact_col["stats"]:
+            for stat in ("25%", "50%", "75%"):
+                truth, estimate = exact_col["stats"][stat], sampled_col["stats"][stat]
+                quartile_errors.append(abs(estimate - truth) / abs(truth) if truth else abs(estimate))
+        if exact_col["topValues"] and sampled_col["topValues"]:
+            exact_top = {value for value, _ in exact_col["topValues"]}
+            sampled_top = {value for value, _ in sampled_col["topValues"]}
+            overlaps.append(len(exact_top & sampled_top) / len(exact_top))
+    corr_diff = np.nanmax(np.abs(np.array(exact["correlation"]["matrix"]) - np.array(sampled["correlation"]["matrix"])))
+    return {
+        "maxQuartileRelError": max(quartile_errors),
+        "minTop5Overlap": min(overlaps) if overlaps else None,
+        "maxCorrelationDiff": float(corr_diff),
+    }
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    df = make_dataset(rows)
+    print(f"rows={rows} chunk={settings.PROFILING_CHUNK_ROWS} sample={settings.PROFILING_SAMPLE_ROWS}")
+
+    exact, exact_time = timed(lambda: StreamingProfiler(settings.PROFILING_SKETCH_SIZE), df)
+    sampled, sampled_time = timed(lambda: SampledProfiler(settings.PROFILING_SKETCH_SIZE, settings.PROFILING_SAMPLE_ROWS), df)
+
+    print(f"exact   {exact_time:8.2f}s")
+    print(f"sampled {sampled_time:8.2f}s  ({exact_time / sampled_time:.1f}x faster)")
+    for name, value in compare(exact, sampled).items():
+        print(f"  {name}: {value:.4f}" if value is not None else f"  {name}: n/a")
+
+
+if __name__ == "__main__":
+    main()
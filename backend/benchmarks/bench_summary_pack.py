@@ -0,0 +1,65 @@
+"""
+Compares the full and the token-budgeted summary packs as datasets get wider.
+
+For each width, profiles a synthetic dataset and reports the estimated tokens
+of the full summary and of the budgeted one (SUMMARY_PACK_MAX_TOKENS), the
+columns the budgeted one keeps, and the time to render each. The time to get
+suggestions back is measured through `llm_client` against the fake OpenAI
+client, charging a prefill delay per prompt token (LLM_PROMPT_SECONDS_PER_1K_TOKENS,
+about what hosted models spend reading a prompt before the first output token),
+next to the prompt time saved that the budget report estimates from it.
+
+Run from the backend directory:  python -m benchmarks.bench_summary_pack [rows]
+"""
+import asyncio
+import sys
+import time
+
+from app.adapters import llm_client
+from app.config import settings
+from app.services import summary_budget
+from app.services.profiling_service import _render_summary_pack, profile_dataframe
+from benchmarks import synthetic
+from benchmarks.fake_openai import FakeAsyncOpenAI
+
+WIDTHS = [10, 50, 150, 300]
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+async def _llm_seconds(prompts):
+    timings = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        await llm_client.get_suggestions_from_llm(prompt)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    prefill = settings.LLM_PROMPT_SECONDS_PER_1K_TOKENS
+    llm_client.client = FakeAsyncOpenAI("[]", latency_seconds=0.0, seconds_per_prompt_token=prefill / 1000)
+    budget = settings.SUMMARY_PACK_MAX_TOKENS
+    print(f"{rows} rows, budget {budget} tokens, prefill {prefill * 1000:.0f}ms per 1k prompt tokens")
+    print(f"{'columns':>8} {'full tokens':>12} {'budgeted':>9} {'shown':>6} {'render full':>12} {'budgeted':>9} "
+          f"{'LLM full':>9} {'budgeted':>9} {'est. saved':>11}")
+    for width in WIDTHS:
+        df = synthetic.make_dataframe(rows, numeric_columns=width // 2, categorical_columns=width - 1 - width // 2, cardinality=30)
+        profile = profile_dataframe(df, "bench")
+        full, full_render = _timed(_render_summary_pack, "bench.csv", profile)
+        (budgeted, report), budget_render = _timed(summary_budget.fit_to_budget, "bench.csv", profile, full, budget, prefill)
+        full_llm, budgeted_llm = asyncio.run(_llm_seconds([full, budgeted]))
+        print(
+            f"{width:>8} {report['fullTokens']:>12} {report['tokens']:>9} {report['shownColumns']:>6} "
+            f"{full_render * 1e3:>10.1f}ms {(full_render + budget_render) * 1e3:>7.1f}ms "
+            f"{full_llm * 1e3:>7.0f}ms {budgeted_llm * 1e3:>7.0f}ms {report['estimatedSavedPromptSeconds'] * 1e3:>9.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+A local stand-in for `openai.AsyncOpenAI`, installed as `llm_client.client` so
+the benchmarks exercise the suggestion path without network access or cost.
+It answers every chat completion with the same content after a fixed latency,
+plus an optional delay per prompt token to model the time the API spends
+reading the prompt. It streams the content in chunks when asked to, and reports
+token usage like the real API (estimated at four characters per token).
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import AsyncIterator, List
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, content: str, latency_seconds: float = 0.2, stream_chunks: int = 20, seconds_per_prompt_token: float = 0.0):
+        self.content = content
+        self.latency_seconds = latency_seconds
+        self.seconds_per_prompt_token = seconds_per_prompt_token
+        self.stream_chunks = stream_chunks
+        self.calls = 0
+        self.prompts: List[str] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, messages: list, stream: bool = False, **kwargs):
+        self.calls += 1
+        prompt = "".join(message["content"] for message in messages)
+        self.prompts.append(prompt)
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(self.content) // 4)
+        await asyncio.sleep(usage.prompt_tokens * self.seconds_per_prompt_token)
+        if stream:
+            return self._stream(usage)
+        await asyncio.sleep(self.latency_seconds)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    async def _stream(self, usage) -> AsyncIterator[SimpleNamespace]:
+        # The latency is spread over the chunks, so the first one arrives early as with a real stream.
+        step = max(1, -(-len(self.content) // self.stream_chunks))
+        for start in range(0, len(self.content), step):
+            await asyncio.sleep(self.latency_seconds / self.stream_chunks)
+            delta = SimpleNamespace(content=self.content[start:start + step])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+    async def close(self):
+        pass
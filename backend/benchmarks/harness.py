@@ -0,0 +1,169 @@
+"""
+Measurement helpers for the benchmark suite: latency percentiles, throughput,
+peak resident memory, and comparison with a stored baseline.
+"""
+import asyncio
+import json
+import os
+import platform
+import resource
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Metrics compared with the baseline, and whether a higher value is better.
+COMPARED_METRICS = {"p50_ms": False, "p95_ms": False, "throughput_per_s": True, "peak_rss_mb": False}
+
+
+class PeakRSSSampler:
+    """
+    Polls the process's resident set size while a scenario runs and keeps the
+    peak. Where /proc is unavailable, falls back to the process-wide peak from
+    getrusage, which never goes down between scenarios.
+    """
+    def __init__(self, interval_seconds: float = 0.005):
+        self.interval_seconds = interval_seconds
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._has_proc = os.path.exists("/proc/self/statm")
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self.peak_bytes = self._current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._current_rss())
+
+    def _poll(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.peak_bytes = max(self.peak_bytes, self._current_rss())
+
+    def _current_rss(self) -> int:
+        if self._has_proc:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if platform.system() == "Darwin" else peak * 1024 # bytes on macOS, KiB elsewhere
+
+
+def summarize(latencies: List[float], wall_seconds: float, peak_rss_bytes: int) -> Dict[str, float]:
+    """Reduces per-operation latencies (seconds) to the figures reported and compared."""
+    values = np.array(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p90_ms": round(float(np.percentile(values, 90)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+        "throughput_per_s": round(len(latencies) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "peak_rss_mb": round(peak_rss_bytes / (1024 * 1024), 1),
+    }
+
+
+def measure(func: Callable[[], Any], iterations: int, setup: Optional[Callable[[], Any]] = None, warmup: int = 1) -> Dict[str, float]:
+    """
+    Calls `func` `iterations` times one after the other, after `warmup` untimed
+    calls. `setup` runs untimed before every call, e.g. to clear a cache.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+    latencies = []
+    with PeakRSSSampler() as sampler:
+        wall_start = time.perf_counter()
+        for _ in range(iterations):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - start)
+        wall = time.perf_counter() - wall_start
+    return summarize(latencies, wall, sampler.peak_bytes)
+
+
+async def measure_concurrent(func: Callable[[], Awaitable[Any]], requests: int, concurrency: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Runs `requests` calls of the coroutine function `func`, at most
+    `concurrency` at a time, and reports their latencies and the throughput.
+    """
+    for _ in range(warmup):
+        await func()
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed_call():
+        async with slots:
+            start = time.perf_counter()
+            await func()
+            latencies.append(time.perf_counter() - start)
+
+    with PeakRSSSampler() as sampler:
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(timed_call() for _ in range(requests)))
+        wall = time.perf_counter() - wall_start
+    return summarize(latencies, wall, sampler.peak_bytes)
+
+
+# --- Baselines ---
+
+def save_baseline(path: Path, config: Dict[str, Any], results: Dict[str, Dict[str, float]]):
+    path.write_text(json.dumps({"config": config, "machine": platform.platform(), "results": results}, indent=2) + "\n")
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text())
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float, noise_floor_ms: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Compares each scenario's metrics with the baseline. A metric regresses when
+    it is worse than the baseline by more than `tolerance` (0.2 = 20%). Timing
+    changes below `noise_floor_ms` per operation never count, so sub-millisecond
+    scenarios do not fail on scheduler jitter.
+    """
+    rows = []
+    for scenario, current in results.items():
+        previous = baseline["results"].get(scenario)
+        if previous is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = previous.get(metric), current.get(metric)
+            if not before or not after:
+                continue
+            ratio = after / before
+            worse = ratio < 1 - tolerance if higher_is_better else ratio > 1 + tolerance
+            if metric.endswith("_ms"):
+                worse = worse and after - before > noise_floor_ms
+            elif metric == "throughput_per_s":
+                worse = worse and 1000 / after - 1000 / before > noise_floor_ms
+            rows.append({"scenario": scenario, "metric": metric, "baseline": before, "current": after, "ratio": ratio, "regressed": worse})
+    return rows
+
+
+def print_results(results: Dict[str, Dict[str, float]]):
+    print(f"{'scenario':<28} {'n':>5} {'p50':>10} {'p90':>10} {'p95':>10} {'p99':>10} {'ops/s':>10} {'peak RSS':>10}")
+    for scenario, r in results.items():
+        print(
+            f"{scenario:<28} {r['count']:>5} {r['p50_ms']:>8.1f}ms {r['p90_ms']:>8.1f}ms {r['p95_ms']:>8.1f}ms "
+            f"{r['p99_ms']:>8.1f}ms {r['throughput_per_s']:>10.1f} {r['peak_rss_mb']:>8.1f}MB"
+        )
+
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    print(f"{'scenario':<28} {'metric':<18} {'baseline':>10} {'current':>10} {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"{row['scenario']:<28} {row['metric']:<18} {row['baseline']:>10.1f} {row['current']:>10.1f} {(row['ratio'] - 1) * 100:>+7.1f}%{flag}")
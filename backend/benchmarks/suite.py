@@ -0,0 +1,264 @@
+"""
+End-to-end benchmark suite: ingest, profiling, charts and suggestions.
+
+Generates a synthetic dataset (see `benchmarks.synthetic`), then measures:
+
+- the services called directly: `process_new_dataset` and the ingest job for
+  CSV and XLSX uploads, `create_summary_pack` with and without a stored
+  profile, and `generate_chart_data` for each chart type with a cold and a
+  warm DataFrame cache;
+- the full HTTP routes through an in-process ASGI client, with concurrent
+  requests: upload until ready, suggestions (fresh, stored and streamed),
+  chart data and chart batches.
+
+The OpenAI client is replaced by `benchmarks.fake_openai.FakeAsyncOpenAI`.
+Each scenario reports latency percentiles, throughput and the peak RSS of the
+process. With `--save-baseline` the results are written to the baseline file;
+otherwise they are compared with it, and the run exits with status 1 when a
+metric regresses by more than `--tolerance`. Baselines only compare runs of the
+same options on the same machine.
+
+Run from the backend directory:  python -m benchmarks.suite [--rows N] [--save-baseline]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# The app reads its settings at import time: benchmark datasets get their own
+# storage, no janitor sweeps during a run, and room for large synthetic files.
+# Spawned ingest workers inherit these variables, so they use the same storage.
+_storage_path = tempfile.mkdtemp(prefix="dashboard-bench-") if "TEMP_STORAGE_PATH" not in os.environ else None
+if _storage_path:
+    os.environ["TEMP_STORAGE_PATH"] = _storage_path
+os.environ.setdefault("STORAGE_JANITOR_INTERVAL_SECONDS", "0")
+os.environ.setdefault("MAX_FILE_SIZE_BYTES", str(1024 * 1024 * 1024))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+import pandas as pd
+from fastapi import UploadFile
+
+from app.adapters import llm_client
+from app.adapters.dataframe_cache import dataframe_cache
+from app.adapters.storage import storage_adapter
+from app.main import app
+from app.schemas.dto import ChartParams
+from app.services import charts_service, dataset_service, ingest_service, profiling_service
+from benchmarks import harness, synthetic
+from benchmarks.fake_openai import FakeAsyncOpenAI
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def chart_specs(df: pd.DataFrame) -> List[Dict[str, str]]:
+    """One chart per type, over the synthetic columns."""
+    categories, numbers = synthetic.categorical_columns(df), synthetic.numeric_columns(df)
+    return [
+        {"chart_type": "bar", "x_axis": categories[0], "y_axis": numbers[0], "aggregation": "sum"},
+        {"chart_type": "line", "x_axis": synthetic.DATE_COLUMN, "y_axis": numbers[-1], "aggregation": "mean"},
+        {"chart_type": "pie", "x_axis": categories[-1], "y_axis": numbers[0], "aggregation": "count"},
+        {"chart_type": "scatter", "x_axis": numbers[0], "y_axis": numbers[-1], "aggregation": "sum"},
+    ]
+
+
+def suggestions_json(df: pd.DataFrame) -> str:
+    """What the fake LLM answers: one valid suggestion per chart type."""
+    return json.dumps([
+        {"title": f"{spec['aggregation']} of {spec['y_axis']} by {spec['x_axis']}", "insight": "Synthetic insight.", "parameters": spec}
+        for spec in chart_specs(df)
+    ])
+
+
+# --- Services, Called Directly ---
+
+def bench_services(df: pd.DataFrame, files: Dict[str, Path], args) -> Dict[str, Dict[str, float]]:
+    results = {}
+    dataset_ids = {}
+    for file_format, path in files.items():
+        uploaded = {}
+
+        def upload():
+            with open(path, "rb") as f:
+                uploaded["id"] = dataset_service.process_new_dataset(UploadFile(file=f, filename=path.name))["datasetId"]
+
+        def remove_previous_upload():
+            # Identical uploads are deduplicated, so each one starts from an empty store.
+            if "id" in uploaded:
+                storage_adapter.delete_dataset(uploaded.pop("id"))
+
+        results[f"upload_{file_format}"] = harness.measure(upload, args.iterations, setup=remove_previous_upload)
+
+        def ingest():
+            # The work of an ingest job, run in this process instead of a worker.
+            manifest = storage_adapter.get_manifest(uploaded["id"])
+            updates = ingest_service._ingest_in_worker(
+                uploaded["id"], manifest["storagePath"], manifest["datasetHash_sha256"], manifest.get("sheetName")
+            )
+            storage_adapter.update_manifest(uploaded["id"], dict(updates, status="ready"))
+
+        results[f"ingest_{file_format}"] = harness.measure(ingest, args.ingest_iterations)
+        dataset_ids[file_format] = uploaded["id"]
+
+    dataset_id = dataset_ids["csv"]
+    results["summary_pack_cold"] = harness.measure(
+        lambda: profiling_service.create_summary_pack(dataset_id), args.ingest_iterations,
+        setup=lambda: storage_adapter.update_manifest(dataset_id, {"profilingResults": None}),
+    )
+    results["summary_pack_warm"] = harness.measure(lambda: profiling_service.create_summary_pack(dataset_id), args.iterations)
+
+    for spec in chart_specs(df):
+        params = ChartParams(datasetId=dataset_id, **spec)
+        results[f"chart_{spec['chart_type']}_cold"] = harness.measure(
+            lambda: charts_service.generate_chart_data(dataset_id, params), args.iterations, setup=dataframe_cache.clear
+        )
+        results[f"chart_{spec['chart_type']}_warm"] = harness.measure(
+            lambda: charts_service.generate_chart_data(dataset_id, params), args.iterations
+        )
+    return results
+
+
+# --- HTTP Routes, through an In-Process ASGI Client ---
+
+async def bench_http(df: pd.DataFrame, args) -> Dict[str, Dict[str, float]]:
+    results = {}
+    llm_client.client = FakeAsyncOpenAI(suggestions_json(df), latency_seconds=args.llm_latency)
+    # Every upload differs from the others and from the file of the service
+    # scenarios, so none is answered from the deduplication index.
+    shifted = synthetic.numeric_columns(df)[0]
+    variants = (df.assign(**{shifted: df[shifted] + i}).to_csv(index=False).encode() for i in itertools.count(1))
+    specs = chart_specs(df)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=600) as client:
+
+            async def call(method: str, url: str, **kwargs) -> httpx.Response:
+                response = await client.request(method, url, **kwargs)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{method} {url} answered {response.status_code}: {response.text[:200]}")
+                return response
+
+            async def upload_until_ready() -> str:
+                response = await call("POST", "/api/datasets/upload", files={"file": ("bench.csv", next(variants), "text/csv")})
+                dataset_id = response.json()["datasetId"]
+                while True:
+                    status = (await call("GET", f"/api/datasets/{dataset_id}")).json()["status"]
+                    if status == "ready":
+                        return dataset_id
+                    if status == "failed":
+                        raise RuntimeError(f"Ingest of dataset '{dataset_id}' failed.")
+                    await asyncio.sleep(0.02)
+
+            results["http_upload_until_ready"] = await harness.measure_concurrent(
+                upload_until_ready, args.ingest_iterations, min(args.concurrency, 2)
+            )
+            dataset_id = await upload_until_ready()
+
+            async def fresh_suggestions():
+                await call("POST", "/api/analysis/suggestions", json={"datasetId": dataset_id, "refresh": True})
+
+            async def stored_suggestions():
+                await call("POST", "/api/analysis/suggestions", json={"datasetId": dataset_id})
+
+            async def streamed_suggestions():
+                await call("POST", "/api/analysis/suggestions/stream", json={"datasetId": dataset_id, "refresh": True})
+
+            chart_cycle = itertools.cycle(specs)
+
+            async def chart():
+                await call("POST", "/api/charts/data", json=dict(next(chart_cycle), datasetId=dataset_id))
+
+            async def chart_batch():
+                await call("POST", "/api/charts/batch", json={"datasetId": dataset_id, "charts": specs})
+
+            for name, func in [
+                ("http_suggestions_fresh", fresh_suggestions),
+                ("http_suggestions_stored", stored_suggestions),
+                ("http_suggestions_stream", streamed_suggestions),
+                ("http_chart", chart),
+                ("http_chart_batch", chart_batch),
+            ]:
+                results[name] = await harness.measure_concurrent(func, args.requests, args.concurrency)
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--numeric-columns", type=int, default=4)
+    parser.add_argument("--categorical-columns", type=int, default=3)
+    parser.add_argument("--cardinality", type=int, default=20, help="Distinct values per categorical column.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per in-process scenario.")
+    parser.add_argument("--ingest-iterations", type=int, default=3, help="Timed calls per ingest and profiling scenario.")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per HTTP scenario.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once in HTTP scenarios.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds the fake OpenAI client takes to answer.")
+    parser.add_argument("--skip-http", action="store_true", help="Only run the in-process service scenarios.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression before a metric fails (0.2 = 20%%).")
+    parser.add_argument("--output", type=Path, help="Also write this run's results as JSON.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    config = {
+        name: getattr(args, name)
+        for name in ("rows", "numeric_columns", "categorical_columns", "cardinality", "seed", "iterations",
+                     "ingest_iterations", "requests", "concurrency", "llm_latency", "skip_http")
+    }
+    print(f"Benchmark configuration: {config}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = synthetic.make_dataframe(args.rows, args.numeric_columns, args.categorical_columns, args.cardinality, args.seed)
+        files = {
+            "csv": synthetic.write_csv(df, Path(tmp) / "bench.csv"),
+            "xlsx": synthetic.write_xlsx(df, Path(tmp) / "bench.xlsx"),
+        }
+        start = time.perf_counter()
+        results = bench_services(df, files, args)
+        if not args.skip_http:
+            results.update(asyncio.run(bench_http(df, args)))
+        print(f"Finished in {time.perf_counter() - start:.1f}s\n")
+
+    harness.print_results(results)
+    if args.output:
+        args.output.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+
+    if args.save_baseline:
+        harness.save_baseline(args.baseline, config, results)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    baseline = harness.load_baseline(args.baseline)
+    if baseline["config"] != config:
+        print(f"\nWarning: the baseline was recorded with {baseline['config']}; figures may not be comparable.")
+    print()
+    rows = harness.compare(results, baseline, args.tolerance)
+    harness.print_comparison(rows)
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"\n{len(regressions)} metrics regressed by more than {args.tolerance:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        if _storage_path:
+            shutil.rmtree(_storage_path, ignore_errors=True)
@@ -0,0 +1,56 @@
+"""
+Synthetic datasets for the benchmarks: an order timestamp, `categorical_columns`
+text columns with `cardinality` distinct values each, and `numeric_columns`
+columns mixing integers and floats. The same seed always yields the same data,
+so runs are comparable with a stored baseline.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+DATE_COLUMN = "OrderDate"
+
+
+def make_dataframe(rows: int, numeric_columns: int = 4, categorical_columns: int = 3, cardinality: int = 20, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {DATE_COLUMN: pd.Timestamp(datetime(2024, 1, 1)) + pd.to_timedelta(np.arange(rows), unit="min")}
+    for i in range(categorical_columns):
+        labels = np.array([f"Category{i} {value}" for value in range(cardinality)])
+        # Zipf-like weights, so some groups dominate as in real sales data
+        weights = 1.0 / np.arange(1, cardinality + 1)
+        data[f"Category{i}"] = labels[rng.choice(cardinality, rows, p=weights / weights.sum())]
+    for i in range(numeric_columns):
+        if i % 2 == 0:
+            data[f"Metric{i}"] = rng.integers(1, 1_000, rows)
+        else:
+            data[f"Metric{i}"] = rng.lognormal(3, 0.8, rows).round(2)
+    return pd.DataFrame(data)
+
+
+def categorical_columns(df: pd.DataFrame) -> List[str]:
+    return [column for column in df.columns if column.startswith("Category")]
+
+
+def numeric_columns(df: pd.DataFrame) -> List[str]:
+    return [column for column in df.columns if column.startswith("Metric")]
+
+
+def write_csv(df: pd.DataFrame, path: Path) -> Path:
+    df.to_csv(path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+    return path
+
+
+def write_xlsx(df: pd.DataFrame, path: Path) -> Path:
+    """Writes the frame as the only sheet of a workbook, streaming rows like a real export."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Data")
+    sheet.append(list(df.columns))
+    columns = [df[column].tolist() for column in df.columns]
+    for row in zip(*columns):
+        sheet.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value for value in row])
+    workbook.save(path)
+    return path
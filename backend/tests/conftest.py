@@ -0,0 +1,48 @@
+"""
+Shared test setup. The app reads its settings at import time, so the
+environment is prepared here, before any test module imports it: a temporary
+storage directory, no janitor sweeps, and short LLM timeouts so resilience
+tests take seconds.
+"""
+import io
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pytest
+
+_storage_path = tempfile.mkdtemp(prefix="dashboard-tests-")
+os.environ["TEMP_STORAGE_PATH"] = _storage_path
+for name, value in {
+    "OPENAI_API_KEY": "sk-test",
+    "STORAGE_JANITOR_INTERVAL_SECONDS": "0",
+    "LLM_REQUEST_TIMEOUT_SECONDS": "1",
+    "LLM_DEADLINE_SECONDS": "2.5",
+    "LLM_BACKOFF_BASE_SECONDS": "0.05",
+    "LLM_BACKOFF_MAX_SECONDS": "0.5",
+    "LLM_CIRCUIT_FAILURE_THRESHOLD": "3",
+    "LLM_CIRCUIT_RESET_SECONDS": "1",
+}.items():
+    os.environ[name] = value
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_storage_path, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def create_dataset():
+    """Returns a function that uploads a DataFrame as a CSV, ingests it in this process and returns its ID."""
+    from fastapi import UploadFile
+    from app.adapters.storage import storage_adapter
+    from app.services import dataset_service, ingest_service
+
+    def create(df: pd.DataFrame, filename: str = "data.csv") -> str:
+        upload = UploadFile(file=io.BytesIO(df.to_csv(index=False).encode()), filename=filename)
+        dataset_id = dataset_service.process_new_dataset(upload)["datasetId"]
+        manifest = storage_adapter.get_manifest(dataset_id)
+        updates = ingest_service._ingest_in_worker(dataset_id, manifest["storagePath"], manifest["datasetHash_sha256"])
+        storage_adapter.update_manifest(dataset_id, dict(updates, status="ready"))
+        return dataset_id
+    return create
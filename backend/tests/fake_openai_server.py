@@ -0,0 +1,124 @@
+"""
+A local HTTP server speaking the OpenAI chat completions protocol, for
+exercising `llm_client` over real connections: timeouts, retries, Retry-After,
+the circuit breaker and connection reuse.
+
+Each request consumes the next behaviour queued with `script()`, or the
+default one once the queue is empty:
+
+- "ok": a normal answer (streamed as server-sent events when requested);
+- "error": HTTP 500;
+- "rate_limit:<seconds>": HTTP 429 with a Retry-After header;
+- "slow:<seconds>": a normal answer after a delay;
+- "trickle:<seconds>": a streamed answer with a delay before each chunk;
+- "hang": never answers (until the server stops).
+
+    with FakeOpenAIServer(content) as server:
+        llm_client.client = llm_client.create_client(base_url=server.url)
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import List, Set
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+class FakeOpenAIServer:
+    def __init__(self, content: str, default: str = "ok", stream_chunks: int = 10):
+        self.content = content
+        self.default = default
+        self.stream_chunks = stream_chunks
+        self.requests = 0
+        self.client_ports: Set[int] = set() # One per TCP connection the client opened
+        self._behaviours = deque()
+        self._app = Starlette(routes=[Route("/v1/chat/completions", self._chat_completions, methods=["POST"])])
+        self._server = None
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def url(self) -> str:
+        port = self._server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    def script(self, *behaviours: str):
+        """Queues behaviours for the next requests, in order."""
+        self._behaviours.extend(behaviours)
+
+    def reset(self, default: str = "ok"):
+        self._behaviours.clear()
+        self.default = default
+        self.requests = 0
+        self.client_ports = set()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        config = uvicorn.Config(self._app, host="127.0.0.1", port=0, log_level="warning", lifespan="off", timeout_graceful_shutdown=1)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopping = True # Releases hung requests
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    async def _chat_completions(self, request: Request):
+        self.requests += 1
+        self.client_ports.add(request.client.port)
+        body = await request.json()
+        behaviour = self._behaviours.popleft() if self._behaviours else self.default
+        name, _, argument = behaviour.partition(":")
+
+        if name == "error":
+            return JSONResponse({"error": {"message": "The server had an error.", "type": "server_error"}}, status_code=500)
+        if name == "rate_limit":
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached.", "type": "requests"}},
+                status_code=429, headers={"retry-after": argument or "1"},
+            )
+        if name == "hang":
+            while not self._stopping:
+                await asyncio.sleep(0.05)
+            return JSONResponse({"error": {"message": "Server shutting down.", "type": "server_error"}}, status_code=503)
+        if name == "slow":
+            await asyncio.sleep(float(argument))
+
+        prompt_tokens = sum(len(message["content"]) for message in body["messages"]) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(self.content) // 4, "total_tokens": prompt_tokens + len(self.content) // 4}
+        if body.get("stream"):
+            chunk_delay = float(argument) if name == "trickle" else 0
+            return StreamingResponse(self._events(body["model"], usage, chunk_delay), media_type="text/event-stream")
+        return JSONResponse({
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    async def _events(self, model: str, usage: dict, chunk_delay: float = 0):
+        step = max(1, -(-len(self.content) // self.stream_chunks))
+        chunks: List[dict] = [
+            {"index": 0, "delta": {"content": self.content[start:start + step]}, "finish_reason": None}
+            for start in range(0, len(self.content), step)
+        ]
+        for choice in chunks:
+            await asyncio.sleep(chunk_delay)
+            if self._stopping:
+                return
+            yield self._event({"choices": [choice]}, model)
+        yield self._event({"choices": [], "usage": usage}, model)
+        yield "data: [DONE]\n\n"
+
+    @staticmethod
+    def _event(payload: dict, model: str) -> str:
+        payload.update({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model})
+        return f"data: {json.dumps(payload)}\n\n"
@@ -0,0 +1,64 @@
+"""
+Chart generation: batches answer each chart on its own terms, so one invalid
+chart reports an error without taking the others down.
+"""
+import pandas as pd
+import pytest
+
+from app.schemas.dto import ChartParams, SuggestionParameters
+from app.services import charts_service
+
+
+@pytest.fixture(scope="module")
+def dataset_id(create_dataset):
+    return create_dataset(pd.DataFrame({
+        "Region": ["North", "South", "East", "West"] * 50,
+        "Sales": range(200),
+        "Product": [f"P{i % 40}" for i in range(200)],
+        "OrderDate": pd.date_range("2024-01-01", periods=200, freq="D").strftime("%Y-%m-%d"),
+    }))
+
+
+def chart(x_axis: str, y_axis: str, aggregation: str = "sum", **kwargs) -> SuggestionParameters:
+    return SuggestionParameters(chart_type="bar", x_axis=x_axis, y_axis=y_axis, aggregation=aggregation, **kwargs)
+
+
+def single_chart(dataset_id: str, params: SuggestionParameters) -> dict:
+    return charts_service.generate_chart_data(dataset_id, ChartParams(datasetId=dataset_id, **params.model_dump()))
+
+
+def test_batch_reports_invalid_charts_per_item(dataset_id):
+    charts = [
+        chart("Region", "Sales"),
+        chart("Region", "Missing"),
+        chart("Product", "Sales", "mean"),
+        chart("Sales", "Region", time_granularity="month"),
+        chart("Region", "Sales", "max"),
+    ]
+    responses = charts_service.generate_chart_data_batch(dataset_id, charts)
+
+    assert len(responses) == len(charts)
+    assert responses[1] == {"series": [], "metadata": None, "error": "Invalid column name provided for aggregation: 'Missing'"}
+    assert responses[3]["series"] == [] and "does not contain dates" in responses[3]["error"]
+    for i in (0, 2, 4):
+        assert "error" not in responses[i]
+        assert responses[i] == single_chart(dataset_id, charts[i])
+
+
+def test_batch_with_only_invalid_charts(dataset_id):
+    responses = charts_service.generate_chart_data_batch(dataset_id, [chart("Nope", "Sales"), chart("Region", "Nope")])
+    assert [response["error"] for response in responses] == ["Invalid column name provided for aggregation: 'Nope'"] * 2
+
+
+def test_chart_can_aggregate_its_own_grouping_column(dataset_id):
+    params = chart("Region", "Region", "count")
+    response = single_chart(dataset_id, params)
+
+    assert response["series"][0]["label"] == "Region"
+    assert {point["x"]: point["y"] for point in response["series"][0]["data"]} == {"East": 50, "North": 50, "South": 50, "West": 50}
+    assert charts_service.generate_chart_data_batch(dataset_id, [params, chart("Region", "Sales")])[0] == response
+
+
+def test_time_bucketed_chart_can_aggregate_its_date_column(dataset_id):
+    response = single_chart(dataset_id, chart("OrderDate", "OrderDate", "count", time_granularity="month"))
+    assert [point["y"] for point in response["series"][0]["data"]] == [31, 29, 31, 30, 31, 30, 18]
@@ -0,0 +1,37 @@
+"""
+Uploads of a file already stored reuse its dataset.
+"""
+import io
+
+import pandas as pd
+from fastapi import UploadFile
+
+from app.adapters.storage import storage_adapter
+from app.services import dataset_service
+
+FILE = pd.DataFrame({"Region": ["North", "South", "East"], "Sales": [3, 1, 2]}).to_csv(index=False).encode()
+
+
+def upload(filename: str) -> dict:
+    return dataset_service.process_new_dataset(UploadFile(file=io.BytesIO(FILE), filename=filename))
+
+
+def test_repeat_upload_is_recorded_on_the_original_dataset():
+    first = upload("sales.csv")
+    original = storage_adapter.get_manifest(first["datasetId"])
+    storage_adapter.update_manifest(first["datasetId"], {"status": "failed", "error": "worker crashed"})
+
+    again = upload("sales-copy.csv")
+    manifest = storage_adapter.get_manifest(first["datasetId"])
+
+    assert again["datasetId"] == first["datasetId"]
+    assert again["filename"] == "sales-copy.csv"
+    assert again["status"] == manifest["status"] == "uploaded" # Queued again by the caller
+    assert manifest["error"] is None
+    assert manifest["originalFilename"] == "sales.csv"
+    assert manifest["uploadedAt_utc"] == original["uploadedAt_utc"]
+    assert manifest["lastUploadedFilename"] == "sales-copy.csv"
+    assert manifest["lastUploadedAt_utc"] >= original["uploadedAt_utc"]
+
+    storage_adapter.update_manifest(first["datasetId"], {"status": "ready"})
+    assert upload("sales.csv")["status"] == "ready"
@@ -0,0 +1,71 @@
+"""
+Parity of the streaming XLSX reader with `pd.read_excel` on irregular sheets.
+"""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from app.adapters import excel_reader
+
+# Sheets given as {(row, column): value}, 1-based like Excel, for cells to be placed freely.
+PARITY_SHEETS = {
+    "ragged rows": {(1, 1): "a", (1, 2): "b", (2, 1): 1, (2, 2): 2, (3, 1): 3, (3, 2): 4, (3, 3): 5, (4, 1): 6, (4, 5): 7},
+    "blank column": {(1, 1): "a", (1, 2): "b", (1, 3): "c", (2, 1): 1, (2, 3): "x", (3, 1): 2, (3, 3): "y"},
+    "leading blank row": {(2, 1): "a", (2, 2): "b", (3, 1): 1, (3, 2): 2},
+    "offset table": {(3, 2): "a", (3, 3): "b", (4, 2): 1, (4, 3): 2, (7, 2): 3, (7, 3): "z"},
+    "blank rows inside": {(1, 1): "a", (1, 2): "b", (2, 1): 1, (2, 2): 2.5, (5, 1): 3, (5, 2): 4.5, (6, 1): 5, (6, 2): 6.5},
+    "unnamed header cells": {(1, 1): "a", (1, 3): "c", (1, 4): "a", (2, 1): 1, (2, 2): 2, (2, 3): 3, (2, 4): 4},
+    "header only": {(1, 1): "a", (1, 2): "b"},
+    "na strings": {(1, 1): "a", (1, 2): "b", (2, 1): "NA", (2, 2): 1, (3, 1): "x", (3, 2): "N/A", (4, 1): "null", (4, 2): 2},
+    "empty strings": {(1, 1): "a", (1, 2): "b", (2, 1): "", (2, 2): "x", (3, 1): "y", (3, 2): ""},
+    "bool with blank": {(1, 1): "flag", (1, 2): "n", (2, 1): True, (2, 2): 1, (3, 1): False, (3, 2): 2, (4, 2): 3},
+    "formula errors": {(1, 1): "a", (1, 2): "b", (2, 1): 1, (2, 2): "#N/A", (3, 1): "#DIV/0!", (3, 2): 2.5},
+    "dates and numbers": {(1, 1): "when", (1, 2): "value", (2, 1): datetime(2024, 1, 2, 3, 4), (2, 2): 1.0, (3, 1): datetime(2024, 2, 3), (3, 2): 2.25},
+    "empty sheet": {},
+}
+
+
+@pytest.fixture(scope="module")
+def workbook_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("excel") / "parity.xlsx"
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for name, cells in PARITY_SHEETS.items():
+        sheet = workbook.create_sheet(name)
+        for (row, column), value in cells.items():
+            sheet.cell(row=row, column=column, value=value)
+    workbook.save(path)
+    return path
+
+
+@pytest.mark.parametrize("sheet_name", list(PARITY_SHEETS))
+def test_matches_read_excel(workbook_path, sheet_name):
+    expected = pd.read_excel(workbook_path, sheet_name=sheet_name)
+    pd.testing.assert_frame_equal(excel_reader.read_sheet(workbook_path, sheet_name), expected)
+
+
+@pytest.mark.parametrize("sheet_name, columns", [
+    ("na strings", ["b"]),
+    ("unnamed header cells", ["a.1", "Unnamed: 1"]),
+    ("blank rows inside", ["a", "missing"]),
+])
+def test_selected_columns_match_read_excel(workbook_path, sheet_name, columns):
+    requested = set(columns)
+    expected = pd.read_excel(workbook_path, sheet_name=sheet_name, usecols=lambda col: col in requested)
+    pd.testing.assert_frame_equal(excel_reader.read_sheet(workbook_path, sheet_name, columns=columns), expected)
+
+
+def test_first_sheet_by_default(workbook_path):
+    assert excel_reader.list_sheets(workbook_path) == list(PARITY_SHEETS)
+    pd.testing.assert_frame_equal(excel_reader.read_sheet(workbook_path), pd.read_excel(workbook_path))
+
+
+def test_unknown_sheet_and_invalid_file_raise_value_error(workbook_path, tmp_path):
+    with pytest.raises(ValueError, match="not found"):
+        excel_reader.read_sheet(workbook_path, "Missing")
+    not_a_workbook = tmp_path / "data.xlsx"
+    not_a_workbook.write_bytes(b"a,b\n1,2\n")
+    with pytest.raises(ValueError, match="not a valid XLSX"):
+        excel_reader.read_sheet(not_a_workbook)
@@ -0,0 +1,27 @@
+"""
+Ingest jobs run detached from the request that queued them.
+"""
+import asyncio
+
+from app.adapters import metrics
+from app.services import ingest_service
+
+
+def stage_count(route: str, stage: str) -> float:
+    series = metrics.stage_duration_seconds._series.get((route, stage))
+    return series[-2] if series else 0
+
+
+def test_ingest_job_does_not_time_its_stages_under_the_request_that_queued_it():
+    async def upload_request():
+        timings = metrics.begin_request("/api/datasets/upload")
+        ingest_service.start_ingest("removed-before-ingest") # Its job still times the "ingest" stage
+        await asyncio.gather(*ingest_service._jobs.values())
+        return timings
+
+    background_before = stage_count("background", "ingest")
+    timings = asyncio.run(upload_request())
+
+    assert timings == []
+    assert stage_count("/api/datasets/upload", "ingest") == 0
+    assert stage_count("background", "ingest") == background_before + 1
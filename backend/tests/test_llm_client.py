@@ -0,0 +1,221 @@
+"""
+Resilience of the LLM client against a local fake OpenAI server
+(`tests.fake_openai_server`) over real HTTP connections: retries with backoff,
+Retry-After, the overall deadline and the circuit breaker, down to the 503
+the suggestions route answers while the circuit is open.
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pandas as pd
+import pytest
+
+from app.adapters import llm_client
+from app.adapters.circuit_breaker import CircuitBreaker
+from app.config import settings
+from app.main import app
+from tests.fake_openai_server import FakeOpenAIServer
+
+SUGGESTIONS = [
+    {
+        "title": f"{aggregation} of Sales by Region",
+        "insight": "Sales differ by region.",
+        "parameters": {"chart_type": "bar", "x_axis": "Region", "y_axis": "Sales", "aggregation": aggregation},
+    }
+    for aggregation in ("sum", "mean", "max", "count")
+]
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeOpenAIServer(json.dumps(SUGGESTIONS)) as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def fresh_client_state(server):
+    """Each test starts from a healthy upstream and a closed circuit."""
+    server.reset()
+    llm_client.breaker = CircuitBreaker("openai", settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_SECONDS)
+    llm_client._llm_semaphore = None # Bound to the event loop of the test that creates it
+    yield
+
+
+def run_with_client(server: FakeOpenAIServer, scenario):
+    """Runs `scenario()` in a new event loop with a pooled client pointed at the fake server."""
+    async def main():
+        llm_client.client = llm_client.create_client(base_url=server.url)
+        try:
+            return await scenario()
+        finally:
+            await llm_client.client.close()
+    return asyncio.run(main())
+
+
+async def timed_call():
+    """Returns (seconds, outcome) where outcome is the response text or the exception raised."""
+    start = time.perf_counter()
+    try:
+        outcome = await llm_client.get_suggestions_from_llm("Summary")
+    except Exception as e:
+        outcome = e
+    return time.perf_counter() - start, outcome
+
+
+async def open_circuit(server: FakeOpenAIServer):
+    server.default = "error"
+    for _ in range(settings.LLM_CIRCUIT_FAILURE_THRESHOLD):
+        await timed_call()
+    assert llm_client.breaker.state == CircuitBreaker.OPEN
+
+
+def test_reuses_one_pooled_connection(server):
+    async def sequential_calls():
+        for _ in range(10):
+            await timed_call()
+
+    run_with_client(server, sequential_calls)
+    assert server.requests == 10
+    assert len(server.client_ports) == 1
+
+
+def test_retries_server_errors_with_backoff(server):
+    server.script("error", "error")
+    _, outcome = run_with_client(server, timed_call)
+    assert json.loads(outcome) == SUGGESTIONS
+    assert server.requests == 3
+    assert llm_client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retries_timeouts(server):
+    server.script("hang")
+    elapsed, outcome = run_with_client(server, timed_call)
+    assert isinstance(outcome, str)
+    assert server.requests == 2
+    assert elapsed < settings.LLM_DEADLINE_SECONDS
+
+
+def test_rate_limit_honours_retry_after(server):
+    server.script("rate_limit:1")
+    elapsed, outcome = run_with_client(server, timed_call)
+    assert isinstance(outcome, str)
+    assert elapsed >= 1.0
+
+
+def test_hung_upstream_fails_within_the_deadline(server):
+    server.default = "hang"
+    elapsed, outcome = run_with_client(server, timed_call)
+    assert isinstance(outcome, llm_client.LLMUnavailableError)
+    assert elapsed <= settings.LLM_DEADLINE_SECONDS + 0.5
+    assert outcome.retry_after > 0
+
+
+def test_open_circuit_fails_fast_without_calling_upstream(server):
+    async def scenario():
+        await open_circuit(server)
+        requests_before = server.requests
+        elapsed, outcome = await timed_call()
+        return requests_before, elapsed, outcome
+
+    requests_before, elapsed, outcome = run_with_client(server, scenario)
+    assert isinstance(outcome, llm_client.LLMUnavailableError)
+    assert server.requests == requests_before
+    assert elapsed < 0.1
+    assert 0 < outcome.retry_after <= settings.LLM_CIRCUIT_RESET_SECONDS
+
+
+def test_half_open_probe_closes_the_circuit(server):
+    async def scenario():
+        await open_circuit(server)
+        server.default = "ok"
+        await asyncio.sleep(llm_client.breaker.retry_after())
+        return await timed_call()
+
+    _, outcome = run_with_client(server, scenario)
+    assert isinstance(outcome, str)
+    assert llm_client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_the_circuit(server):
+    async def scenario():
+        await open_circuit(server)
+        await asyncio.sleep(llm_client.breaker.retry_after())
+        requests_before = server.requests
+        _, outcome = await timed_call()
+        return requests_before, outcome
+
+    requests_before, outcome = run_with_client(server, scenario)
+    assert isinstance(outcome, llm_client.LLMUnavailableError)
+    assert server.requests == requests_before + 1 # The probe only, no retries once the circuit reopens
+    assert llm_client.breaker.state == CircuitBreaker.OPEN
+
+
+def test_local_error_leaves_a_half_open_circuit_unchanged(server):
+    async def raise_type_error(**kwargs):
+        raise TypeError("a bug in building the request")
+
+    async def scenario():
+        await open_circuit(server)
+        await asyncio.sleep(llm_client.breaker.retry_after())
+        pooled_client = llm_client.client
+        llm_client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=raise_type_error)))
+        try:
+            return await timed_call()
+        finally:
+            llm_client.client = pooled_client
+
+    _, outcome = run_with_client(server, scenario)
+    assert isinstance(outcome, TypeError)
+    assert llm_client.breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_streams_suggestions_through_the_pooled_client(server):
+    async def scenario():
+        return "".join([text async for text in llm_client.stream_suggestions_from_llm("Summary")])
+
+    assert json.loads(run_with_client(server, scenario)) == SUGGESTIONS
+    assert server.requests == 1
+
+
+def test_trickling_stream_is_cut_off_at_the_deadline(server):
+    server.script("trickle:0.5") # Each chunk arrives within the read timeout, the whole answer does not
+    llm_client.breaker = CircuitBreaker("openai", 1, settings.LLM_CIRCUIT_RESET_SECONDS)
+
+    async def scenario():
+        start, received = time.perf_counter(), []
+        try:
+            async for text in llm_client.stream_suggestions_from_llm("Summary"):
+                received.append(text)
+        except llm_client.LLMUnavailableError as e:
+            return time.perf_counter() - start, received, e
+
+    elapsed, received, error = run_with_client(server, scenario)
+    assert 0 < len(received) < server.stream_chunks
+    assert elapsed <= settings.LLM_DEADLINE_SECONDS + 0.5
+    assert error.retry_after > 0
+    assert llm_client.breaker.state == CircuitBreaker.OPEN
+    assert llm_client._get_llm_semaphore()._value == settings.LLM_MAX_CONCURRENCY
+
+
+def test_suggestions_route_answers_503_with_retry_after_while_the_circuit_is_open(server, create_dataset):
+    dataset_id = create_dataset(pd.DataFrame({"Region": ["North", "South", "East", "West"] * 25, "Sales": range(100)}))
+
+    async def scenario():
+        await open_circuit(server)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/analysis/suggestions", json={"datasetId": dataset_id, "refresh": True})
+            server.default = "ok"
+            await asyncio.sleep(llm_client.breaker.retry_after())
+            recovered = await client.post("/api/analysis/suggestions", json={"datasetId": dataset_id, "refresh": True})
+        return response, recovered
+
+    response, recovered = run_with_client(server, scenario)
+    assert response.status_code == 503
+    assert 1 <= int(response.headers["retry-after"]) <= settings.LLM_CIRCUIT_RESET_SECONDS
+    assert recovered.status_code == 200
+    assert len(recovered.json()) == len(SUGGESTIONS)
+
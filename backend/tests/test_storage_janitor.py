@@ -0,0 +1,60 @@
+"""
+Storage sweeps never evict a dataset a request is using, and evictions reach
+the chart engine's worker caches.
+"""
+import asyncio
+
+import pandas as pd
+import pytest
+
+from app.adapters.chart_engine import ChartEngine
+from app.adapters.dataframe_cache import dataframe_cache
+from app.adapters.storage import storage_adapter
+from app.config import settings
+from app.schemas.dto import ChartParams
+from app.services import charts_service, storage_janitor
+
+SALES = pd.DataFrame({"Region": ["North", "South"] * 10, "Sales": range(20)})
+
+
+@pytest.fixture
+def over_quota(monkeypatch):
+    """Makes every dataset count as over the storage quota, and none as expired."""
+    monkeypatch.setattr(settings, "STORAGE_TTL_SECONDS", 0)
+    monkeypatch.setattr(settings, "STORAGE_MAX_BYTES", 1)
+
+
+def test_dataset_in_use_is_not_evicted(create_dataset, over_quota):
+    dataset_id = create_dataset(SALES, filename="in-use.csv")
+    others = set(storage_adapter.list_dataset_ids()) - {dataset_id}
+
+    with storage_adapter.use_dataset(dataset_id), storage_adapter.use_dataset(dataset_id):
+        assert storage_janitor.sweep(protected=others) == []
+    assert storage_adapter.is_in_use(dataset_id) is False
+    assert storage_janitor.sweep(protected=others) == [dataset_id]
+
+
+def _cache_entries() -> int:
+    return dataframe_cache.stats()["entries"]
+
+
+def test_eviction_drops_the_dataset_from_chart_worker_caches(create_dataset, over_quota, monkeypatch):
+    dataset_id = create_dataset(SALES.assign(Sales=SALES["Sales"] * 2), filename="worker-cache.csv")
+    others = set(storage_adapter.list_dataset_ids()) - {dataset_id}
+    engine = ChartEngine("process", workers=1, cache_max_bytes=settings.CHART_ENGINE_CACHE_MAX_BYTES, max_queue=4)
+    monkeypatch.setattr(storage_janitor, "chart_engine", engine)
+    params = ChartParams(datasetId=dataset_id, chart_type="bar", x_axis="Region", y_axis="Sales", aggregation="median")
+
+    async def scenario():
+        await engine.run(dataset_id, charts_service.generate_chart_data, dataset_id, params)
+        cached_before = await engine.run(dataset_id, _cache_entries)
+        evicted = storage_janitor.sweep(protected=others)
+        return cached_before, evicted, await engine.run(dataset_id, _cache_entries)
+
+    try:
+        cached_before, evicted, cached_after = asyncio.run(scenario())
+    finally:
+        engine.shutdown()
+    assert evicted == [dataset_id]
+    assert cached_before == 1
+    assert cached_after == 0
@@ -1,4 +1,3 @@
-import { useEffect, useMemo } from 'react';
 import {
   BarChart, Bar,
   LineChart, Line,
@@ -7,32 +6,20 @@ import {
   XAxis, YAxis, Tooltip, CartesianGrid, Legend, ResponsiveContainer,
 } from 'recharts';
 import Skeleton from '../atoms/Skeleton';
-import { useChartData } from '../../hooks/useChartData';
 
 /**
  * Renders a chart using Recharts based on suggestion parameters and server data.
- * Expects backend shape: { series: [{ label, data: [{ x, y }] }] }
+ * Expects backend shape: { series: [{ label, data: [{ x, y }] }], metadata }
+ * Large results arrive already downsampled by the server (see metadata.downsampling).
+ * Data is fetched by the parent (see DashboardGrid), so cards added together share one request.
+ * @param {{
+ * suggestion: object,
+ * status: 'idle' | 'loading' | 'success' | 'error',
+ * chartData: object | null,
+ * error: string | null,
+ * }} props
  */
-const ChartRenderer = ({ datasetId, suggestion }) => {
-  const { status, chartData, error, fetchChartData } = useChartData();
-
-  const params = useMemo(() => {
-    const p = suggestion.parameters;
-    return {
-      datasetId,
-      chart_type: p.chart_type,
-      x_axis: p.x_axis,
-      y_axis: p.y_axis,
-      aggregation: p.aggregation,
-    };
-  }, [datasetId, suggestion]);
-
-  useEffect(() => {
-    if (datasetId && suggestion?.parameters) {
-      fetchChartData(params);
-    }
-  }, [datasetId, suggestion, fetchChartData, params]);
-
+const ChartRenderer = ({ suggestion, status, chartData, error }) => {
   if (status === 'loading' || status === 'idle') return <Skeleton className="h-full w-full rounded-lg" />;
   if (status === 'error') return <div className="text-red-600 text-sm">Chart error: {error}</div>;
 
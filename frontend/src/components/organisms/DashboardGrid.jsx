@@ -1,11 +1,22 @@
+import { useEffect } from 'react';
 import ChartCard from '../molecules/ChartCard';
 import ChartRenderer from './ChartRenderer';
+import { useChartDataBatch } from '../../hooks/useChartDataBatch';
 
 /**
  * Displays selected charts in a responsive 2-column grid (max ~5 charts).
  * @param {{ datasetId: string, charts: Array<any> }} props
  */
 const DashboardGrid = ({ datasetId, charts }) => {
+  const { getChartData, fetchChartsData } = useChartDataBatch();
+
+  // Load the cards not loaded yet with a single request whenever the selection changes.
+  useEffect(() => {
+    if (datasetId && charts && charts.length > 0) {
+      fetchChartsData(datasetId, charts.map((suggestion) => suggestion.parameters));
+    }
+  }, [datasetId, charts, fetchChartsData]);
+
   if (!charts || charts.length === 0) {
     return (
       <div
@@ -21,13 +32,21 @@ const DashboardGrid = ({ datasetId, charts }) => {
 
   return (
     <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
-      {charts.map((suggestion, idx) => (
-        <ChartCard key={idx} title={suggestion.title}>
-          <div className="flex items-center justify-center h-full">
-            <ChartRenderer datasetId={datasetId} suggestion={suggestion} />
-          </div>
-        </ChartCard>
-      ))}
+      {charts.map((suggestion, idx) => {
+        const chart = getChartData(datasetId, suggestion.parameters);
+        return (
+          <ChartCard key={idx} title={suggestion.title}>
+            <div className="flex items-center justify-center h-full">
+              <ChartRenderer
+                suggestion={suggestion}
+                status={chart.status}
+                chartData={chart.data}
+                error={chart.error}
+              />
+            </div>
+          </ChartCard>
+        );
+      })}
     </div>
   );
 };
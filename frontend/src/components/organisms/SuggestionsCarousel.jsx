@@ -41,19 +41,14 @@ const SuggestionsCarousel = ({ suggestions, status, onAddChart }) => {
   }, [emblaApi]);
 
   const showNavigation = status === 'success' && suggestions.length > 3;
+  // While streaming, received cards are shown and skeletons fill the rest of the first row.
+  const skeletonCount = status === 'loading' ? Math.max(3 - suggestions.length, 0) : 0;
 
   return (
     <div className="relative -mx-2">
       <div className="overflow-hidden px-2" ref={emblaRef}>
         <div className="flex gap-4">
-          {status === 'loading' &&
-            Array.from({ length: 3 }).map((_, idx) => (
-              <div key={idx} className="flex-[0_0_calc(100%/3-theme(space.4)*2/3)] min-w-0">
-                <SuggestionCard.Skeleton />
-              </div>
-            ))}
-
-          {status === 'success' &&
+          {(status === 'loading' || status === 'success') &&
             suggestions.map((suggestion, idx) => (
               <div key={idx} className="flex-[0_0_calc(100%/3-theme(space.4)*2/3)] min-w-0">
                 <SuggestionCard
@@ -62,6 +57,12 @@ const SuggestionsCarousel = ({ suggestions, status, onAddChart }) => {
                 />
               </div>
             ))}
+
+          {Array.from({ length: skeletonCount }).map((_, idx) => (
+            <div key={`skeleton-${idx}`} className="flex-[0_0_calc(100%/3-theme(space.4)*2/3)] min-w-0">
+              <SuggestionCard.Skeleton />
+            </div>
+          ))}
         </div>
       </div>
 
@@ -0,0 +1,108 @@
+import { useState, useCallback, useRef, useEffect } from 'react';
+import { getChartDataBatch as apiGetChartDataBatch } from '../lib/api/charts';
+import toast from 'react-hot-toast';
+
+const IDLE_CHART = { status: 'idle', data: null, error: null };
+
+// Identifies a chart's data by its dataset and parameters, so identical charts share it.
+const chartKey = (datasetId, params) => `${datasetId}:${JSON.stringify(params)}`;
+
+/**
+ * Custom hook to manage fetching the data of the dashboard charts in batch requests.
+ * Data is kept per chart: fetching only requests the charts not loaded yet, so
+ * adding a chart leaves the others on screen. Each chart is written only by the
+ * latest request for it, so a slow older response cannot overwrite a newer one.
+ * A chart the batch answers with an error is marked errored on its own.
+ */
+export const useChartDataBatch = () => {
+  // { [chartKey]: { status, data, error, requestId } }
+  const [entries, setEntries] = useState({});
+  // Mirrors `entries` synchronously, so back-to-back fetches see each other's charts.
+  const entriesRef = useRef({});
+  const datasetIdRef = useRef(null);
+  const requestIdRef = useRef(0);
+  const controllersRef = useRef(new Set());
+
+  // Cancels pending requests and forgets the charts they were loading, so the next fetch requests them again.
+  const abortAll = useCallback(() => {
+    controllersRef.current.forEach((controller) => controller.abort());
+    controllersRef.current.clear();
+    entriesRef.current = Object.fromEntries(
+      Object.entries(entriesRef.current).filter(([, entry]) => entry.status !== 'loading'),
+    );
+    setEntries(entriesRef.current);
+  }, []);
+
+  // Cancel requests still running when the dashboard unmounts.
+  useEffect(() => abortAll, [abortAll]);
+
+  const update = useCallback((changes) => {
+    entriesRef.current = { ...entriesRef.current, ...changes };
+    setEntries(entriesRef.current);
+  }, []);
+
+  /**
+   * Fetch data for the charts not loaded yet (memoized) to avoid effect loops.
+   * Switching datasets cancels pending requests and forgets the previous charts.
+   */
+  const fetchChartsData = useCallback(async (datasetId, charts) => {
+    if (datasetIdRef.current !== datasetId) {
+      abortAll();
+      datasetIdRef.current = datasetId;
+      entriesRef.current = {};
+      setEntries({});
+    }
+
+    const missing = new Map();
+    charts.forEach((params) => {
+      const key = chartKey(datasetId, params);
+      const entry = entriesRef.current[key];
+      if (!entry || entry.status === 'error') missing.set(key, params);
+    });
+    if (missing.size === 0) return;
+
+    const requestId = ++requestIdRef.current;
+    const keys = [...missing.keys()];
+    const owned = () => keys.filter((key) => entriesRef.current[key]?.requestId === requestId);
+    update(Object.fromEntries(keys.map((key) => [key, { status: 'loading', data: null, error: null, requestId }])));
+
+    const controller = new AbortController();
+    controllersRef.current.add(controller);
+    try {
+      const response = await apiGetChartDataBatch(datasetId, [...missing.values()], { signal: controller.signal });
+      const changes = {};
+      const failed = [];
+      owned().forEach((key) => {
+        const item = response[keys.indexOf(key)];
+        // A chart the server could not generate carries an error; the others still render.
+        if (item?.error) {
+          changes[key] = { status: 'error', data: null, error: item.error, requestId };
+          failed.push(item.error);
+        } else {
+          changes[key] = { status: 'success', data: item, error: null, requestId };
+        }
+      });
+      update(changes);
+      if (failed.length > 0) {
+        toast.error(`Chart Error: ${failed[0]}${failed.length > 1 ? ` (and ${failed.length - 1} more)` : ''}`);
+      }
+    } catch (err) {
+      if (err.name === 'AbortError') return;
+      const errorMessage = err.message || 'Failed to fetch chart data.';
+      update(Object.fromEntries(owned().map((key) => [key, { status: 'error', data: null, error: errorMessage, requestId }])));
+      toast.error(`Chart Error: ${errorMessage}`);
+    } finally {
+      controllersRef.current.delete(controller);
+    }
+  }, [abortAll, update]);
+
+  /**
+   * Returns the state of one chart: { status, data, error }.
+   */
+  const getChartData = useCallback(
+    (datasetId, params) => entries[chartKey(datasetId, params)] || IDLE_CHART,
+    [entries],
+  );
+
+  return { getChartData, fetchChartsData };
+};
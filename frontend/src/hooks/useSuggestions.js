@@ -1,9 +1,10 @@
 import { useState, useCallback, useRef } from 'react';
-import { getSuggestions as apiGetSuggestions } from '../lib/api/analysis';
+import { streamSuggestions as apiStreamSuggestions } from '../lib/api/analysis';
 import toast from 'react-hot-toast';
 
 /**
  * Custom hook to manage fetching AI-generated suggestions.
+ * Suggestions are streamed, so `suggestions` grows while status is 'loading'.
  */
 export const useSuggestions = () => {
   const [status, setStatus] = useState('idle'); // 'idle' | 'loading' | 'success' | 'error'
@@ -27,8 +28,9 @@ export const useSuggestions = () => {
     toast.loading('Generando sugerencias con IA...');
 
     try {
-      const response = await apiGetSuggestions(datasetId);
-      setSuggestions(response);
+      await apiStreamSuggestions(datasetId, (suggestion) => {
+        setSuggestions((current) => [...current, suggestion]);
+      });
       setStatus('success');
       toast.dismiss();
       toast.success('¡Sugerencias listas!');
@@ -1,4 +1,4 @@
-import { api } from './client';
+import { api, apiStream } from './client';
 
 /**
  * Fetches AI-generated suggestions for a given dataset ID.
@@ -12,3 +12,16 @@ export const getSuggestions = (datasetId) => {
     body: { datasetId },
   });
 };
+
+/**
+ * Streams AI-generated suggestions for a given dataset ID, one at a time.
+ * @param {string} datasetId - The ID of the dataset.
+ * @param {function(object): void} onSuggestion - Called with each suggestion as it arrives.
+ * @returns {Promise<void>} Resolves once every suggestion has been received.
+ */
+export const streamSuggestions = (datasetId, onSuggestion) => {
+  return apiStream('/analysis/suggestions/stream', {
+    method: 'POST',
+    body: { datasetId },
+  }, onSuggestion);
+};
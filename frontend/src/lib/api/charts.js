@@ -16,4 +16,19 @@ export const getChartData = (params) => {
     method: 'POST',
     body: params,
   });
-};
\ No newline at end of file
+};
+
+/**
+ * Fetches the aggregated data for several charts of a dataset in one request.
+ * @param {string} datasetId - The ID of the dataset.
+ * @param {Array<object>} charts - Chart parameters ({ chart_type, x_axis, y_axis, aggregation }).
+ * @param {{ signal?: AbortSignal }} [options] - Optional signal to cancel the request.
+ * @returns {Promise<Array<object>>} One chart data series per chart, in the same order.
+ */
+export const getChartDataBatch = (datasetId, charts, { signal } = {}) => {
+  return api('/charts/batch', {
+    method: 'POST',
+    body: { datasetId, charts },
+    signal,
+  });
+};
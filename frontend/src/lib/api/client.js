@@ -35,3 +35,49 @@ export const api = async (endpoint, options = {}) => {
   return response.json();
 };
 
+
+/**
+ * Makes a JSON POST-style call whose response is newline-delimited JSON and
+ * invokes a callback for every line as soon as it arrives.
+ * A line carrying a `detail` key is treated as an error reported mid-stream.
+ * @param {string} endpoint - The API endpoint to call.
+ * @param {object} options - The options for the fetch request (method, body, etc.).
+ * @param {function(object): void} onItem - Called with each parsed line.
+ * @returns {Promise<void>} Resolves when the stream ends.
+ */
+export const apiStream = async (endpoint, options = {}, onItem) => {
+  const url = `${API_BASE_URL}${endpoint}`;
+  const headers = {
+    'Content-Type': 'application/json',
+    ...options.headers,
+  };
+
+  const response = await fetch(url, { ...options, headers, body: JSON.stringify(options.body) });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({ detail: response.statusText }));
+    throw new Error(errorData.detail || 'An unknown API error occurred.');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+
+  const handleLine = (line) => {
+    if (!line.trim()) return;
+    const item = JSON.parse(line);
+    if (item.detail) throw new Error(item.detail);
+    onItem(item);
+  };
+
+  // Lines can be split across network chunks, so keep the unfinished tail.
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(buffered + decoder.decode());
+};
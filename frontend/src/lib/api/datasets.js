@@ -3,12 +3,16 @@ import { api } from './client';
 /**
  * Uploads a dataset file to the backend.
  * @param {File} file - The file to be uploaded.
- * @returns {Promise<{datasetId: string, filename: string}>} The response from the API.
+ * @param {string} [sheet] - For XLSX files, the sheet to analyse (defaults to the first one).
+ * @returns {Promise<{datasetId: string, filename: string, status: string, sheets?: string[], sheetName?: string}>} The response from the API.
  */
-export const uploadDataset = (file) => {
+export const uploadDataset = (file, sheet) => {
   // Create a FormData object to send the file.
   const formData = new FormData();
   formData.append('file', file);
+  if (sheet) {
+    formData.append('sheet', sheet);
+  }
 
   // Use the api client to make the POST request.
   return api('/datasets/upload', {